@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.db.models.signals import pre_migrate
+
+
+class ChatConfig(AppConfig):
+    name = "chat"
+
+    def ready(self):
+        from .db_pool import disable_statement_timeout
+
+        # 파티션 변환/인덱스 생성 등 긴 마이그레이션이 쿼리 타임아웃에 걸리지 않도록
+        pre_migrate.connect(disable_statement_timeout, sender=self)
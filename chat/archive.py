@@ -0,0 +1,496 @@
+"""콜드 메시지 아카이브 (압축 세그먼트 파일)
+
+오래된 월의 메시지는 DB에서 로컬 디스크의 세그먼트 파일로 옮겨집니다.
+
+- ``messages-YYYYMM.seg``: zlib으로 압축한 블록을 이어 붙인 추가 전용 파일
+  (다시 쓴 세그먼트는 세대 번호를 붙인 ``messages-YYYYMM.<세대>.seg``)
+- ``messages-YYYYMM.idx``: 블록마다 한 줄씩 기록하는 희소 인덱스(JSONL)
+  (채팅방, 시간 범위, ID 범위, 세그먼트 세대, 파일 오프셋, 행 수)
+- ``messages-YYYYMM.done``: 해당 월 아카이브가 완료되었음을 나타내는 마커
+
+완료된 월에 늦게 들어온 메시지(과거 메시지 적재, 재시도된 저장, 시계 오차)는
+``merge_late_rows()`` 가 해당 채팅방의 블록을 다시 써서 합칩니다. 채팅방
+보존 기간이 지난 메시지도 ``expire_room()`` 이 같은 방식으로 블록을 다시 써서
+지웁니다. 다시 쓸 때는 남은 블록을 새 세대 세그먼트로 복사하고 인덱스를
+바꾼 뒤 이전 세대 파일을 지우므로, 지운 메시지가 디스크에 남지 않습니다.
+
+하나의 블록에는 한 채팅방의 메시지만 시간순으로 들어가므로, 채팅방과 시간
+조건으로 읽을 때는 인덱스만 보고 필요한 블록만 압축 해제하면 됩니다.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import zlib
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from django.conf import settings
+
+# 세그먼트 행 레이아웃 (JSON 배열 위치 순서)
+ROW_FIELDS = ("id", "room_id", "sender_id", "created_at", "is_read", "content")
+
+
+def archive_root():
+    return settings.MESSAGE_ARCHIVE_ROOT
+
+
+def _path(month, suffix):
+    return os.path.join(archive_root(), f"messages-{month:%Y%m}.{suffix}")
+
+
+def _segment_suffix(generation):
+    return f"{generation}.seg" if generation else "seg"
+
+
+def _segment_path(month, entry):
+    """인덱스 항목이 가리키는 블록이 든 세그먼트 파일 경로"""
+    return _path(month, _segment_suffix(entry.get("gen", 0)))
+
+
+def to_micros(value):
+    """aware datetime을 UTC epoch 마이크로초 정수로 변환합니다."""
+    delta = value - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_micros(value):
+    seconds, micros = divmod(value, 1_000_000)
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(microsecond=micros)
+
+
+class SegmentWriter:
+    """월 단위 세그먼트 파일 작성기
+
+    블록 데이터를 먼저 기록하고 fsync 한 뒤 인덱스 줄을 추가합니다.
+    인덱스에 없는 세그먼트 꼬리 데이터는 읽기 시 무시되므로 중간에
+    중단되어도 이미 기록된 블록은 안전합니다.
+
+    ``generation`` 이 있으면 (다시 쓰는 중) 그 세대의 세그먼트 파일을 새로
+    작성합니다.
+    """
+
+    def __init__(self, month, block_rows=None, index_suffix="idx", generation=0):
+        self.month = month
+        self.block_rows = block_rows or settings.MESSAGE_ARCHIVE_BLOCK_ROWS
+        self.generation = generation
+        self.rows_written = 0
+        self._room_id = None
+        self._rows = []
+        os.makedirs(archive_root(), exist_ok=True)
+        self._seg = open(
+            _path(month, _segment_suffix(generation)), "wb" if generation else "ab"
+        )
+        # 기본 인덱스가 아니면 (다시 쓰는 중인 인덱스) 새로 작성
+        self._idx = open(
+            _path(month, index_suffix),
+            "a" if index_suffix == "idx" else "w",
+            encoding="utf-8",
+        )
+
+    def add(self, message):
+        """메시지 한 건 추가 (채팅방, 시간순으로 정렬되어 들어와야 함)"""
+        if message["room_id"] != self._room_id or len(self._rows) >= self.block_rows:
+            self._flush_block()
+            self._room_id = message["room_id"]
+        self._rows.append(
+            [
+                message["id"],
+                message["room_id"],
+                message["sender_id"],
+                to_micros(message["created_at"]),
+                message["is_read"],
+                message["content"],
+            ]
+        )
+
+    def _flush_block(self):
+        if not self._rows:
+            return
+        payload = "\n".join(
+            json.dumps(row, ensure_ascii=False, separators=(",", ":"))
+            for row in self._rows
+        ).encode("utf-8")
+        data = zlib.compress(payload, 6)
+
+        offset = self._seg.seek(0, os.SEEK_END)
+        self._seg.write(data)
+        self._seg.flush()
+        os.fsync(self._seg.fileno())
+
+        entry = {
+            "room": self._room_id,
+            "first": self._rows[0][3],
+            "last": self._rows[-1][3],
+            "min_id": min(row[0] for row in self._rows),
+            "max_id": max(row[0] for row in self._rows),
+            "offset": offset,
+            "length": len(data),
+            "rows": len(self._rows),
+        }
+        if self.generation:
+            entry["gen"] = self.generation
+        self._write_entry(entry)
+        self.rows_written += len(self._rows)
+        self._rows = []
+
+    def _write_entry(self, entry):
+        self._idx.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._idx.flush()
+        os.fsync(self._idx.fileno())
+
+    def keep(self, entry):
+        """기존 블록을 압축을 풀지 않고 그대로 옮깁니다.
+
+        다른 세대의 블록이면 이 세그먼트 끝에 복사합니다.
+        """
+        self._flush_block()
+        if entry.get("gen", 0) != self.generation:
+            with open(_segment_path(self.month, entry), "rb") as fp:
+                fp.seek(entry["offset"])
+                data = fp.read(entry["length"])
+            entry = dict(entry, offset=self._seg.seek(0, os.SEEK_END))
+            entry.pop("gen", None)
+            if self.generation:
+                entry["gen"] = self.generation
+            self._seg.write(data)
+        self._write_entry(entry)
+
+    def close(self):
+        self._flush_block()
+        self._seg.flush()
+        os.fsync(self._seg.fileno())
+        self._seg.close()
+        self._idx.close()
+
+
+def discard_month(month):
+    """월 세그먼트를 삭제합니다.
+
+    완료되지 않은 세그먼트를 재시도 전에 정리하거나, 보존 기간이 지난 월을
+    통째로 지울 때 사용합니다.
+    """
+    for suffix in ("idx", "done", *_segment_suffixes(month)):
+        try:
+            os.remove(_path(month, suffix))
+        except FileNotFoundError:
+            pass
+    _read_index.cache_clear()
+
+
+def _segment_suffixes(month):
+    """월 세그먼트 파일들의 접미사 (모든 세대)"""
+    root = archive_root()
+    if not os.path.isdir(root):
+        return []
+    prefix = f"messages-{month:%Y%m}."
+    return [
+        name[len(prefix) :]
+        for name in os.listdir(root)
+        if name.startswith(prefix) and name.endswith(".seg")
+    ]
+
+
+def mark_done(month, rows):
+    with open(_path(month, "done"), "w", encoding="utf-8") as marker:
+        json.dump({"rows": rows}, marker)
+    _read_index.cache_clear()
+
+
+def is_done(month):
+    return os.path.exists(_path(month, "done"))
+
+
+def archived_months():
+    """아카이브 완료된 월 목록 (오래된 순)"""
+    root = archive_root()
+    if not os.path.isdir(root):
+        return []
+    months = []
+    for name in os.listdir(root):
+        if name.startswith("messages-") and name.endswith(".done"):
+            stamp = name[len("messages-") : -len(".done")]
+            months.append(datetime.strptime(stamp, "%Y%m").date())
+    return sorted(months)
+
+
+@lru_cache(maxsize=128)
+def _read_index(path, mtime):
+    entries = []
+    with open(path, encoding="utf-8") as fp:
+        for line in fp:
+            if line.strip():
+                entries.append(json.loads(line))
+    return entries
+
+
+def load_index(month):
+    """월 인덱스 항목 목록 (파일 수정 시각 기준으로 캐시)"""
+    path = _path(month, "idx")
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    return _read_index(path, mtime)
+
+
+def read_block(month, entry):
+    """인덱스 항목이 가리키는 블록을 압축 해제해 행 dict 목록으로 반환합니다."""
+    with open(_segment_path(month, entry), "rb") as fp:
+        fp.seek(entry["offset"])
+        data = zlib.decompress(fp.read(entry["length"]))
+    rows = []
+    for line in data.decode("utf-8").split("\n"):
+        values = json.loads(line)
+        row = dict(zip(ROW_FIELDS, values))
+        row["created_at"] = from_micros(row["created_at"])
+        rows.append(row)
+    return rows
+
+
+def _cutoff_micros(cutoffs, room_id):
+    cutoff = cutoffs.get(room_id) if cutoffs else None
+    return to_micros(cutoff) if cutoff is not None else None
+
+
+def room_blocks(room_ids, newest_first=True, cutoffs=None):
+    """채팅방들의 블록을 (월, 인덱스 항목) 형태로 시간순/역순으로 나열합니다.
+
+    ``cutoffs`` (채팅방 ID -> 보존 기간 기준 시각)가 있으면 기준 시각 이전에
+    끝나는 블록은 제외합니다.
+    """
+    room_ids = set(room_ids)
+    cutoffs = {room_id: _cutoff_micros(cutoffs, room_id) for room_id in room_ids}
+    months = archived_months()
+    if newest_first:
+        months = reversed(months)
+    for month in months:
+        entries = [
+            e
+            for e in load_index(month)
+            if e["room"] in room_ids
+            and (cutoffs[e["room"]] is None or e["last"] >= cutoffs[e["room"]])
+        ]
+        entries.sort(key=lambda e: (e["first"], e["min_id"]), reverse=newest_first)
+        for entry in entries:
+            yield month, entry
+
+
+def count(room_ids, cutoffs=None):
+    """채팅방들의 아카이브 메시지 수
+
+    인덱스의 행 수를 더하고, 보존 기간 기준 시각에 걸친 블록만 압축을 풀어
+    셉니다.
+    """
+    total = 0
+    for month, entry in room_blocks(room_ids, cutoffs=cutoffs):
+        cutoff = _cutoff_micros(cutoffs, entry["room"])
+        if cutoff is not None and entry["first"] < cutoff:
+            cutoff = from_micros(cutoff)
+            total += sum(
+                1 for row in read_block(month, entry) if row["created_at"] >= cutoff
+            )
+        else:
+            total += entry["rows"]
+    return total
+
+
+def _sort_key(row):
+    return row["created_at"], row["id"]
+
+
+def _in_range(row, before_id, after, not_before=None):
+    if before_id is not None and row["id"] >= before_id:
+        return False
+    if not_before is not None and row["created_at"] < not_before:
+        return False
+    return after is None or _sort_key(row) > after
+
+
+def iter_messages(
+    room_ids, offset=0, newest_first=True, before_id=None, after=None, cutoffs=None
+):
+    """아카이브 메시지를 최신순(기본)으로 순회합니다.
+
+    단일 채팅방이면 ``offset`` 만큼의 블록은 인덱스의 행 수로 건너뛰고
+    압축을 풀지 않습니다. ID가 모두 ``before_id`` 이상이거나 ``after``
+    ((시각, ID) 커서) 이전에 끝나는 블록도 인덱스만 보고 제외합니다.
+    ``cutoffs`` (채팅방 ID -> 보존 기간 기준 시각)가 있으면 기준 시각 이전
+    메시지는 건너뜁니다.
+    여러 채팅방이면 블록 시간 범위가 겹칠 수 있으므로 채팅방별 스트림을
+    시간 기준으로 병합합니다.
+    """
+    room_ids = list(room_ids)
+    after_micros = to_micros(after[0]) if after is not None else None
+    if len(room_ids) == 1:
+        cutoff_micros = _cutoff_micros(cutoffs, room_ids[0])
+        not_before = from_micros(cutoff_micros) if cutoff_micros is not None else None
+        for month, entry in room_blocks(room_ids, newest_first, cutoffs):
+            if before_id is not None and entry["min_id"] >= before_id:
+                continue
+            if after_micros is not None and entry["last"] < after_micros:
+                continue
+            partial = (
+                (before_id is not None and entry["max_id"] >= before_id)
+                or (after_micros is not None and entry["first"] <= after_micros)
+                or (cutoff_micros is not None and entry["first"] < cutoff_micros)
+            )
+            if not partial and offset >= entry["rows"]:
+                offset -= entry["rows"]
+                continue
+            rows = read_block(month, entry)
+            if partial:
+                rows = [
+                    row for row in rows if _in_range(row, before_id, after, not_before)
+                ]
+            if newest_first:
+                rows.reverse()
+            if offset >= len(rows):
+                offset -= len(rows)
+                continue
+            yield from rows[offset:]
+            offset = 0
+        return
+
+    streams = [
+        iter_messages(
+            [room_id],
+            newest_first=newest_first,
+            before_id=before_id,
+            after=after,
+            cutoffs=cutoffs,
+        )
+        for room_id in room_ids
+    ]
+    merged = heapq.merge(*streams, key=_sort_key, reverse=newest_first)
+    yield from itertools.islice(merged, offset, None)
+
+
+def _rewriter(month, block_rows):
+    """월 세그먼트를 새 세대 파일과 새 인덱스(``idx.new``)로 다시 쓰는 작성기"""
+    generation = 1 + max((e.get("gen", 0) for e in load_index(month)), default=0)
+    return SegmentWriter(
+        month, block_rows, index_suffix="idx.new", generation=generation
+    )
+
+
+def _swap_index(month):
+    """다시 쓴 인덱스(``idx.new``)를 기존 인덱스와 원자적으로 바꿉니다.
+
+    바꾸기 전에 중단되면 기존 인덱스와 세그먼트가 그대로입니다. (새로 쓴 세대
+    파일은 다음에 다시 쓸 때 지워짐) 바꾼 뒤에는 새 인덱스가 가리키지 않는
+    세그먼트 파일을 지우고, 남은 행이 없으면 월 세그먼트를 삭제합니다.
+    """
+    os.replace(_path(month, "idx.new"), _path(month, "idx"))
+    entries = load_index(month)
+    rows = sum(entry["rows"] for entry in entries)
+    if not rows:
+        discard_month(month)
+        return
+    mark_done(month, rows)
+    live = {_segment_suffix(entry.get("gen", 0)) for entry in entries}
+    for suffix in _segment_suffixes(month):
+        if suffix not in live:
+            os.remove(_path(month, suffix))
+
+
+def merge_late_rows(month, rows, block_rows=None):
+    """완료된 월에 늦게 들어온 행(채팅방, 시간순 정렬)을 아카이브에 합칩니다.
+
+    해당 채팅방의 기존 블록과 새 행을 ID로 중복 제거해 시간순으로 합친 블록과
+    나머지 채팅방의 블록(압축 해제 없이 복사)으로 새 세대 세그먼트와 인덱스를
+    작성한 뒤 기존 인덱스와 원자적으로 바꿉니다. 바꾸기 전에 중단되면 기존
+    인덱스가 그대로이고, 다시 실행해도 행이 중복되지 않습니다. 새로 추가된
+    행 수를 반환합니다.
+    """
+    late = {}
+    for row in rows:
+        late.setdefault(row["room_id"], []).append(row)
+    if not late:
+        return 0
+
+    entries = load_index(month)
+    writer = _rewriter(month, block_rows)
+    added = 0
+    try:
+        for entry in entries:
+            if entry["room"] not in late:
+                writer.keep(entry)
+        for room_id, new_rows in late.items():
+            archived = [
+                row
+                for entry in entries
+                if entry["room"] == room_id
+                for row in read_block(month, entry)
+            ]
+            ids = {row["id"] for row in archived}
+            new_rows = [row for row in new_rows if row["id"] not in ids]
+            added += len(new_rows)
+            for row in sorted(archived + new_rows, key=_sort_key):
+                writer.add(row)
+    finally:
+        writer.close()
+
+    _swap_index(month)
+    return added
+
+
+def expire_room(room_id, cutoff, block_rows=None):
+    """채팅방의 ``cutoff`` 이전 아카이브 메시지를 지우고 지운 행 수를 반환합니다.
+
+    전부 만료된 블록은 빼고, 기준 시각에 걸친 블록만 남은 행으로 다시 써서
+    새 세대 세그먼트를 작성합니다. (``merge_late_rows()`` 와 같이 새 인덱스를
+    원자적으로 바꾸고 이전 세그먼트를 지움)
+    """
+    cutoff_micros = to_micros(cutoff)
+    expired = 0
+    for month in archived_months():
+        entries = load_index(month)
+        if not any(
+            e["room"] == room_id and e["first"] < cutoff_micros for e in entries
+        ):
+            continue
+        writer = _rewriter(month, block_rows)
+        try:
+            for entry in entries:
+                if entry["room"] != room_id or entry["first"] >= cutoff_micros:
+                    writer.keep(entry)
+                elif entry["last"] < cutoff_micros:
+                    expired += entry["rows"]
+                else:
+                    for row in read_block(month, entry):
+                        if row["created_at"] >= cutoff:
+                            writer.add(row)
+                        else:
+                            expired += 1
+        finally:
+            writer.close()
+        _swap_index(month)
+    return expired
+
+
+def oldest_rows():
+    """채팅방 ID -> 아카이브에 남은 가장 오래된 메시지 시각"""
+    oldest = {}
+    for month in archived_months():
+        for entry in load_index(month):
+            if entry["first"] < oldest.get(entry["room"], entry["first"] + 1):
+                oldest[entry["room"]] = entry["first"]
+    return {room_id: from_micros(first) for room_id, first in oldest.items()}
+
+
+def find_message(message_id, room_ids, cutoffs=None):
+    """ID로 아카이브 메시지를 찾습니다 (인덱스의 ID 범위로 블록을 좁힘).
+
+    ``cutoffs`` 가 있으면 보존 기간이 지난 메시지는 찾지 않습니다.
+    """
+    for month, entry in room_blocks(room_ids, cutoffs=cutoffs):
+        if entry["min_id"] <= message_id <= entry["max_id"]:
+            cutoff = _cutoff_micros(cutoffs, entry["room"])
+            for row in read_block(month, entry):
+                if row["id"] == message_id:
+                    if cutoff is not None and row["created_at"] < from_micros(cutoff):
+                        return None
+                    return row
+    return None
@@ -15,12 +15,26 @@ from channels.auth import AuthMiddlewareStack
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chat.settings")
 django_asgi_app = get_asgi_application()
 
+from .db_pool import warm_pools
+
+# 첫 요청/연결이 DB 연결 수립 비용을 떠안지 않도록 커넥션 풀을 미리 엶
+warm_pools()
+
+from . import snowflake
+
+# 메시지 ID 노드 번호를 미리 임대 (이후 연장은 백그라운드 스레드가 함)
+snowflake.get_generator()
+
 from .routing import websocket_urlpatterns
 from .jwt_middleware import JWTAuthMiddlewareStack
+from .drain import DrainMiddleware
 
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
-        "websocket": JWTAuthMiddlewareStack(URLRouter(websocket_urlpatterns)),
+        # 드레인 중(SIGTERM 이후)에는 인증 전에 새 연결을 거절
+        "websocket": DrainMiddleware(
+            JWTAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+        ),
     }
 )
@@ -0,0 +1,489 @@
+"""대량 데이터 적재 (기존 채팅 시스템 마이그레이션용)
+
+JSONL 또는 CSV 입력을 스트리밍으로 읽어 ``ChatRoom``, ``ChatRoomMember``,
+``Message`` 에 적재합니다. 입력 레코드는 ``type`` 필드로 구분합니다.
+
+- ``room``: ``id`` (원본 시스템의 채팅방 키), ``name``, ``room_type``, ``created_at``
+- ``member``: ``room`` (원본 채팅방 키), ``user`` (사용자명) 또는 ``user_id``,
+  ``joined_at``, ``role`` (기본 ``member``)
+- ``message``: ``room``, ``sender`` (사용자명) 또는 ``sender_id``, ``content``, ``created_at``
+
+원본 채팅방 키와 사용자명은 메모리 내 ID 맵으로 변환하며, 배치마다 DB
+트랜잭션 안에서 ``ImportCheckpoint`` 를 함께 갱신하므로 중단 후 다시 실행해도
+이미 적재된 배치가 중복되지 않습니다.
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import re
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import etags, roster, snowflake
+from .models import ChatRoom, ChatRoomMember, ImportCheckpoint, Message
+
+RECORD_TYPES = ("room", "member", "message")
+
+# COPY 적재 컬럼 (DB 기본값이 없는 NOT NULL 컬럼은 모두 포함해야 함)
+MEMBER_COLUMNS = ("user_id", "room_id", "role", "is_online", "joined_at", "last_seen")
+MESSAGE_COLUMNS = ("id", "room_id", "sender_id", "content", "created_at", "is_read")
+
+
+class ImportDataError(Exception):
+    """입력 레코드를 해석할 수 없을 때 발생"""
+
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+class JSONLReader:
+    """JSONL 입력. 재시작 위치로 바이트 오프셋을 사용합니다."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def records(self, position):
+        with _open(self.path) as fp:
+            if position:
+                fp.seek(position)
+            while True:
+                line = fp.readline()
+                if not line:
+                    break
+                if line.strip():
+                    yield json.loads(line), fp.tell()
+
+
+class CSVReader:
+    """CSV 입력 (``type`` 컬럼 필수). 재시작 위치로 레코드 수를 사용합니다."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def records(self, position):
+        with _open(self.path) as raw:
+            text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+            for index, row in enumerate(csv.DictReader(text), start=1):
+                if index <= position:
+                    continue
+                yield {k: v for k, v in row.items() if v not in ("", None)}, index
+
+
+def reader_for(path, input_format=None):
+    input_format = input_format or ("csv" if ".csv" in path else "jsonl")
+    if input_format == "csv":
+        return CSVReader(path)
+    return JSONLReader(path)
+
+
+def _parse_time(value, default):
+    if not value:
+        return default
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ImportDataError(f"잘못된 시각 형식: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "t", "yes")
+    return bool(value)
+
+
+@contextmanager
+def preserve_timestamps(*models):
+    """bulk_create 시 auto_now/auto_now_add가 원본 시각을 덮어쓰지 않도록 합니다."""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, "auto_now", False) or getattr(
+                field, "auto_now_add", False
+            ):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """배치 단위 적재기
+
+    ``use_copy`` 가 참이면(PostgreSQL) 멤버/메시지를 COPY로 적재하고,
+    아니면 ``bulk_create`` 배치로 적재합니다.
+    """
+
+    def __init__(
+        self, source, batch_size=5000, create_users=False, use_copy=None, log=None
+    ):
+        self.source = source
+        self.batch_size = batch_size
+        self.create_users = create_users
+        if use_copy is None:
+            use_copy = connection.vendor == "postgresql"
+        self.use_copy = use_copy
+        self.log = log or (lambda message: None)
+
+        self.checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=source)
+        self.room_map = dict(self.checkpoint.room_map)
+        self.user_map = {}
+        self.counts = dict.fromkeys(RECORD_TYPES, 0)
+        self.counts.update(self.checkpoint.counts)
+        self._rooms = []
+        self._members = []
+        self._messages = []
+        self._position = self.checkpoint.position
+
+    # ------------------------------------------------------------------
+    # ID 맵
+    # ------------------------------------------------------------------
+    def _resolve_users(self, records, name_key, id_key):
+        """배치 안의 사용자명을 한 번의 쿼리로 user_id로 변환합니다."""
+        missing = {
+            r[name_key]
+            for r in records
+            if id_key not in r and r.get(name_key) not in self.user_map
+        }
+        missing.discard(None)
+        if missing:
+            self.user_map.update(
+                User.objects.filter(username__in=missing).values_list("username", "id")
+            )
+            unknown = missing - self.user_map.keys()
+            if unknown and self.create_users:
+                password = make_password(None)
+                User.objects.bulk_create(
+                    [User(username=name, password=password) for name in unknown],
+                    ignore_conflicts=True,
+                )
+                self.user_map.update(
+                    User.objects.filter(username__in=unknown).values_list(
+                        "username", "id"
+                    )
+                )
+                unknown = missing - self.user_map.keys()
+            if unknown:
+                raise ImportDataError(f"존재하지 않는 사용자: {sorted(unknown)[:5]}")
+
+        for record in records:
+            if id_key not in record:
+                record[id_key] = self.user_map[record[name_key]]
+            record[id_key] = int(record[id_key])
+
+    def _room_id(self, record):
+        if "room_id" in record:
+            return int(record["room_id"])
+        key = str(record.get("room"))
+        if key not in self.room_map:
+            raise ImportDataError(f"정의되지 않은 채팅방: {key}")
+        return self.room_map[key]
+
+    # ------------------------------------------------------------------
+    # 적재
+    # ------------------------------------------------------------------
+    def add(self, record, position):
+        record_type = record.get("type")
+        if record_type == "room":
+            self._rooms.append(record)
+        elif record_type == "member":
+            self._members.append(record)
+        elif record_type == "message":
+            # 입력 안의 위치는 메시지 ID 하위 비트를 만드는 데 사용
+            self._messages.append((record, position))
+        else:
+            raise ImportDataError(f"알 수 없는 레코드 타입: {record_type}")
+        self._position = position
+
+        pending = len(self._rooms) + len(self._members) + len(self._messages)
+        if pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """버퍼를 적재하고 같은 트랜잭션에서 체크포인트를 갱신합니다."""
+        if not (self._rooms or self._members or self._messages):
+            return 0
+        with transaction.atomic():
+            # 채팅방을 먼저 적재해야 멤버/메시지의 채팅방 키를 변환할 수 있음
+            self._flush_rooms()
+            self._flush_members()
+            self._flush_messages()
+            self.checkpoint.position = self._position
+            self.checkpoint.room_map = self.room_map
+            self.checkpoint.counts = self.counts
+            self.checkpoint.save()
+            self._invalidate()
+        flushed = len(self._rooms) + len(self._members) + len(self._messages)
+        self._rooms, self._members, self._messages = [], [], []
+        return flushed
+
+    def _invalidate(self):
+        """커밋 후 참여자 목록 캐시와 조회 API의 ETag가 바뀌도록 합니다."""
+        if self._rooms:
+            etags.rooms_changed()
+        for room_id in {self._room_id(record) for record in self._members}:
+            roster.invalidate(room_id)
+        etags.messages_changed(*{self._room_id(record) for record, _ in self._messages})
+
+    def _flush_rooms(self):
+        if not self._rooms:
+            return
+        now = timezone.now()
+        rooms = []
+        for record in self._rooms:
+            created_at = _parse_time(record.get("created_at"), now)
+            rooms.append(
+                ChatRoom(
+                    name=record["name"],
+                    room_type=record.get("room_type", "group"),
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+            )
+        with preserve_timestamps(ChatRoom):
+            ChatRoom.objects.bulk_create(rooms, batch_size=self.batch_size)
+        for record, room in zip(self._rooms, rooms):
+            self.room_map[str(record["id"])] = room.id
+        self.counts["room"] += len(rooms)
+
+    def _role(self, record):
+        role = record.get("role", "member")
+        if role not in dict(ChatRoomMember.ROLES):
+            raise ImportDataError(f"알 수 없는 역할: {role}")
+        return role
+
+    def _flush_members(self):
+        if not self._members:
+            return
+        self._resolve_users(self._members, "user", "user_id")
+        now = timezone.now()
+        rows = [
+            (
+                record["user_id"],
+                self._room_id(record),
+                self._role(record),
+                False,
+                _parse_time(record.get("joined_at"), now),
+                now,
+            )
+            for record in self._members
+        ]
+        if self.use_copy:
+            self._copy_ignore_conflicts(
+                ChatRoomMember,
+                MEMBER_COLUMNS,
+                rows,
+            )
+        else:
+            members = [
+                ChatRoomMember(
+                    user_id=user_id,
+                    room_id=room_id,
+                    role=role,
+                    is_online=is_online,
+                    joined_at=joined_at,
+                    last_seen=last_seen,
+                )
+                for user_id, room_id, role, is_online, joined_at, last_seen in rows
+            ]
+            with preserve_timestamps(ChatRoomMember):
+                ChatRoomMember.objects.bulk_create(
+                    members, batch_size=self.batch_size, ignore_conflicts=True
+                )
+        self.counts["member"] += len(rows)
+
+    def _message_low_bits(self, position):
+        """입력 소스와 입력 안의 위치로 정한 ID 하위 비트 (하위 22비트만 사용)
+
+        재실행해도 같은 값이 나오고, 다른 입력 소스나 같은 밀리초의 다른
+        메시지와는 거의 겹치지 않습니다. (겹치면 ``_unique_ids`` 가 옮김)
+        """
+        digest = hashlib.blake2b(f"{self.source}:{position}".encode(), digest_size=8)
+        return int.from_bytes(digest.digest())
+
+    def _unique_ids(self, ids):
+        """배치 안이나 DB에 이미 있는 ID를 다음 빈 ID로 옮깁니다.
+
+        +1씩 옮기므로 같은 밀리초 안에서 옮겨지며, 하위 비트를 다 쓰면 다음
+        밀리초로 넘어갑니다. 겹치는 ID가 없어질 때까지 DB를 다시 확인합니다.
+        """
+        ids = list(ids)
+        taken = set()
+        pending = range(len(ids))
+        while pending:
+            for i in pending:
+                while ids[i] in taken:
+                    ids[i] += 1
+                taken.add(ids[i])
+            existing = set(
+                Message.objects.filter(id__in=[ids[i] for i in pending]).values_list(
+                    "id", flat=True
+                )
+            )
+            pending = [i for i in pending if ids[i] in existing]
+        return ids
+
+    def _flush_messages(self):
+        if not self._messages:
+            return
+        records = [record for record, _ in self._messages]
+        self._resolve_users(records, "sender", "sender_id")
+        now = timezone.now()
+        ids = []
+        rows = []
+        for record, position in self._messages:
+            created_at = _parse_time(record.get("created_at"), now)
+            # 원본 생성 시각으로 ID를 만들어 시간순 정렬을 유지
+            try:
+                ids.append(
+                    snowflake.historical_id(
+                        created_at, low=self._message_low_bits(position)
+                    )
+                )
+            except ValueError as e:
+                raise ImportDataError(str(e)) from e
+            rows.append(
+                (
+                    self._room_id(record),
+                    record["sender_id"],
+                    record["content"],
+                    created_at,
+                    _parse_bool(record.get("is_read")),
+                )
+            )
+        rows = [
+            (message_id, *row) for message_id, row in zip(self._unique_ids(ids), rows)
+        ]
+        if self.use_copy:
+            self._copy(
+                Message,
+                MESSAGE_COLUMNS,
+                rows,
+            )
+        else:
+            messages = [
+                Message(
+                    id=message_id,
+                    room_id=room_id,
+                    sender_id=sender_id,
+                    content=content,
+                    created_at=created_at,
+                    is_read=is_read,
+                )
+                for message_id, room_id, sender_id, content, created_at, is_read in rows
+            ]
+            with preserve_timestamps(Message):
+                Message.objects.bulk_create(messages, batch_size=self.batch_size)
+        self.counts["message"] += len(rows)
+
+    def _copy(self, model, columns, rows, table=None):
+        table = table or model._meta.db_table
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        with connection.cursor() as cursor:
+            with cursor.cursor.copy(sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+
+    def _copy_ignore_conflicts(self, model, columns, rows):
+        """임시 테이블로 COPY 한 뒤 충돌 행을 건너뛰고 옮깁니다."""
+        table = model._meta.db_table
+        staging = f"{table}_import"
+        column_list = ", ".join(columns)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS "
+                f"AS SELECT {column_list} FROM {table} WITH NO DATA"
+            )
+        self._copy(model, columns, rows, table=staging)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({column_list}) "
+                f"SELECT {column_list} FROM {staging} ON CONFLICT DO NOTHING"
+            )
+
+    # ------------------------------------------------------------------
+    # 인덱스 지연 생성 (PostgreSQL)
+    # ------------------------------------------------------------------
+    def drop_message_indexes(self):
+        """메시지 테이블의 보조 인덱스를 삭제하고 정의를 체크포인트에 보관합니다."""
+        if connection.vendor != "postgresql":
+            return []
+        table = Message._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s "
+                "AND indexname NOT IN (SELECT conname FROM pg_constraint "
+                "WHERE conrelid = %s::regclass)",
+                [table, table],
+            )
+            indexes = cursor.fetchall()
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+        self.checkpoint.dropped_indexes = list(self.checkpoint.dropped_indexes) + [
+            d for _, d in indexes
+        ]
+        self.checkpoint.save(update_fields=["dropped_indexes", "updated_at"])
+        return [name for name, _ in indexes]
+
+    def rebuild_message_indexes(self):
+        """체크포인트에 남은 인덱스를 재생성합니다.
+
+        하나를 만들 때마다 체크포인트에서 빼므로, 도중에 중단되면 다음
+        실행에서 (적재가 이미 끝났더라도) 남은 인덱스만 만듭니다.
+        """
+        rebuilt = 0
+        with connection.cursor() as cursor:
+            while self.checkpoint.dropped_indexes:
+                definition, *rest = self.checkpoint.dropped_indexes
+                cursor.execute(
+                    re.sub(
+                        r"^CREATE (UNIQUE )?INDEX ",
+                        r"CREATE \1INDEX IF NOT EXISTS ",
+                        definition,
+                    )
+                )
+                self.checkpoint.dropped_indexes = rest
+                self.checkpoint.save(update_fields=["dropped_indexes", "updated_at"])
+                rebuilt += 1
+        return rebuilt
+
+    # ------------------------------------------------------------------
+    def run(self, reader, report_every=5.0):
+        """입력 전체를 적재합니다. 주기적으로 처리 속도를 로그로 남깁니다."""
+        started = last_report = time.monotonic()
+        processed = 0
+        for record, position in reader.records(self.checkpoint.position):
+            self.add(record, position)
+            processed += 1
+            now = time.monotonic()
+            if now - last_report >= report_every:
+                self.log(self.progress(processed, now - started))
+                last_report = now
+        self.flush()
+        self.checkpoint.completed_at = timezone.now()
+        self.checkpoint.save(update_fields=["completed_at", "updated_at"])
+        return processed, time.monotonic() - started
+
+    def progress(self, processed, elapsed):
+        rate = processed / elapsed if elapsed else 0
+        return (
+            f"{processed:,}건 처리 ({rate:,.0f} rows/s) - "
+            f"채팅방 {self.counts['room']:,}, 멤버 {self.counts['member']:,}, "
+            f"메시지 {self.counts['message']:,}"
+        )
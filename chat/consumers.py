@@ -1,22 +1,113 @@
 import json
+import logging
+import random
 import time
 import asyncio
+import functools
+from datetime import datetime, timezone
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
-from asgiref.sync import sync_to_async
-from django.core.cache import cache
+from django.db.models import Q
+from . import dedupe, metrics, presence, roster, snapshot, snowflake, tracing
+from .db_routers import amark_primary, replica_reads
+from .drain import drainer
+from .executor import run_sync
+from .fanout import Debouncer, fanout
 from .models import ChatRoom, ChatRoomMember, Message
+from .store import (
+    GLOBAL_ONLINE_KEY,
+    client_msg_key,
+    connection_count_key,
+    get_store,
+    inflight_key,
+    messages_version_key,
+    online_key,
+    presence_version_key,
+    queue_key,
+)
+from .typing_indicator import TYPING_THROTTLE, typing_coalescer, typing_frame
+
+logger = logging.getLogger(__name__)
 
 # 전역 변수 및 상수 정의
 CLEANUP_INTERVAL = 20  # 상태 정리 주기 (초)
-HEARTBEAT_TIMEOUT = 15  # 하트비트 타임아웃 (초)
 CACHE_TIMEOUT = 30  # 캐시 유지 시간 (초)
-ONLINE_STATUS_GROUP = "online_status"  # 전역 온라인 상태 관리 그룹명
+MESSAGE_QUEUE_TTL = 3600  # 저장 대기 메시지 큐 유지 시간 (초)
+# 연결 수 카운터 유지 시간 (초, 하트비트마다 갱신 - 비정상 종료된 노드의 연결 수가
+# 남아 계속 온라인으로 보이지 않도록 함)
+CONNECTION_COUNT_TTL = 60
+MESSAGE_BATCH_SIZE = 100  # 한 번에 DB에 저장할 최대 메시지 수
+# 이 시간(초)보다 오래 저장 중인 배치는 워커가 죽은 것으로 보고 큐에 되돌림
+MESSAGE_INFLIGHT_TIMEOUT = 60
+CLIENT_MSG_ID_MAX_LENGTH = 64  # client_msg_id 최대 길이
+CLIENT_MSG_DEDUPE_WINDOW = 300  # client_msg_id 중복 확인 기간 (초)
+CHANNEL_PRESENCE_INTERVAL = 5  # 채널 온라인 인원 알림 최소 간격 (초)
+CHANNEL_JOIN_SAMPLE_RATE = 0.0  # 채널 입장/퇴장 알림을 보낼 비율 (0이면 보내지 않음)
+CHANNEL_POST_ROLES = ("admin",)  # 채널에 메시지를 보낼 수 있는 역할
 
 # 온라인 상태 관리 관련 변수
 last_status_cleanup = 0  # 마지막 상태 정리 시간
 cleanup_in_progress = False  # 상태 정리 작업 진행 여부
-user_last_heartbeat = {}  # 사용자별 마지막 하트비트 저장
+
+# 채널 온라인 상태 변경 알림(전송 측)과 인원 집계(수신 측)를 방별로 묶는 예약기
+channel_presence_announcer = Debouncer(CHANNEL_PRESENCE_INTERVAL)
+channel_count_publisher = Debouncer(CHANNEL_PRESENCE_INTERVAL)
+
+
+def message_frame(event):
+    frame = {"type": "message", "message": event["message"], "user": event["user"]}
+    if event.get("id"):
+        frame["id"] = event["id"]
+    if event.get("client_msg_id"):
+        frame["client_msg_id"] = event["client_msg_id"]
+    return json.dumps(frame)
+
+
+def error_frame(error):
+    return json.dumps({"type": "error", "error": error})
+
+
+def ack_frame(client_msg_id, message_id):
+    return json.dumps({"type": "ack", "client_msg_id": client_msg_id, "id": message_id})
+
+
+def join_frame(event):
+    return json.dumps({"type": "join", "user": event["user"]})
+
+
+def leave_frame(event):
+    return json.dumps({"type": "leave", "user": event["user"]})
+
+
+async def online_count_frame(room_id):
+    counts = await roster.room_counts(room_id)
+    return json.dumps({"type": "online_count", **counts})
+
+
+async def publish_online_count(room_id, group):
+    """프로세스 안의 채널 연결들에 온라인 인원 수를 보냅니다."""
+    await fanout.deliver(group, await online_count_frame(room_id))
+
+
+def render_channel_event(room_id, group, event):
+    """채널 중계 채널이 받은 이벤트를 연결에 보낼 프레임으로 바꿉니다.
+
+    온라인 상태 변경은 연결마다 참여자 목록을 만드는 대신 프로세스에서 한 번
+    인원 수를 집계해 보내도록 예약만 합니다.
+    """
+    event_type = event["type"]
+    if event_type == "chat_message":
+        return message_frame(event)
+    if event_type == "user_join":
+        return join_frame(event)
+    if event_type == "user_leave":
+        return leave_frame(event)
+    if event_type == "typing_update":
+        return typing_frame(event["users"], event["ttl"])
+    if event_type == "online_status_update":
+        channel_count_publisher.schedule(
+            group, functools.partial(publish_online_count, room_id, group)
+        )
+    return None
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
@@ -24,15 +115,34 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     각 채팅방에 연결된 WebSocket을 처리하며, 메시지 전송 및 수신,
     사용자 온라인 상태 관리 등을 담당합니다.
+
+    채널(``room_type="channel"``)에서는 동작이 달라집니다.
+
+    - 연결이 그룹에 직접 가입하지 않고 ``fanout`` 의 프로세스별 중계 채널을
+      통해 메시지를 받습니다.
+    - 온라인 상태는 참여자 목록 대신 인원 수(``online_count``)로 알립니다.
+    - 입장/퇴장 알림은 ``CHANNEL_JOIN_SAMPLE_RATE`` 비율로만 보냅니다.
+    - ``CHANNEL_POST_ROLES`` 역할의 참여자만 메시지를 보낼 수 있습니다.
     """
 
+    is_channel = False
+    role = "member"
+    last_typing_at = None  # 마지막으로 처리한 입력 시작 시각
+    last_read_message_id = None  # 연결 시점의 읽음 위치
+
+    @tracing.traced("chat.connect")
     async def connect(self):
         """WebSocket 연결 설정"""
+        started = time.perf_counter()
         try:
             # 기본 정보 설정
             self.room_id = self.scope["url_route"]["kwargs"]["room_id"]
             self.room_group_name = f"chat_{self.room_id}"
             self.user = self.scope["user"]
+            self.typing_sources = {}  # 워커 프로세스별 (입력 중 목록, 만료 시각)
+            tracing.bind(
+                connection=tracing.new_id(), user=self.user.id, room=self.room_id
+            )
 
             # 익명 사용자인 경우 연결 거부
             if self.user.is_anonymous:
@@ -40,83 +150,113 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 return
 
             # 채팅방 참여 확인
-            if not await self.is_room_member():
+            membership = await self.get_membership()
+            if membership is None:
                 await self.close(code=4002)
                 return
+            self.role, room_type, self.last_read_message_id = membership
+            self.is_channel = room_type == "channel"
 
-            # 채팅방 그룹에 참여
-            await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-
-            # 사용자 온라인 상태 업데이트
+            # 연결 수(탭/기기별) 증가 후 사용자 온라인 상태 업데이트
+            await get_store().incr_many(
+                self.connection_count_keys(), ttl=CONNECTION_COUNT_TTL
+            )
+            self.connection_registered = True
             await self.update_user_status(True)
 
             # 온라인 상태 변경 알림 전송
-            await self.channel_layer.group_send(
-                self.room_group_name, {"type": "online_status_update"}
-            )
+            # (이 연결은 스냅샷으로 받으므로 그룹에 참여하기 전에 보냄)
+            await self.announce_presence()
 
-            # 하트비트 초기 시간 설정
-            user_key = f"{self.user.id}_{self.room_id}"
-            user_last_heartbeat[user_key] = time.time()
+            # 채팅방 그룹에 참여 (채널은 연결 수락 후 중계 채널에 구독)
+            if not self.is_channel:
+                await self.channel_layer.group_add(
+                    self.room_group_name, self.channel_name
+                )
 
             # 연결 수락
             await self.accept()
+            if self.is_channel:
+                await fanout.subscribe(
+                    self.channel_layer,
+                    self.room_group_name,
+                    self,
+                    functools.partial(
+                        render_channel_event, self.room_id, self.room_group_name
+                    ),
+                )
+            metrics.OPEN_CONNECTIONS.inc("chat")
+            metrics.ROOM_CONNECTIONS.inc(self.room_id)
+            self.connection_counted = True
+            drainer.register(self)
+            metrics.CONNECT_LATENCY.observe(time.perf_counter() - started, "chat")
 
             # 다른 참여자들에게 입장 알림
-            await self.channel_layer.group_send(
-                self.room_group_name, {"type": "user_join", "user": self.user.username}
-            )
+            if self.should_notify_membership():
+                await metrics.group_send(
+                    self.channel_layer,
+                    self.room_group_name,
+                    {"type": "user_join", "user": self.user.username},
+                )
 
-            # 현재 채팅방의 온라인 사용자 정보 전송
-            await self.online_status_update({"type": "online_status_update"})
+            # 참여자/최근 메시지/읽음 위치 스냅샷 전송
+            await self.send_hello()
 
-            # 메시지 워커 시작
-            self.message_worker_task = asyncio.create_task(self.message_worker())
+            # 메시지 워커 시작 (채널은 메시지를 보낼 수 있는 연결만)
+            if self.can_post():
+                self.message_worker_task = asyncio.create_task(self.message_worker())
 
         except Exception as e:
-            print(f"채팅 연결 오류: {e}")
+            logger.exception("채팅 연결 오류: %s", e)
             await self.close(code=4000)
 
     async def disconnect(self, close_code):
         """WebSocket 연결 종료"""
         try:
+            drainer.unregister(self)
+            if getattr(self, "connection_counted", False):
+                metrics.OPEN_CONNECTIONS.dec("chat")
+                metrics.ROOM_CONNECTIONS.dec(self.room_id)
+                self.connection_counted = False
+
             if hasattr(self, "room_group_name"):
-                # 사용자 오프라인 상태 업데이트
-                await self.update_user_status(False)
+                # 입력 중 상태 정리
+                self.stop_typing()
+
+                # 연결 수 감소 및 사용자 오프라인 상태 업데이트
+                if getattr(self, "connection_registered", False):
+                    self.connection_registered = False
+                    await self.update_user_status(False)
 
                 # 채팅방 그룹에서 나가기
-                await self.channel_layer.group_discard(
-                    self.room_group_name, self.channel_name
-                )
+                if self.is_channel:
+                    await fanout.unsubscribe(
+                        self.channel_layer, self.room_group_name, self
+                    )
+                else:
+                    await self.channel_layer.group_discard(
+                        self.room_group_name, self.channel_name
+                    )
 
                 # 다른 참여자들에게 퇴장 알림
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {"type": "user_leave", "user": self.user.username},
-                )
+                if self.should_notify_membership():
+                    await metrics.group_send(
+                        self.channel_layer,
+                        self.room_group_name,
+                        {"type": "user_leave", "user": self.user.username},
+                    )
 
                 # 온라인 상태 업데이트 알림 (채팅방)
-                await self.channel_layer.group_send(
-                    self.room_group_name, {"type": "online_status_update"}
-                )
-
-                # 전역 온라인 상태 그룹에도 알림 전송
-                await self.channel_layer.group_send(
-                    ONLINE_STATUS_GROUP, {"type": "online_status_update"}
-                )
+                await self.announce_presence()
 
             # 메시지 워커 정지
             if hasattr(self, "message_worker_task") and self.message_worker_task:
                 self.message_worker_task.cancel()
 
-            # 하트비트 기록 정리
-            user_key = f"{self.user.id}_{self.room_id}"
-            if user_key in user_last_heartbeat:
-                del user_last_heartbeat[user_key]
-
         except Exception as e:
-            print(f"채팅 연결 종료 오류: {e}")
+            logger.exception("채팅 연결 종료 오류: %s", e)
 
+    @tracing.traced("chat.receive")
     async def receive(self, text_data):
         """클라이언트로부터 메시지 수신"""
         try:
@@ -124,13 +264,27 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
             # 하트비트 메시지인 경우 온라인 상태만 갱신
             if text_data_json.get("type") == "heartbeat":
-                user_key = f"{self.user.id}_{self.room_id}"
-                user_last_heartbeat[user_key] = time.time()
-                await self.update_user_status(True)
-                # 온라인 상태 변경 알림 전송
-                await self.channel_layer.group_send(
-                    self.room_group_name, {"type": "online_status_update"}
+                metrics.HEARTBEATS.inc("chat")
+                await get_store().expire_many(
+                    self.connection_count_keys(), ttl=CONNECTION_COUNT_TTL
                 )
+                await self.update_user_status(True)
+                # 온라인 상태 변경 알림 전송 (채널은 인원 변화가 없으므로 생략)
+                if not self.is_channel:
+                    await self.announce_presence()
+                return
+
+            # 읽음 위치 갱신
+            if text_data_json.get("type") == "read":
+                await self.mark_read(text_data_json.get("message_id"))
+                return
+
+            # 입력 중 표시 (DB/메시지 큐를 거치지 않음)
+            if text_data_json.get("type") == "typing":
+                if text_data_json.get("is_typing", True):
+                    self.start_typing()
+                else:
+                    self.stop_typing()
                 return
 
             # 일반 메시지 처리
@@ -138,232 +292,461 @@ class ChatConsumer(AsyncWebsocketConsumer):
             if not message or not message.strip():
                 return
 
+            # 채널은 권한이 있는 참여자만 메시지 전송 가능
+            if not self.can_post():
+                await self.send(
+                    text_data=error_frame(
+                        "채널에는 관리자만 메시지를 보낼 수 있습니다."
+                    )
+                )
+                return
+
+            # 클라이언트 메시지 ID가 있으면 재전송인지 확인
+            client_msg_id = text_data_json.get("client_msg_id")
+            if client_msg_id is not None:
+                if (
+                    not isinstance(client_msg_id, str)
+                    or not client_msg_id
+                    or len(client_msg_id) > CLIENT_MSG_ID_MAX_LENGTH
+                ):
+                    await self.send(
+                        text_data=error_frame("잘못된 client_msg_id 입니다.")
+                    )
+                    return
+
+            # 서버 메시지 ID는 보내는 시점에 정해짐 (시간순 정렬/커서 키)
+            message_id = snowflake.next_id()
+            if client_msg_id is not None:
+                if not await self.claim_client_msg_id(client_msg_id, message_id):
+                    return
+
+            # 메시지를 보내면 입력 중 상태 해제
+            self.stop_typing()
+
             # 메시지 큐에 추가
-            await self.add_message_to_queue(message)
+            metrics.MESSAGES.inc()
+            await self.add_message_to_queue(message_id, message, client_msg_id)
 
             # 브로드캐스팅
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "chat_message",
-                    "message": message,
-                    "user": self.user.username,
-                },
-            )
+            event = {
+                "type": "chat_message",
+                "id": message_id,
+                "message": message,
+                "user": self.user.username,
+            }
+            if client_msg_id is not None:
+                event["client_msg_id"] = client_msg_id
+            await metrics.group_send(self.channel_layer, self.room_group_name, event)
+
+            # 재전송에 대비해 보낸 연결에 서버 ID를 알림
+            if client_msg_id is not None:
+                await self.send(text_data=ack_frame(client_msg_id, message_id))
 
         except json.JSONDecodeError:
-            print("유효하지 않은 JSON 메시지를 받았습니다")
+            logger.warning("유효하지 않은 JSON 메시지를 받았습니다")
         except Exception as e:
-            print(f"메시지 수신 오류: {e}")
+            logger.exception("메시지 수신 오류: %s", e)
 
-    async def add_message_to_queue(self, message):
+    @tracing.traced("store.message_queue.append")
+    async def add_message_to_queue(self, message_id, message, client_msg_id=None):
         """메시지를 큐에 추가"""
-        message_key = f"message_queue_{self.room_id}"
-        pending_messages = await sync_to_async(cache.get)(message_key) or []
-        pending_messages.append(
-            {"sender": self.user.id, "content": message, "timestamp": time.time()}
+        entry = {"id": message_id, "sender": self.user.id, "content": message}
+        if client_msg_id is not None:
+            entry["client_msg_id"] = client_msg_id
+        await get_store().rpush(queue_key(self.room_id), entry, ttl=MESSAGE_QUEUE_TTL)
+
+    @tracing.traced("store.client_msg.claim")
+    async def claim_client_msg_id(self, client_msg_id, message_id):
+        """처음 보는 client_msg_id 이면 ``message_id`` 를 기록하고 True를 반환합니다.
+
+        ``CLIENT_MSG_DEDUPE_WINDOW`` 동안 같은 ID로 다시 보낸 메시지는 큐에
+        넣거나 전파하지 않고, 처음 정한 서버 메시지 ID로 바로 응답합니다.
+        """
+        current = await get_store().claim(
+            client_msg_key(self.user.id, client_msg_id),
+            str(message_id),
+            ttl=CLIENT_MSG_DEDUPE_WINDOW,
         )
-        await sync_to_async(cache.set)(message_key, pending_messages, timeout=3600)
+        if current is None:
+            return True
+
+        metrics.DUPLICATE_MESSAGES.inc()
+        await self.send(text_data=ack_frame(client_msg_id, int(current)))
+        return False
+
+    def can_post(self):
+        """현재 연결이 메시지를 보낼 수 있는지 여부"""
+        return not self.is_channel or self.role in CHANNEL_POST_ROLES
+
+    def should_notify_membership(self):
+        """입장/퇴장 알림을 보낼지 여부 (채널은 표본만)"""
+        return not self.is_channel or random.random() < CHANNEL_JOIN_SAMPLE_RATE
+
+    async def announce_presence(self):
+        """채팅방에 온라인 상태 변경을 알립니다.
+
+        채널은 프로세스당 ``CHANNEL_PRESENCE_INTERVAL`` 마다 한 번으로 묶습니다.
+        """
+        send = functools.partial(
+            metrics.group_send,
+            self.channel_layer,
+            self.room_group_name,
+            {"type": "online_status_update"},
+        )
+        if self.is_channel:
+            channel_presence_announcer.schedule(self.room_group_name, send)
+        else:
+            await send()
+
+    def start_typing(self):
+        """입력 시작 (연결마다 ``TYPING_THROTTLE`` 초에 한 번만 전파)"""
+        if not self.can_post():
+            return
+        now = time.monotonic()
+        last = self.last_typing_at
+        if last is not None and now - last < TYPING_THROTTLE:
+            return
+        self.last_typing_at = now
+        typing_coalescer.start(
+            self.channel_layer,
+            self.room_group_name,
+            self.channel_name,
+            self.user.username,
+        )
+
+    def stop_typing(self):
+        """입력 중지"""
+        if self.last_typing_at is None:
+            return
+        self.last_typing_at = None
+        typing_coalescer.stop(
+            self.channel_layer, self.room_group_name, self.channel_name
+        )
+
+    async def typing_update(self, event):
+        """입력 중 상태 이벤트 처리
+
+        워커 프로세스별 목록을 합쳐 본인을 제외한 입력 중 사용자를 보냅니다.
+        """
+        now = time.monotonic()
+        self.typing_sources[event["source"]] = (event["users"], now + event["ttl"])
+        users = set()
+        for source, (names, expires) in list(self.typing_sources.items()):
+            if expires <= now:
+                del self.typing_sources[source]
+            else:
+                users.update(names)
+        users.discard(self.user.username)
+        await self.send(text_data=typing_frame(sorted(users), event["ttl"]))
 
     async def chat_message(self, event):
         """채팅 메시지 이벤트 처리"""
-        await self.send(
-            text_data=json.dumps(
-                {"type": "message", "message": event["message"], "user": event["user"]}
-            )
-        )
+        await self.send(text_data=message_frame(event))
 
     async def user_join(self, event):
         """사용자 입장 이벤트 처리"""
-        await self.send(text_data=json.dumps({"type": "join", "user": event["user"]}))
+        await self.send(text_data=join_frame(event))
 
     async def user_leave(self, event):
         """사용자 퇴장 이벤트 처리"""
-        await self.send(text_data=json.dumps({"type": "leave", "user": event["user"]}))
+        await self.send(text_data=leave_frame(event))
 
     async def online_status_update(self, event):
         """온라인 상태 업데이트 이벤트 처리"""
+        if self.is_channel:
+            await self.send(text_data=await online_count_frame(self.room_id))
+            return
         room_users = await self.get_room_users_status()
         await self.send(
             text_data=json.dumps({"type": "online_status", "users": room_users})
         )
 
-    @database_sync_to_async
-    def get_room_users_status(self):
-        """방 참여자들의 온라인 상태 정보를 가져옵니다."""
-        # 채팅방 멤버 정보 조회 (최적화된 쿼리 사용)
-        members = ChatRoomMember.objects.filter(room_id=self.room_id).select_related(
-            "user"
-        )
+    @tracing.traced("db.room_users_status")
+    async def get_room_users_status(self):
+        """방 참여자들의 온라인 상태 정보를 가져옵니다.
 
-        # 온라인 상태 확인
-        online_key = f"online_users_{self.room_id}"
-        online_users = cache.get(online_key) or set()
-
-        # 유저 데이터 구성
-        users_data = []
-        for member in members:
-            user = member.user
-            users_data.append(
-                {
-                    "id": user.id,
-                    "username": user.username,
-                    "is_online": user.id in online_users,
-                }
-            )
+        참여자 목록은 roster 캐시에서, 온라인 여부는 저장소에서 읽습니다.
+        """
+        return await roster.room_users_status(self.room_id)
 
-        return users_data
+    @tracing.traced("chat.hello")
+    async def send_hello(self):
+        """연결 직후 스냅샷(hello) 프레임을 보냅니다. (``chat.snapshot``)"""
+        await self.send(
+            text_data=await snapshot.hello_frame(
+                self.room_id, self.user.id, self.last_read_message_id, self.is_channel
+            )
+        )
 
-    @database_sync_to_async
-    def is_room_member(self):
-        """현재 사용자가 채팅방의 멤버인지 확인합니다."""
+    @tracing.traced("db.mark_read")
+    async def mark_read(self, message_id):
+        """읽음 위치를 ``message_id`` 로 옮깁니다. (이전 위치로는 되돌리지 않음)"""
+        if type(message_id) is not int or message_id < 1:
+            await self.send(text_data=error_frame("잘못된 message_id 입니다."))
+            return
+        await ChatRoomMember.objects.filter(
+            Q(last_read_message_id__isnull=True)
+            | Q(last_read_message_id__lt=message_id),
+            user=self.user,
+            room_id=self.room_id,
+        ).aupdate(last_read_message_id=message_id)
+
+    @tracing.traced("db.room_membership")
+    async def get_membership(self):
+        """현재 사용자의 (역할, 채팅방 종류, 읽음 위치)를 가져옵니다. 멤버가 아니면 None"""
         try:
-            return ChatRoomMember.objects.filter(
-                user=self.user, room_id=self.room_id
-            ).exists()
+            return (
+                await ChatRoomMember.objects.filter(
+                    user=self.user, room_id=self.room_id
+                )
+                .values_list("role", "room__room_type", "last_read_message_id")
+                .afirst()
+            )
         except Exception:
-            return False
-
-    @database_sync_to_async
-    def update_user_status(self, is_online):
-        """사용자의 온라인 상태를 업데이트합니다."""
+            return None
+
+    def connection_count_keys(self):
+        """(사용자 전체, 이 채팅방) 연결 수 카운터 키"""
+        return [
+            connection_count_key(self.user.id),
+            connection_count_key(self.user.id, self.room_id),
+        ]
+
+    @tracing.traced("db.update_user_status")
+    async def update_user_status(self, is_online):
+        """사용자의 온라인 상태를 업데이트합니다.
+
+        ``is_online=False`` 는 이 연결이 끊겼다는 뜻입니다. 연결 수를 줄인 뒤
+        이 채팅방의 연결이 모두 끊겼으면 채팅방에서, 어디에도 연결이 남지
+        않았으면 전역 온라인 상태에서 제거합니다. 다른 탭이나 기기가 연결되어
+        있으면 오프라인으로 바뀌지 않으며, DB를 조회하지 않습니다.
+        """
         try:
-            # DB 업데이트
-            ChatRoomMember.objects.filter(user=self.user, room_id=self.room_id).update(
-                is_online=is_online
-            )
+            room_online = user_online = True
+            if not is_online:
+                user_left, room_left = await get_store().decr_many(
+                    self.connection_count_keys(), ttl=CONNECTION_COUNT_TTL
+                )
+                room_online, user_online = room_left > 0, user_left > 0
+
+            if is_online or not room_online:
+                # DB 업데이트
+                await ChatRoomMember.objects.filter(
+                    user=self.user, room_id=self.room_id
+                ).aupdate(is_online=room_online)
 
-            # 채팅방 온라인 상태 캐싱
-            self._update_room_online_status(is_online)
+                # 채팅방 온라인 상태 캐싱
+                await self._update_room_online_status(room_online)
 
-            # 전역 온라인 상태 업데이트
-            self._update_global_online_status(is_online)
+            if is_online or not user_online:
+                # 전역 온라인 상태 업데이트
+                await self._update_global_online_status(user_online)
 
             return True
         except Exception as e:
-            print(f"사용자 상태 업데이트 오류: {e}")
+            logger.exception("사용자 상태 업데이트 오류: %s", e)
             return False
 
-    def _update_room_online_status(self, is_online):
+    async def _update_room_online_status(self, is_online):
         """채팅방 내 사용자 온라인 상태 업데이트"""
-        online_key = f"online_users_{self.room_id}"
-        online_users = cache.get(online_key) or set()
-
+        store = get_store()
         if is_online:
-            online_users.add(self.user.id)
+            changed = await store.sadd(
+                online_key(self.room_id), self.user.id, ttl=CACHE_TIMEOUT
+            )
         else:
-            online_users.discard(self.user.id)
-
-        cache.set(online_key, online_users, timeout=CACHE_TIMEOUT)
+            changed = await store.srem(
+                online_key(self.room_id), self.user.id, ttl=CACHE_TIMEOUT
+            )
+        # 참여자 목록 API의 ETag 갱신 (하트비트로는 바뀌지 않음)
+        if changed:
+            await store.bump_versions([presence_version_key(self.room_id)])
 
-    def _update_global_online_status(self, is_online):
+    async def _update_global_online_status(self, is_online):
         """전역 온라인 상태 업데이트"""
-        global_online_key = "global_online_users"
-        global_online_users = cache.get(global_online_key) or set()
-
+        store = get_store()
         if is_online:
-            global_online_users.add(self.user.id)
+            changed = await store.sadd(
+                GLOBAL_ONLINE_KEY, self.user.id, ttl=CACHE_TIMEOUT
+            )
         else:
-            # 다른 채팅방에 사용자가 접속해 있는지 확인
-            other_rooms_exist = (
-                ChatRoomMember.objects.filter(user=self.user, is_online=True)
-                .exclude(room_id=self.room_id)
-                .exists()
+            changed = await store.srem(
+                GLOBAL_ONLINE_KEY, self.user.id, ttl=CACHE_TIMEOUT
             )
 
-            # 다른 방에 접속해 있지 않은 경우에만 전역 상태에서 제거
-            if not other_rooms_exist:
-                global_online_users.discard(self.user.id)
-
-        cache.set(global_online_key, global_online_users, timeout=CACHE_TIMEOUT)
+        # 상태가 실제로 바뀐 경우에만 알림 (하트비트마다 보내지 않음)
+        if changed:
+            await presence.publish(self.channel_layer, [self.user.id], is_online)
 
     async def message_worker(self):
         """백그라운드 메시지 저장 워커
 
-        메시지 큐에서 메시지를 주기적으로 가져와 일괄 처리합니다.
+        메시지 큐에서 메시지를 주기적으로 가져와 일괄 처리합니다. 시작할 때
+        저장 도중 죽은 워커가 남긴 배치를 먼저 큐에 되돌립니다.
         """
+        try:
+            await self.recover_inflight()
+        except Exception as e:
+            logger.exception("저장 중 메시지 복구 오류: %s", e)
         while True:
             try:
-                # 처리할 메시지가 있는지 확인
-                message_key = f"message_queue_{self.room_id}"
-                pending_messages = await sync_to_async(cache.get)(message_key) or []
-
-                if pending_messages:
-                    # 메시지 배치 처리 (최대 100개)
-                    messages_to_save = []
-                    for msg in pending_messages[:100]:
-                        messages_to_save.append(
-                            Message(
-                                room_id=self.room_id,
-                                sender_id=msg["sender"],
-                                content=msg["content"],
-                                created_at=msg.get("timestamp", time.time()),
-                            )
-                        )
-
-                    # 벌크 생성으로 DB 효율성 향상
-                    await database_sync_to_async(Message.objects.bulk_create)(
-                        messages_to_save
-                    )
-
-                    # 처리된 메시지 제거
-                    await sync_to_async(cache.set)(
-                        message_key,
-                        pending_messages[100:],
-                        timeout=3600,
-                    )
+                await self.flush_message_queue()
             except Exception as e:
-                print(f"메시지 처리 중 오류: {e}")
+                logger.exception("메시지 처리 중 오류: %s", e)
 
             # 0.5초마다 체크
             await asyncio.sleep(0.5)
 
+    async def recover_inflight(self):
+        """``MESSAGE_INFLIGHT_TIMEOUT`` 보다 오래 저장 중인 배치를 큐에 되돌립니다.
+
+        배치를 꺼낸 워커(프로세스)가 저장 전에 죽으면 배치가 저장 중 목록에만
+        남으므로 다시 저장되도록 합니다. 되돌린 메시지 수를 반환합니다.
+        (이미 저장된 메시지는 다시 저장하지 않음, ``dedupe.save_messages``)
+        """
+        requeued = await get_store().requeue_stale(
+            inflight_key(self.room_id),
+            queue_key(self.room_id),
+            MESSAGE_INFLIGHT_TIMEOUT,
+            ttl=MESSAGE_QUEUE_TTL,
+        )
+        if requeued:
+            logger.warning("저장 중 메시지 %d건을 큐에 되돌림", requeued)
+        return requeued
+
+    async def flush_message_queue(self):
+        """메시지 큐에서 최대 100개를 꺼내 DB에 일괄 저장합니다.
+
+        처리한 메시지 수를 반환합니다. (중복으로 저장하지 않은 재전송 포함)
+        """
+        # 큐 앞쪽에서 최대 100개를 원자적으로 꺼냄. 저장이 끝날 때까지는
+        # 저장 중 배치로 두어 연결 직후 스냅샷이 DB와 큐 사이에서 놓치지 않고,
+        # 저장 전에 워커가 죽어도 ``recover_inflight`` 가 되돌릴 수 있게 함
+        store = get_store()
+        message_key = queue_key(self.room_id)
+        inflight = inflight_key(self.room_id)
+        batch, pending_messages = await store.begin_batch(
+            message_key, inflight, MESSAGE_BATCH_SIZE, ttl=MESSAGE_QUEUE_TTL
+        )
+
+        if not pending_messages:
+            return 0
+
+        # 메시지 배치 처리 (ID와 생성 시각은 보낸 시점에 정해진 값)
+        messages_to_save = []
+        for msg in pending_messages:
+            if "id" in msg:
+                message_id = msg["id"]
+                created_at = snowflake.to_datetime(message_id)
+            else:
+                # ID 없이 큐에 들어간 이전 형식의 항목
+                message_id = snowflake.next_id()
+                created_at = datetime.fromtimestamp(msg["timestamp"], timezone.utc)
+            messages_to_save.append(
+                Message(
+                    id=message_id,
+                    room_id=self.room_id,
+                    sender_id=msg["sender"],
+                    content=msg["content"],
+                    created_at=created_at,
+                    client_msg_id=msg.get("client_msg_id"),
+                )
+            )
+
+        # 벌크 생성으로 DB 효율성 향상
+        # (기본 키가 충돌하면 메시지를 버리지 않고 오류로 처리해 큐에 되돌림,
+        # 이미 저장된 client_msg_id 의 재전송은 저장하지 않음)
+        started = time.perf_counter()
+        try:
+            with tracing.span("db.flush_messages", batch=len(messages_to_save)):
+                saved = await run_sync(dedupe.save_messages, messages_to_save)
+        except Exception:
+            # 저장에 실패한 메시지는 다음 주기에 다시 시도하도록 큐에 되돌림
+            # (이미 복구되어 되돌려진 배치는 다시 넣지 않음)
+            await store.requeue_batch(
+                inflight, message_key, batch, ttl=MESSAGE_QUEUE_TTL
+            )
+            raise
+        await store.finish_batch(inflight, batch)
+        metrics.DB_FLUSH_LATENCY.observe(time.perf_counter() - started)
+        metrics.DB_FLUSH_BATCH_SIZE.observe(len(messages_to_save))
+        if len(saved) < len(messages_to_save):
+            metrics.DUPLICATE_MESSAGES.inc(len(messages_to_save) - len(saved))
+        # 메시지 목록 API의 ETag 갱신
+        await store.bump_versions([messages_version_key(self.room_id)])
+
+        # 방금 저장한 메시지를 보낸 사용자가 API로 바로 조회해도 보이도록
+        # 잠시 해당 사용자의 읽기를 primary로 고정
+        await amark_primary(*{msg["sender"] for msg in pending_messages})
+        return len(messages_to_save)
+
 
 class OnlineStatusConsumer(AsyncWebsocketConsumer):
     """전역 온라인 상태 관리 소비자
 
     사용자가 대화방에 참여하지 않아도 온라인 상태 정보를 받을 수 있습니다.
+
+    모든 연결에 모든 변경을 알리지 않고, 같은 채팅방 사용자(기본) 또는
+    ``{"type": "watch", "user_ids": [...]}`` 로 지정한 사용자의 변경만
+    ``{"type": "online_users_update", "users": [{"id", "is_online"}]}`` 로
+    보냅니다. 구독을 바꾸면 해당 사용자들의 현재 상태를 먼저 보냅니다.
+
+    변경은 ``PRESENCE_DIGEST_INTERVAL`` 마다 한 프레임으로 모아 보내며, 그
+    사이에 상쇄된 변경(접속 후 바로 종료 등)은 보내지 않습니다.
     """
 
+    watching = frozenset()  # 구독 중인 사용자 ID
+    digest_task = None  # 예약된 온라인 상태 요약 전송 작업
+
+    @tracing.traced("online.connect")
     async def connect(self):
         """WebSocket 연결 설정"""
+        started = time.perf_counter()
         try:
             self.user = self.scope["user"]
+            self.reported_presence = {}  # 사용자 ID -> 마지막으로 알린 온라인 여부
+            self.pending_presence = {}  # 사용자 ID -> 아직 알리지 않은 온라인 여부
+            tracing.bind(connection=tracing.new_id(), user=self.user.id)
 
             # 익명 사용자인 경우 연결은 허용하되 상태 업데이트는 하지 않음
             if not self.user.is_anonymous:
-                # 온라인 상태 그룹에 추가
-                await self.channel_layer.group_add(
-                    ONLINE_STATUS_GROUP, self.channel_name
-                )
-
-                # 사용자 온라인 상태 업데이트 및 알림 전송
-                room_ids = await self.update_global_status(True)
+                # 같은 채팅방 사용자의 상태 변경 구독
+                await self.watch(await presence.shared_room_user_ids(self.user.id))
 
-                # 온라인 상태 그룹에 알림 전송
-                print(f"새 사용자 접속 알림: {self.user.username}")
-                await self.channel_layer.group_send(
-                    ONLINE_STATUS_GROUP, {"type": "online_status_update"}
+                # 연결 수 증가 후 사용자 온라인 상태 업데이트 및 알림 전송
+                logger.debug("새 사용자 접속 알림: %s", self.user.username)
+                await get_store().incr_many(
+                    [connection_count_key(self.user.id)], ttl=CONNECTION_COUNT_TTL
                 )
+                self.connection_registered = True
+                room_ids = await self.update_global_status(True)
 
                 # 각 방에 알림 전송
                 for room_id in room_ids:
-                    await self.channel_layer.group_send(
-                        f"chat_{room_id}", {"type": "online_status_update"}
+                    await metrics.group_send(
+                        self.channel_layer,
+                        f"chat_{room_id}",
+                        {"type": "online_status_update"},
                     )
 
-                # 하트비트 초기 시간 설정
-                user_key = f"global_{self.user.id}"
-                user_last_heartbeat[user_key] = time.time()
-
                 # 필요한 경우 상태 정리 워커 시작
                 await self.start_cleanup_worker_if_needed()
 
             # 연결 수락
             await self.accept()
+            metrics.OPEN_CONNECTIONS.inc("online_status")
+            self.connection_counted = True
+            drainer.register(self)
+
+            # 구독 중인 사용자의 현재 상태 전송
+            if not self.user.is_anonymous:
+                await self.send_presence_snapshot(sorted(self.watching))
+            metrics.CONNECT_LATENCY.observe(
+                time.perf_counter() - started, "online_status"
+            )
 
         except Exception as e:
-            print(f"온라인 상태 연결 오류: {e}")
+            logger.exception("온라인 상태 연결 오류: %s", e)
             await self.close(code=4000)
 
     async def start_cleanup_worker_if_needed(self):
@@ -381,20 +764,26 @@ class OnlineStatusConsumer(AsyncWebsocketConsumer):
     async def disconnect(self, close_code):
         """WebSocket 연결 종료"""
         try:
-            # 사용자가 인증된 경우만 상태 업데이트
-            if not self.user.is_anonymous:
-                # 사용자 오프라인 상태 업데이트
-                await self.update_global_status(False)
-
-                # 온라인 상태 그룹에서 제거
-                await self.channel_layer.group_discard(
-                    ONLINE_STATUS_GROUP, self.channel_name
+            drainer.unregister(self)
+            if getattr(self, "connection_counted", False):
+                metrics.OPEN_CONNECTIONS.dec("online_status")
+                self.connection_counted = False
+
+            # 연결 수 감소 (다른 탭/기기나 채팅방 연결이 없을 때만 오프라인 처리)
+            if getattr(self, "connection_registered", False):
+                self.connection_registered = False
+                (remaining,) = await get_store().decr_many(
+                    [connection_count_key(self.user.id)], ttl=CONNECTION_COUNT_TTL
                 )
+                if not remaining:
+                    await self.update_global_status(False)
 
-                # 하트비트 기록 정리
-                user_key = f"global_{self.user.id}"
-                if user_key in user_last_heartbeat:
-                    del user_last_heartbeat[user_key]
+            # 사용자가 인증된 경우만 정리
+            if not self.user.is_anonymous:
+                # 상태 변경 구독 해제
+                await self.watch(())
+                if self.digest_task is not None:
+                    self.digest_task.cancel()
 
                 # 상태 정리 워커 정지 (시작한 사람이 정지)
                 if hasattr(self, "status_cleanup_task") and self.status_cleanup_task:
@@ -403,8 +792,9 @@ class OnlineStatusConsumer(AsyncWebsocketConsumer):
                     cleanup_in_progress = False
 
         except Exception as e:
-            print(f"온라인 상태 연결 종료 오류: {e}")
+            logger.exception("온라인 상태 연결 종료 오류: %s", e)
 
+    @tracing.traced("online.receive")
     async def receive(self, text_data):
         """클라이언트로부터 메시지 수신"""
         try:
@@ -415,72 +805,121 @@ class OnlineStatusConsumer(AsyncWebsocketConsumer):
 
             # 하트비트 메시지인 경우 온라인 상태 갱신
             if text_data_json.get("type") == "heartbeat":
-                user_key = f"global_{self.user.id}"
-                user_last_heartbeat[user_key] = time.time()
+                metrics.HEARTBEATS.inc("online_status")
+                await get_store().expire_many(
+                    [connection_count_key(self.user.id)], ttl=CONNECTION_COUNT_TTL
+                )
                 await self.update_global_status(True)
 
+            # 관심 사용자 목록 지정 (같은 채팅방 사용자 대신)
+            elif text_data_json.get("type") == "watch":
+                user_ids = text_data_json.get("user_ids")
+                if not isinstance(user_ids, list) or not all(
+                    isinstance(user_id, int) for user_id in user_ids
+                ):
+                    await self.send(
+                        text_data=error_frame("user_ids는 정수 목록이어야 합니다.")
+                    )
+                    return
+                user_ids = sorted(set(user_ids))[: presence.PRESENCE_WATCH_LIMIT]
+                await self.watch(user_ids)
+                await self.send_presence_snapshot(user_ids)
+
         except json.JSONDecodeError:
-            print("유효하지 않은 JSON 메시지를 받았습니다")
+            logger.warning("유효하지 않은 JSON 메시지를 받았습니다")
         except Exception as e:
-            print(f"온라인 상태 메시지 수신 오류: {e}")
+            logger.exception("온라인 상태 메시지 수신 오류: %s", e)
+
+    async def watch(self, user_ids):
+        """구독할 사용자 목록을 바꿉니다. (바뀐 그룹만 가입/탈퇴)"""
+        user_ids = frozenset(user_ids)
+        for user_id in self.watching - user_ids:
+            await self.channel_layer.group_discard(
+                presence.watch_group(user_id), self.channel_name
+            )
+        for user_id in user_ids - self.watching:
+            await self.channel_layer.group_add(
+                presence.watch_group(user_id), self.channel_name
+            )
+        self.watching = user_ids
 
-    async def online_status_update(self, event):
-        """온라인 상태 업데이트 알림"""
-        await self.send(text_data=json.dumps({"type": "online_users_update"}))
+    async def send_presence_snapshot(self, user_ids):
+        users = await presence.online_states(user_ids)
+        # 현재 상태를 보냈으므로 이전에 받은 변경은 버림
+        self.reported_presence = {user["id"]: user["is_online"] for user in users}
+        self.pending_presence = {}
+        await self.send(
+            text_data=json.dumps({"type": "online_users_update", "users": users})
+        )
+
+    async def presence_update(self, event):
+        """구독 중인 사용자의 온라인 상태 변경 (다음 요약 프레임에 모아 보냄)"""
+        for user in event["users"]:
+            self.pending_presence[user["id"]] = user["is_online"]
+        if self.digest_task is None:
+            self.digest_task = asyncio.create_task(self.send_presence_digest())
+
+    async def send_presence_digest(self):
+        """모은 변경 중 마지막으로 알린 상태와 달라진 것만 한 프레임으로 보냅니다."""
+        await asyncio.sleep(presence.PRESENCE_DIGEST_INTERVAL)
+        self.digest_task = None
+        pending, self.pending_presence = self.pending_presence, {}
+        users = presence.net_changes(self.reported_presence, pending, self.watching)
+        if users:
+            await self.send(
+                text_data=json.dumps({"type": "online_users_update", "users": users})
+            )
 
-    @database_sync_to_async
-    def update_global_status(self, is_online):
+    @tracing.traced("db.update_global_status")
+    async def update_global_status(self, is_online):
         """전역 온라인 상태 업데이트"""
         try:
-            # 글로벌 온라인 사용자 목록 업데이트
-            global_online_key = "global_online_users"
-            online_users = cache.get(global_online_key) or set()
-
-            # 온라인 상태 변경 여부 확인
-            status_changed = False
+            store = get_store()
 
+            # 글로벌 온라인 사용자 목록 업데이트
             if is_online:
-                if self.user.id not in online_users:
-                    online_users.add(self.user.id)
-                    status_changed = True
-                    print(f"사용자 온라인 상태 추가: {self.user.username}")
+                changed = await store.sadd(
+                    GLOBAL_ONLINE_KEY, self.user.id, ttl=CACHE_TIMEOUT
+                )
+                logger.debug("사용자 온라인 상태 추가: %s", self.user.username)
             else:
-                if self.user.id in online_users:
-                    online_users.discard(self.user.id)
-                    status_changed = True
-                    print(f"사용자 온라인 상태 제거: {self.user.username}")
-
-            cache.set(global_online_key, online_users, timeout=CACHE_TIMEOUT)
-
-            # 사용자가 참여한 모든 채팅방의 상태 업데이트
-            rooms = list(ChatRoom.objects.filter(participants__user=self.user))
-            room_ids = []
-
-            for room in rooms:
-                room_ids.append(room.id)
-                room_key = f"online_users_{room.id}"
-                room_online = cache.get(room_key) or set()
-
+                changed = await store.srem(
+                    GLOBAL_ONLINE_KEY, self.user.id, ttl=CACHE_TIMEOUT
+                )
+                logger.debug("사용자 온라인 상태 제거: %s", self.user.username)
+
+            # 상태가 실제로 바뀐 경우에만 구독 중인 연결에 알림 (하트비트 제외)
+            if changed:
+                await presence.publish(self.channel_layer, [self.user.id], is_online)
+
+            # 사용자가 참여한 모든 채팅방의 멤버십 상태를 한 번에 업데이트
+            memberships = ChatRoomMember.objects.filter(user=self.user)
+            room_ids = [
+                room_id
+                async for room_id in memberships.values_list("room_id", flat=True)
+            ]
+            await memberships.aupdate(is_online=is_online)
+
+            # 채팅방별 온라인 상태 캐싱
+            changed_rooms = []
+            for room_id in room_ids:
                 if is_online:
-                    room_online.add(self.user.id)
-                    # 해당 방 멤버십 상태 업데이트
-                    ChatRoomMember.objects.filter(room=room, user=self.user).update(
-                        is_online=True
+                    changed = await store.sadd(
+                        online_key(room_id), self.user.id, ttl=CACHE_TIMEOUT
                     )
                 else:
-                    room_online.discard(self.user.id)
-                    # 해당 방 멤버십 상태 업데이트
-                    ChatRoomMember.objects.filter(room=room, user=self.user).update(
-                        is_online=False
+                    changed = await store.srem(
+                        online_key(room_id), self.user.id, ttl=CACHE_TIMEOUT
                     )
-
-                cache.set(room_key, room_online, timeout=CACHE_TIMEOUT)
+                if changed:
+                    changed_rooms.append(presence_version_key(room_id))
+            await store.bump_versions(changed_rooms)
 
             # 방 ID 목록 반환
             return room_ids
 
         except Exception as e:
-            print(f"전역 상태 업데이트 오류: {e}")
+            logger.exception("전역 상태 업데이트 오류: %s", e)
             return []
 
     async def status_cleanup_worker(self):
@@ -499,7 +938,7 @@ class OnlineStatusConsumer(AsyncWebsocketConsumer):
             last_status_cleanup = time.time()
 
         except Exception as e:
-            print(f"온라인 상태 정리 중 오류: {e}")
+            logger.exception("온라인 상태 정리 중 오류: %s", e)
         finally:
             cleanup_in_progress = False
             # 일정 시간 후 다시 실행하도록 스케줄
@@ -509,87 +948,65 @@ class OnlineStatusConsumer(AsyncWebsocketConsumer):
                 asyncio.create_task(self.status_cleanup_worker())
 
     async def cleanup_global_online_status(self):
-        """글로벌 온라인 상태 정리"""
-        global_online_key = "global_online_users"
-        global_online_users = await sync_to_async(cache.get)(global_online_key) or set()
-        current_time = time.time()
+        """글로벌 온라인 상태 정리
 
-        # 하트비트 타임아웃 확인 (글로벌)
-        global_to_remove = set()
-        for user_id in global_online_users:
-            user_key = f"global_{user_id}"
-            last_heartbeat = user_last_heartbeat.get(user_key, 0)
-
-            # 하트비트 타임아웃 확인
-            if current_time - last_heartbeat > HEARTBEAT_TIMEOUT:
-                global_to_remove.add(user_id)
-                # 사용자 하트비트 기록 삭제
-                if user_key in user_last_heartbeat:
-                    del user_last_heartbeat[user_key]
+        온라인 여부는 모든 노드가 함께 쓰는 연결 수 카운터로만 판단합니다.
+        카운터가 없는(모든 연결이 끊겼거나, 비정상 종료된 노드의 카운터가
+        ``CONNECTION_COUNT_TTL`` 동안 하트비트 없이 만료된) 사용자만 제거합니다.
+        """
+        store = get_store()
+        global_online_users = sorted(await store.smembers(GLOBAL_ONLINE_KEY))
+        counts = await store.count_many(
+            [connection_count_key(user_id) for user_id in global_online_users]
+        )
+        global_to_remove = {
+            user_id for user_id, count in zip(global_online_users, counts) if not count
+        }
 
         # 글로벌 온라인 목록 업데이트
         if global_to_remove:
-            valid_global_users = global_online_users - global_to_remove
-            await sync_to_async(cache.set)(
-                global_online_key, valid_global_users, timeout=CACHE_TIMEOUT
-            )
+            await store.srem(GLOBAL_ONLINE_KEY, *global_to_remove, ttl=CACHE_TIMEOUT)
 
-            # 온라인 상태 그룹에 업데이트 알림
-            await self.channel_layer.group_send(
-                ONLINE_STATUS_GROUP, {"type": "online_status_update"}
-            )
+            # 제거된 사용자를 구독 중인 연결에만 알림
+            await presence.publish(self.channel_layer, sorted(global_to_remove), False)
 
         return global_to_remove
 
     async def cleanup_room_online_status(self):
-        """채팅방별 온라인 상태 정리"""
-        # 글로벌 상태 정리에서 제거된 사용자 목록
-        global_to_remove = await self.cleanup_global_online_status()
-
-        # 모든 채팅방 정보 가져오기
-        rooms = await database_sync_to_async(list)(ChatRoom.objects.all())
-        current_time = time.time()
-
-        for room in rooms:
-            # 채팅방의 온라인 상태 캐시 키
-            online_key = f"online_users_{room.id}"
-            online_users = await sync_to_async(cache.get)(online_key) or set()
-
-            if online_users:
-                # 하트비트 타임아웃 확인
-                to_remove = set()
-                for user_id in online_users:
-                    # 글로벌 상태에서 이미 오프라인으로 판단된 사용자는 제거
-                    if user_id in global_to_remove:
-                        to_remove.add(user_id)
-                        continue
-
-                    # 방별 하트비트 확인
-                    user_key = f"{user_id}_{room.id}"
-                    last_heartbeat = user_last_heartbeat.get(user_key, 0)
-
-                    # 하트비트 타임아웃 확인
-                    if current_time - last_heartbeat > HEARTBEAT_TIMEOUT:
-                        to_remove.add(user_id)
-                        # 사용자 하트비트 기록 삭제
-                        if user_key in user_last_heartbeat:
-                            del user_last_heartbeat[user_key]
-
-                if to_remove:
-                    # 캐시에서 제거
-                    valid_online_users = online_users - to_remove
-                    await sync_to_async(cache.set)(
-                        online_key, valid_online_users, timeout=CACHE_TIMEOUT
-                    )
-
-                    # DB 업데이트
-                    await database_sync_to_async(
-                        ChatRoomMember.objects.filter(
-                            room=room, user_id__in=list(to_remove)
-                        ).update
-                    )(is_online=False)
-
-                    # 채팅방에도 알림 전송
-                    await self.channel_layer.group_send(
-                        f"chat_{room.id}", {"type": "online_status_update"}
-                    )
\ No newline at end of file
+        """채팅방별 온라인 상태 정리 (연결이 하나도 남지 않은 사용자만 제거)"""
+        # 모든 채팅방의 온라인 상태를 한 번에 가져오기
+        store = get_store()
+        with replica_reads():
+            room_ids = [
+                room_id
+                async for room_id in ChatRoom.objects.filter(
+                    deleted_at__isnull=True
+                ).values_list("id", flat=True)
+            ]
+        room_online = await store.smembers_many(
+            [online_key(room_id) for room_id in room_ids]
+        )
+        user_ids = sorted(set().union(*room_online))
+        counts = await store.count_many(
+            [connection_count_key(user_id) for user_id in user_ids]
+        )
+        offline = {user_id for user_id, count in zip(user_ids, counts) if not count}
+
+        for room_id, online_users in zip(room_ids, room_online):
+            to_remove = online_users & offline
+            if to_remove:
+                # 캐시에서 제거
+                await store.srem(online_key(room_id), *to_remove, ttl=CACHE_TIMEOUT)
+                await store.bump_versions([presence_version_key(room_id)])
+
+                # DB 업데이트
+                await ChatRoomMember.objects.filter(
+                    room_id=room_id, user_id__in=list(to_remove)
+                ).aupdate(is_online=False)
+
+                # 채팅방에도 알림 전송
+                await metrics.group_send(
+                    self.channel_layer,
+                    f"chat_{room_id}",
+                    {"type": "online_status_update"},
+                )
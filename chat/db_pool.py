@@ -0,0 +1,83 @@
+"""DB 커넥션 풀 설정 도우미
+
+Django 5.1+의 PostgreSQL 커넥션 풀(psycopg3 ``psycopg_pool``)을 사용합니다.
+풀을 쓰면 ``database_sync_to_async``/비동기 ORM 호출이 끝날 때 연결을 닫는
+대신 풀에 반납하므로, 메시지 처리나 WebSocket 연결 시점에 새 연결을 맺는
+비용이 사라집니다.
+
+동시에 연결을 잡을 수 있는 스레드 수는 다음과 같습니다.
+
+- ``CHAT_SYNC_THREADS``: 동기 작업 전용 스레드 풀 (chat.executor)
+- asgiref의 thread-sensitive 스레드 1개: 비동기 ORM, ``database_sync_to_async``
+  기본값, ASGI 아래의 동기 뷰가 공유
+- 관리 명령/스트리밍 응답 등을 위한 여유분
+
+풀 최대 크기가 이보다 작으면 스레드가 연결을 기다리게 되고, 크면 DB의
+``max_connections`` 를 낭비하므로 워커 수 x 최대 크기가 DB 한도 안에 들어오게
+맞춰야 합니다.
+
+운영 설정의 ``statement_timeout`` 은 요청/WebSocket 처리용이므로, 오래 걸리는
+관리 명령과 마이그레이션은 ``disable_statement_timeout()`` 으로 끕니다.
+"""
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+THREAD_SENSITIVE_THREADS = 1  # asgiref가 공유하는 단일 스레드
+POOL_HEADROOM = 1  # 관리 명령/스트리밍 응답 여유분
+
+
+def pool_max_size(sync_threads):
+    """동기 작업 스레드 수에 맞춘 프로세스당 풀 최대 크기"""
+    return sync_threads + THREAD_SENSITIVE_THREADS + POOL_HEADROOM
+
+
+def pool_options(sync_threads, min_size=2, max_size=None, timeout=10, **extra):
+    """``DATABASES[...]["OPTIONS"]["pool"]`` 에 넣을 설정
+
+    ``extra`` 는 ``psycopg_pool.ConnectionPool`` 인자(``check``,
+    ``max_lifetime``, ``max_idle`` 등)로 그대로 전달됩니다.
+    """
+    max_size = max_size or pool_max_size(sync_threads)
+    return {
+        "min_size": min(min_size, max_size),
+        "max_size": max_size,
+        "timeout": timeout,
+        **extra,
+    }
+
+
+def warm_pools():
+    """풀을 쓰는 DB 별칭의 풀을 미리 열어 ``min_size`` 만큼 연결을 맺어 둡니다.
+
+    Django는 첫 쿼리 시점에 풀을 만들므로, 워커 시작 직후 첫 요청/연결이 연결
+    수립 비용을 떠안지 않도록 ASGI 애플리케이션 로드 시 호출합니다.
+    """
+    from django.db import connections
+
+    for alias in connections:
+        connection = connections[alias]
+        if connection.settings_dict.get("OPTIONS", {}).get("pool"):
+            # pool 속성에 처음 접근할 때 ConnectionPool이 열리고
+            # min_size 연결을 백그라운드에서 맺기 시작함
+            connection.pool
+
+
+def _disable_statement_timeout(sender=None, connection=None, **kwargs):
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET statement_timeout = 0")
+
+
+def disable_statement_timeout(**kwargs):
+    """이 프로세스의 DB 연결에서 ``statement_timeout`` 을 끕니다.
+
+    이미 맺은 연결과 이후에 맺는(풀에서 새로 꺼내는) 연결 모두에 적용되므로
+    관리 명령 시작 시나 ``pre_migrate`` 에서 한 번 호출하면 됩니다.
+    """
+    connection_created.connect(
+        _disable_statement_timeout, dispatch_uid="chat.disable_statement_timeout"
+    )
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            _disable_statement_timeout(connection=connection)
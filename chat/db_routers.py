@@ -0,0 +1,151 @@
+"""읽기 전용 복제본(replica) DB 라우팅
+
+기본적으로 모든 쿼리는 ``default``(primary)로 갑니다. 메시지 기록/참여자
+목록/채팅방 목록처럼 지연된 데이터를 읽어도 괜찮은 읽기 전용 경로만
+``replica_reads()`` 블록(또는 ``replica_reads_view`` 데코레이터) 안에서 실행해
+``DATABASE_REPLICAS`` 에 지정한 복제본으로 보냅니다.
+
+복제 지연으로 방금 쓴 데이터가 안 보이는 문제를 막기 위해, 사용자가 쓰기를
+하면 ``REPLICA_STICKY_SECONDS`` 동안 해당 사용자의 읽기는 primary에서
+처리합니다. 쓰기 기록은 캐시에 남겨 다른 워커 프로세스와도 공유합니다.
+"""
+
+import contextvars
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_KEY = "db_primary_sticky_{}"
+LOCAL_STICKY_LIMIT = 10000  # 프로세스 내 고정 기록 정리 기준
+
+_read_alias = contextvars.ContextVar("chat_read_alias", default=None)
+
+# 이 프로세스에서 최근에 primary 고정을 기록한 시각 (캐시 쓰기/읽기 절약용)
+_local_sticky = {}
+
+
+def replicas():
+    return list(getattr(settings, "DATABASE_REPLICAS", ()))
+
+
+def sticky_seconds():
+    return getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+
+
+def _pending_marks(user_ids):
+    """캐시에 새로 기록해야 하는 (사용자 ID 목록, 현재 시각, TTL)
+
+    같은 사용자를 TTL의 절반 안에 다시 고정할 때는 캐시 쓰기를 생략합니다.
+    """
+    ttl = sticky_seconds()
+    now = time.monotonic()
+    stale = [
+        user_id
+        for user_id in user_ids
+        if now - _local_sticky.get(user_id, float("-inf")) > ttl / 2
+    ]
+    return stale, now, ttl
+
+
+def _remember(user_ids, now, ttl):
+    if len(_local_sticky) > LOCAL_STICKY_LIMIT:
+        for user_id, marked in list(_local_sticky.items()):
+            if now - marked > ttl:
+                del _local_sticky[user_id]
+    for user_id in user_ids:
+        _local_sticky[user_id] = now
+
+
+def mark_primary(*user_ids):
+    """사용자들의 이후 읽기를 잠시 primary로 고정합니다."""
+    if not replicas():
+        return
+    stale, now, ttl = _pending_marks(user_ids)
+    if stale:
+        cache.set_many(
+            {STICKY_KEY.format(user_id): 1 for user_id in stale}, timeout=ttl
+        )
+        _remember(stale, now, ttl)
+
+
+async def amark_primary(*user_ids):
+    """``mark_primary`` 의 비동기 버전 (컨슈머용)"""
+    if not replicas():
+        return
+    stale, now, ttl = _pending_marks(user_ids)
+    if stale:
+        await cache.aset_many(
+            {STICKY_KEY.format(user_id): 1 for user_id in stale}, timeout=ttl
+        )
+        _remember(stale, now, ttl)
+
+
+def is_sticky(user_id):
+    """사용자가 최근에 쓰기를 해서 primary에서 읽어야 하는지 여부"""
+    if user_id is None:
+        return False
+    marked = _local_sticky.get(user_id)
+    if marked is not None and time.monotonic() - marked < sticky_seconds():
+        return True
+    return cache.get(STICKY_KEY.format(user_id)) is not None
+
+
+class replica_reads:
+    """블록 안의 읽기 쿼리를 복제본으로 보냅니다.
+
+    ``user_id`` 가 최근 쓰기로 primary에 고정된 경우나 복제본이 설정되지
+    않은 경우에는 아무것도 바꾸지 않습니다. 컨텍스트 변수를 사용하므로
+    ``sync_to_async``/비동기 ORM이 실행하는 스레드에도 그대로 전달됩니다.
+    """
+
+    def __init__(self, user_id=None):
+        self.user_id = user_id
+
+    def __enter__(self):
+        alias = None
+        candidates = replicas()
+        if candidates and not is_sticky(self.user_id):
+            alias = random.choice(candidates)
+        self._token = _read_alias.set(alias)
+        return alias
+
+    def __exit__(self, exc_type, exc, tb):
+        _read_alias.reset(self._token)
+        return False
+
+
+def replica_reads_view(view_method):
+    """뷰셋 메서드 전체를 ``replica_reads(request.user.id)`` 로 감쌉니다."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        with replica_reads(getattr(request.user, "id", None)):
+            return view_method(self, request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """``replica_reads()`` 안의 읽기만 복제본으로, 쓰기는 항상 primary로 보냅니다."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # 복제본에서 읽은 객체를 저장해도 primary에 쓰도록 명시
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
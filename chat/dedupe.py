@@ -0,0 +1,82 @@
+"""client_msg_id 재전송 메시지의 중복 저장 방지
+
+재전송은 먼저 ``CHAT_STORE`` 의 TTL 키(``CLIENT_MSG_DEDUPE_WINDOW``)로 걸러
+큐에 넣거나 전파하지 않습니다. 그 기간이 지난 재전송이나 저장소 키가 사라진
+경우에도 같은 메시지가 두 번 저장되지 않도록, 메시지 워커는 저장할 때
+``ClientMessage`` 의 (발신자, client_msg_id) 고유 인덱스로 먼저 ID를 선점하고
+선점한 메시지만 같은 트랜잭션에서 저장합니다.
+
+``ClientMessage`` 행은 ``expire_messages`` 명령이 ``CLIENT_MSG_ID_RETENTION_DAYS``
+(기본 30일)이 지나면 지웁니다.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import ClientMessage, Message
+
+# client_msg_id 중복 저장 방지 기록 보존 기간 (일)
+CLIENT_MSG_ID_RETENTION_DAYS = getattr(settings, "CLIENT_MSG_ID_RETENTION_DAYS", 30)
+
+
+def save_messages(messages):
+    """메시지를 한 트랜잭션에서 저장하고 저장한 메시지 목록을 반환합니다.
+
+    같은 발신자의 같은 client_msg_id 로 이미 저장된(또는 같은 배치에서 먼저
+    나온) 메시지와 이미 저장된 메시지 ID는 저장하지 않습니다.
+    """
+    with transaction.atomic():
+        # 저장 후 배치를 지우기 전에 워커가 죽어 되돌려진 배치는 이미 저장된
+        # 메시지를 포함함. 같은 채팅방/발신자로 저장된 ID는 다시 저장하지 않음
+        # (다른 메시지와 ID가 겹치면 그대로 기본 키 충돌로 실패)
+        saved = set(
+            Message.objects.filter(id__in=[m.id for m in messages]).values_list(
+                "id", "room_id", "sender_id"
+            )
+        )
+        messages = [m for m in messages if (m.id, m.room_id, m.sender_id) not in saved]
+        keyed = [m for m in messages if m.client_msg_id is not None]
+        if keyed:
+            ClientMessage.objects.bulk_create(
+                [
+                    ClientMessage(
+                        sender_id=m.sender_id,
+                        client_msg_id=m.client_msg_id,
+                        message_id=m.id,
+                        created_at=m.created_at,
+                    )
+                    for m in keyed
+                ],
+                ignore_conflicts=True,
+            )
+            claimed = ClientMessage.objects.filter(
+                sender_id__in={m.sender_id for m in keyed},
+                client_msg_id__in={m.client_msg_id for m in keyed},
+            ).values_list("sender_id", "client_msg_id", "message_id")
+            owners = {(sender_id, key): owner for sender_id, key, owner in claimed}
+            messages = [
+                m
+                for m in messages
+                if m.client_msg_id is None
+                or owners.get((m.sender_id, m.client_msg_id)) == m.id
+            ]
+        Message.objects.bulk_create(messages)
+    return messages
+
+
+def expire_client_ids(now, chunk_size):
+    """보존 기간이 지난 ``ClientMessage`` 행을 청크 단위로 지우고 지운 수를 반환합니다."""
+    expired = ClientMessage.objects.filter(
+        created_at__lt=now - timedelta(days=CLIENT_MSG_ID_RETENTION_DAYS)
+    )
+    deleted = 0
+    while True:
+        ids = list(
+            expired.order_by("created_at").values_list("id", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return deleted
+        ClientMessage.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
@@ -0,0 +1,151 @@
+"""배포 시 워커 프로세스 드레인(drain)
+
+롤링 재시작 중 daphne 프로세스가 SIGTERM을 받으면 바로 종료하지 않고 다음
+순서로 정리합니다.
+
+1. 새 WebSocket 연결을 받지 않습니다. (``DrainMiddleware`` 가 인증 전에
+   핸드셰이크를 거절하므로 JWT 검증이나 온라인 상태 갱신 비용이 없음)
+2. 이 프로세스의 연결이 큐(``message_queue_<room_id>``)에 넣은 메시지를
+   모두 DB에 저장합니다. 다른 프로세스의 메시지 워커에 의존하지 않습니다.
+3. 연결을 ``DRAIN_DURATION`` 초에 걸쳐 나누어 닫습니다. 닫기 전에
+   ``{"type": "reconnect", "after": <초>}`` 프레임으로 재연결 대기 시간을
+   알리며, 대기 시간에 ``DRAIN_RECONNECT_JITTER`` 초 범위의 지터를 더해
+   클라이언트가 한꺼번에 재연결하지 않도록 합니다.
+
+연결을 모두 닫은 뒤에는 남은 큐를 한 번 더 비우고 프로세스를 종료합니다.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import signal
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+DRAIN_ON_SIGTERM = getattr(settings, "DRAIN_ON_SIGTERM", True)
+# 연결을 나누어 닫는 데 쓸 시간과 재연결 대기 시간에 더할 지터 범위 (초)
+DRAIN_DURATION = getattr(settings, "DRAIN_DURATION", 10)
+DRAIN_RECONNECT_JITTER = getattr(settings, "DRAIN_RECONNECT_JITTER", 30)
+DRAIN_TICK = 0.1  # 연결을 나누어 닫는 간격 (초)
+DRAIN_CLOSE_CODE = 1012  # WebSocket "Service Restart"
+DRAIN_REJECT_CODE = 1013  # WebSocket "Try Again Later"
+
+
+def reconnect_frame(after):
+    return json.dumps({"type": "reconnect", "after": after})
+
+
+class Drainer:
+    """프로세스 안의 WebSocket 연결을 추적하고 드레인합니다."""
+
+    def __init__(self):
+        self.draining = False
+        self.connections = set()
+        self.random = random.Random()
+        self._signal_loops = set()
+
+    def register(self, consumer):
+        self.connections.add(consumer)
+        self._install_signal_handler()
+
+    def unregister(self, consumer):
+        self.connections.discard(consumer)
+
+    def reconnect_hint(self, jitter):
+        """재연결까지 기다릴 시간 (초)"""
+        return round(self.random.uniform(1, 1 + jitter), 2)
+
+    async def drain(self, duration=DRAIN_DURATION, jitter=DRAIN_RECONNECT_JITTER):
+        """새 연결을 막고, 큐를 비우고, 연결을 나누어 닫습니다."""
+        self.draining = True
+        connections = list(self.connections)
+        logger.info("드레인 시작: 연결 %d개", len(connections))
+
+        # 채팅방별로 큐를 비울 연결 하나씩 (닫힌 뒤에도 room_id로 비울 수 있음)
+        flushers = {}
+        for consumer in connections:
+            if hasattr(consumer, "flush_message_queue"):
+                flushers.setdefault(getattr(consumer, "room_id", None), consumer)
+        flushers.pop(None, None)
+        await self.flush(flushers.values())
+
+        per_tick = max(1, math.ceil(len(connections) * DRAIN_TICK / duration))
+        for start in range(0, len(connections), per_tick):
+            for consumer in connections[start : start + per_tick]:
+                await self._close(consumer, self.reconnect_hint(jitter))
+            await asyncio.sleep(DRAIN_TICK)
+
+        # 닫히는 동안 들어온 메시지까지 저장
+        await self.flush(flushers.values())
+        logger.info("드레인 완료")
+
+    async def flush(self, flushers):
+        for consumer in flushers:
+            try:
+                # 저장 도중 죽은 워커가 남긴 배치도 함께 저장
+                recover = getattr(consumer, "recover_inflight", None)
+                if recover is not None:
+                    await recover()
+                while await consumer.flush_message_queue():
+                    pass
+            except Exception as e:
+                logger.exception("드레인 중 메시지 저장 오류: %s", e)
+
+    async def _close(self, consumer, after):
+        try:
+            await consumer.send(text_data=reconnect_frame(after))
+            await consumer.close(code=DRAIN_CLOSE_CODE)
+            metrics.DRAINED_CONNECTIONS.inc()
+        except Exception as e:
+            logger.debug("드레인 연결 종료 실패: %s", e)
+
+    def _install_signal_handler(self):
+        if not DRAIN_ON_SIGTERM:
+            return
+        loop = asyncio.get_running_loop()
+        if loop in self._signal_loops:
+            return
+        self._signal_loops.add(loop)
+        try:
+            loop.add_signal_handler(signal.SIGTERM, self._on_sigterm)
+        except (NotImplementedError, RuntimeError, ValueError):
+            # 메인 스레드가 아니거나 지원하지 않는 플랫폼
+            pass
+
+    def _on_sigterm(self):
+        if self.draining:
+            return
+        asyncio.get_running_loop().create_task(self._drain_and_exit())
+
+    async def _drain_and_exit(self):
+        try:
+            await self.drain()
+        finally:
+            # 핸들러를 해제하고(기본 동작) 다시 SIGTERM을 보내 프로세스를 종료
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGTERM)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+
+class DrainMiddleware:
+    """드레인 중에는 인증 전에 WebSocket 핸드셰이크를 거절합니다."""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket" and drainer.draining:
+            await receive()  # websocket.connect
+            metrics.DRAIN_REJECTED.inc()
+            await send({"type": "websocket.close", "code": DRAIN_REJECT_CODE})
+            return
+        return await self.inner(scope, receive, send)
+
+
+drainer = Drainer()
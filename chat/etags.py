@@ -0,0 +1,79 @@
+"""조건부 GET(ETag)
+
+모바일 클라이언트가 자주 폴링하는 채팅방 목록, 참여자 목록, 메시지 목록은
+``CHAT_STORE`` 의 버전 카운터로 ETag를 만듭니다. 응답을 조회하거나 직렬화하지
+않고 ETag를 구할 수 있으므로, ``If-None-Match`` 가 일치하면 본 쿼리와
+시리얼라이저 없이 ``304 Not Modified`` 로 응답합니다.
+
+- 채팅방 목록: ``rooms_version`` (채팅방 생성/수정/삭제)
+- 참여자 목록: ``roster_version_<room_id>`` (참여/나가기, 프로필 변경)와
+  ``presence_version_<room_id>`` (채팅방 온라인 집합 변경)
+- 메시지 목록: ``messages_version_<room_id>`` (메시지 저장/삭제, 참여자의
+  프로필 변경)
+
+참여자/메시지 목록은 다른 사용자의 ETag로 내용을 확인할 수 없도록 쿼리 한 번으로
+참여 여부를 확인한 뒤에만 ETag를 만듭니다.
+"""
+
+import hashlib
+
+from django.db import transaction
+
+from .models import ChatRoomMember
+from .store import (
+    ROOMS_VERSION_KEY,
+    get_store,
+    messages_version_key,
+    presence_version_key,
+    roster_version_key,
+)
+
+
+def make_etag(*parts):
+    return hashlib.md5(":".join(map(str, parts)).encode()).hexdigest()
+
+
+def _is_member(request, room_id):
+    return (
+        str(room_id).isdigit()
+        and ChatRoomMember.objects.filter(
+            room_id=room_id, user=request.user, room__deleted_at__isnull=True
+        ).exists()
+    )
+
+
+def rooms_etag(request, *args, **kwargs):
+    (version,) = get_store().versions([ROOMS_VERSION_KEY])
+    return make_etag("rooms", version, request.META.get("QUERY_STRING", ""))
+
+
+def room_users_etag(request, pk=None, **kwargs):
+    if not _is_member(request, pk):
+        return None
+    versions = get_store().versions([roster_version_key(pk), presence_version_key(pk)])
+    return make_etag("users", pk, *versions)
+
+
+def room_messages_etag(request, pk=None, **kwargs):
+    if not _is_member(request, pk):
+        return None
+    (version,) = get_store().versions([messages_version_key(pk)])
+    return make_etag("messages", pk, version, request.GET.get("before", ""))
+
+
+def _bump_on_commit(keys):
+    """트랜잭션이 커밋된 뒤에 버전을 올립니다. (``roster.invalidate`` 와 같음)"""
+
+    def bump():
+        for key in keys:
+            get_store().bump_version(key)
+
+    transaction.on_commit(bump)
+
+
+def rooms_changed():
+    _bump_on_commit([ROOMS_VERSION_KEY])
+
+
+def messages_changed(*room_ids):
+    _bump_on_commit([messages_version_key(room_id) for room_id in room_ids])
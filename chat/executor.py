@@ -0,0 +1,26 @@
+"""동기 작업 전용 스레드 풀
+
+비동기 ORM/Redis 클라이언트로 옮길 수 없는 동기 작업(JWT 검증처럼 CPU와 DB
+조회가 섞인 작업)은 ``run_sync`` 로 실행합니다.
+
+``database_sync_to_async`` 의 기본값(thread_sensitive=True)은 프로세스 전체가
+스레드 하나를 공유하므로 부하가 몰리면 그 스레드가 병목이 됩니다. ``run_sync``
+는 ``CHAT_SYNC_THREADS`` 크기의 전용 풀에서 실행하며, 각 스레드는 자기 DB
+연결을 사용합니다. (DB 커넥션 풀 크기를 정할 때 이 값을 함께 고려해야 합니다.)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.db import DatabaseSyncToAsync
+from django.conf import settings
+
+SYNC_THREADS = getattr(settings, "CHAT_SYNC_THREADS", 16)
+
+executor = ThreadPoolExecutor(max_workers=SYNC_THREADS, thread_name_prefix="chat-sync")
+
+
+def run_sync(func, *args, **kwargs):
+    """``func`` 를 전용 스레드 풀에서 실행하는 코루틴을 반환합니다."""
+    return DatabaseSyncToAsync(func, thread_sensitive=False, executor=executor)(
+        *args, **kwargs
+    )
@@ -0,0 +1,169 @@
+"""채팅방 메시지 스트리밍 내보내기
+
+채팅방 전체 메시지를 오래된 순서로 NDJSON 또는 CSV로 스트리밍합니다.
+DB 메시지는 서버 사이드 커서(``iterator(chunk_size=...)``)로, 아카이브
+메시지는 세그먼트 블록 단위로 읽으므로 메모리 사용량은 채팅방 크기와
+무관하게 일정합니다.
+
+각 행에는 ``cursor`` 값이 포함되며, 이 값을 ``cursor`` 파라미터로 넘기면
+해당 행 다음부터 내보내기를 이어서 받을 수 있습니다.
+"""
+
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Q
+
+from . import archive, retention
+from .models import Message
+
+EXPORT_FIELDS = ("cursor", "id", "created_at", "sender_id", "sender", "content")
+
+
+def encode_cursor(created_at, message_id):
+    return f"{archive.to_micros(created_at)}_{message_id}"
+
+
+def decode_cursor(value):
+    """커서 문자열을 (created_at, id) 튜플로 변환합니다. 형식 오류 시 ValueError"""
+    micros, message_id = value.split("_", 1)
+    return archive.from_micros(int(micros)), int(message_id)
+
+
+def _archived_rows(room_id, after):
+    """아카이브 메시지를 블록 크기 단위로 발신자 이름을 채워 반환합니다.
+
+    보존 기간이 지난 메시지는 내보내지 않습니다.
+    """
+    batch = []
+    rows = archive.iter_messages(
+        [room_id],
+        newest_first=False,
+        after=after,
+        cutoffs=retention.read_cutoffs([room_id]),
+    )
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= settings.MESSAGE_ARCHIVE_BLOCK_ROWS:
+            yield from _with_usernames(batch)
+            batch = []
+    yield from _with_usernames(batch)
+
+
+def _with_usernames(rows):
+    if not rows:
+        return
+    usernames = dict(
+        User.objects.filter(id__in={row["sender_id"] for row in rows}).values_list(
+            "id", "username"
+        )
+    )
+    for row in rows:
+        yield (
+            row["id"],
+            row["created_at"],
+            row["sender_id"],
+            usernames.get(row["sender_id"], ""),
+            row["content"],
+        )
+
+
+def _hot_rows(room_id, after, chunk_size):
+    queryset = Message.objects.filter(room_id=room_id)
+    if after is not None:
+        created_at, message_id = after
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=message_id)
+        )
+    return (
+        queryset.order_by("created_at", "id")
+        .values_list("id", "created_at", "sender_id", "sender__username", "content")
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def iter_room_rows(room_id, after=None, chunk_size=None):
+    """채팅방 메시지를 (아카이브 → DB) 오래된 순서로 순회합니다."""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    yield from _archived_rows(room_id, after)
+    yield from _hot_rows(room_id, after, chunk_size)
+
+
+class _Echo:
+    """csv.writer가 쓴 내용을 그대로 반환하는 의사 버퍼"""
+
+    def write(self, value):
+        return value
+
+
+class NDJSONFormat:
+    content_type = "application/x-ndjson; charset=utf-8"
+    extension = "ndjson"
+
+    def header(self):
+        return ""
+
+    def row(self, values):
+        return json.dumps(dict(zip(EXPORT_FIELDS, values)), ensure_ascii=False) + "\n"
+
+
+class CSVFormat:
+    content_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __init__(self):
+        self.writer = csv.writer(_Echo())
+
+    def header(self):
+        return self.writer.writerow(EXPORT_FIELDS)
+
+    def row(self, values):
+        return self.writer.writerow(values)
+
+
+EXPORT_FORMATS = {"ndjson": NDJSONFormat, "csv": CSVFormat}
+
+
+def stream_export(room_id, export_format, after=None):
+    """내보내기 본문을 문자열 청크로 생성하는 동기 제너레이터"""
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    header = export_format.header()
+    buffer = [header] if header else []
+    for message_id, created_at, sender_id, username, content in iter_room_rows(
+        room_id, after, chunk_size
+    ):
+        buffer.append(
+            export_format.row(
+                (
+                    encode_cursor(created_at, message_id),
+                    message_id,
+                    created_at.isoformat(),
+                    sender_id,
+                    username,
+                    content,
+                )
+            )
+        )
+        if len(buffer) >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+async def astream_export(room_id, export_format, after=None):
+    """ASGI용 비동기 제너레이터
+
+    동기 제너레이터를 같은 스레드(thread_sensitive)에서 청크 단위로 진행시켜
+    서버 사이드 커서가 하나의 DB 연결에서 유지되도록 합니다.
+    """
+    chunks = stream_export(room_id, export_format, after)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await next_chunk(chunks, None)
+        if chunk is None:
+            break
+        yield chunk
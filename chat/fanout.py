@@ -0,0 +1,144 @@
+"""채널(대규모 채팅방) 2단계 전파
+
+일반 채팅방은 연결마다 채널 레이어 그룹(``chat_<room_id>``)에 가입하므로
+메시지 하나를 보낼 때 채널 레이어가 연결 수만큼 메시지를 복제합니다. 수만 명이
+참여하는 채널에서는 이 비용이 메시지당 연결 수에 비례해 커집니다.
+
+채널 방에서는 워커 프로세스마다 중계(relay) 채널 하나만 그룹에 가입하고,
+중계 채널이 받은 이벤트를 프로세스 안의 연결들에 직접 전달합니다.
+
+- 채널 레이어의 복제는 방의 연결 수가 아니라 워커 프로세스 수에 비례합니다.
+- 전송할 프레임(JSON)은 프로세스당 한 번만 만들고 모든 연결이 공유합니다.
+- 온라인 상태 변경 이벤트는 연결마다 처리하지 않고 ``Debouncer`` 로 묶어
+  프로세스당 ``interval`` 마다 최대 한 번만 처리합니다.
+"""
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# 그룹 가입 갱신 주기 (초, 채널 레이어의 group_expiry 보다 짧게)
+GROUP_REFRESH_INTERVAL = 3600
+
+
+class Debouncer:
+    """키별로 ``interval`` 초에 최대 한 번만 함수를 실행합니다.
+
+    실행이 예약된 동안 들어온 요청은 합쳐지며, 마지막 요청 이후의 상태가
+    반드시 한 번은 반영되도록 실행 직전에 예약을 해제합니다. 마지막 실행
+    시각은 ``interval`` 이 지나면 필요 없으므로 그때 지웁니다. (키가 다시
+    쓰이지 않아도 남지 않음)
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._pending = {}
+        self._last_run = {}
+
+    def schedule(self, key, func):
+        """``func`` (인자 없는 코루틴 함수)의 실행을 예약합니다."""
+        pending = self._pending.get(key)
+        if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+            return
+        last_run = self._last_run.get(key)
+        delay = 0
+        if last_run is not None:
+            delay = max(0, last_run + self.interval - time.monotonic())
+        self._pending[key] = asyncio.create_task(self._run(key, func, delay))
+
+    async def _run(self, key, func, delay):
+        if delay:
+            await asyncio.sleep(delay)
+        self._pending.pop(key, None)
+        ran_at = self._last_run[key] = time.monotonic()
+        asyncio.get_running_loop().call_later(self.interval, self._forget, key, ran_at)
+        try:
+            await func()
+        except Exception as e:
+            logger.exception("예약 작업 실행 오류: %s", e)
+
+    def _forget(self, key, ran_at):
+        if self._last_run.get(key) == ran_at:
+            del self._last_run[key]
+
+
+class _Relay:
+    """그룹 하나의 프로세스 내 중계 채널과 구독 중인 연결들"""
+
+    def __init__(self, group):
+        self.group = group
+        self.consumers = set()
+        self.channel_name = None
+        self.tasks = ()
+
+
+class LocalFanout:
+    """그룹별 중계 채널을 관리하고 받은 이벤트를 프로세스 내 연결에 전달합니다.
+
+    ``render(event)`` 는 이벤트를 연결에 보낼 텍스트 프레임으로 바꾸며, 연결에
+    보낼 필요가 없는 이벤트는 None을 반환합니다.
+    """
+
+    def __init__(self):
+        self._relays = {}
+
+    def subscribers(self, group):
+        relay = self._relays.get(group)
+        return set(relay.consumers) if relay else set()
+
+    async def subscribe(self, channel_layer, group, consumer, render):
+        relay = self._relays.get(group)
+        if relay is None:
+            relay = self._relays[group] = _Relay(group)
+            relay.channel_name = await channel_layer.new_channel()
+            await channel_layer.group_add(group, relay.channel_name)
+            relay.tasks = (
+                asyncio.create_task(self._relay(channel_layer, relay, render)),
+                asyncio.create_task(self._refresh(channel_layer, relay)),
+            )
+        relay.consumers.add(consumer)
+
+    async def unsubscribe(self, channel_layer, group, consumer):
+        relay = self._relays.get(group)
+        if relay is None:
+            return
+        relay.consumers.discard(consumer)
+        if relay.consumers:
+            return
+        # 마지막 연결이 나가면 중계 채널도 정리
+        del self._relays[group]
+        for task in relay.tasks:
+            task.cancel()
+        await channel_layer.group_discard(group, relay.channel_name)
+
+    async def _relay(self, channel_layer, relay, render):
+        while True:
+            event = await channel_layer.receive(relay.channel_name)
+            try:
+                frame = render(event)
+                if frame is not None:
+                    await self.deliver(relay.group, frame)
+            except Exception as e:
+                logger.exception("채널 이벤트 중계 오류: %s", e)
+
+    async def deliver(self, group, frame):
+        """프로세스 안에서 그룹을 구독 중인 모든 연결에 프레임을 보냅니다."""
+        relay = self._relays.get(group)
+        if relay is None:
+            return
+        for consumer in list(relay.consumers):
+            try:
+                await consumer.send(text_data=frame)
+            except Exception as e:
+                logger.debug("채널 프레임 전송 실패: %s", e)
+
+    async def _refresh(self, channel_layer, relay):
+        # 채널 레이어의 그룹 가입은 group_expiry 후 만료되므로 주기적으로 갱신
+        while True:
+            await asyncio.sleep(GROUP_REFRESH_INTERVAL)
+            await channel_layer.group_add(relay.group, relay.channel_name)
+
+
+fanout = LocalFanout()
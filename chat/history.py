@@ -0,0 +1,162 @@
+"""핫(DB) 메시지와 아카이브 메시지를 합쳐 읽는 히스토리 계층
+
+아카이브된 월은 항상 DB에 남아 있는 메시지보다 오래되었으므로, 최신순
+정렬에서는 DB 결과 뒤에 아카이브 결과를 이어 붙이면 전체 순서가 유지됩니다.
+메시지 ID가 시간순(``chat.snowflake``)이므로 정렬 키와 커서는 ID입니다.
+"""
+
+from django.contrib.auth.models import User
+
+from . import archive, retention
+from .models import Message
+
+
+def message_from_row(row):
+    """아카이브 행을 저장되지 않은 Message 인스턴스로 변환합니다."""
+    return Message(
+        id=row["id"],
+        room_id=row["room_id"],
+        sender_id=row["sender_id"],
+        content=row["content"],
+        created_at=row["created_at"],
+        is_read=row["is_read"],
+    )
+
+
+def attach_senders(messages):
+    """아카이브 메시지의 발신자를 한 번의 쿼리로 채웁니다."""
+    sender_ids = {m.sender_id for m in messages}
+    if not sender_ids:
+        return messages
+    users = User.objects.in_bulk(sender_ids)
+    for message in messages:
+        if message.sender_id in users:
+            message.sender = users[message.sender_id]
+    return messages
+
+
+def instance_values(instance, fields):
+    """``values_list()`` 필드 이름(``sender__username`` 등)으로 값 튜플을 만듭니다."""
+    values = []
+    for field in fields:
+        value = instance
+        for name in field.split("__"):
+            value = getattr(value, name, None)
+        values.append(value)
+    return tuple(values)
+
+
+class MessageHistory:
+    """DB 쿼리셋과 아카이브를 하나의 최신순 시퀀스처럼 다루는 래퍼
+
+    ``count()`` 와 슬라이싱을 지원하므로 DRF 페이지네이터에 그대로 넘길 수
+    있습니다. ``hot_queryset`` 은 ``-id`` 순으로 정렬되어 있어야 합니다.
+
+    ``before`` (메시지 ID 커서)를 주면 아카이브에서도 그보다 작은 ID만
+    읽습니다. (``count()`` 는 커서와 관계없이 전체 아카이브 수를 셉니다.)
+    아카이브에서는 채팅방 보존 기간이 지난 메시지를 거릅니다.
+    """
+
+    def __init__(self, hot_queryset, room_ids, before=None):
+        self.hot_queryset = hot_queryset
+        self.room_ids = list(room_ids)
+        self.before = before
+        self._hot_count = None
+        self._fields = None
+        self._cutoffs = None
+
+    @property
+    def cutoffs(self):
+        if self._cutoffs is None:
+            self._cutoffs = retention.read_cutoffs(self.room_ids)
+        return self._cutoffs
+
+    def values_list(self, *fields):
+        """메시지를 인스턴스 대신 ``fields`` 값 튜플로 반환하는 복제본
+
+        아카이브 메시지도 발신자를 채운 뒤 같은 튜플 형식으로 바꿉니다.
+        """
+        clone = MessageHistory(
+            self.hot_queryset.values_list(*fields), self.room_ids, self.before
+        )
+        clone._hot_count = self._hot_count
+        clone._cutoffs = self._cutoffs
+        clone._fields = fields
+        return clone
+
+    @property
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot_queryset.count()
+        return self._hot_count
+
+    def count(self):
+        return self.hot_count + archive.count(self.room_ids, self.cutoffs)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            items = self[key : key + 1]
+            if not items:
+                raise IndexError(key)
+            return items[0]
+
+        start = key.start or 0
+        stop = key.stop
+        if start < 0 or (stop is not None and stop < 0) or key.step not in (None, 1):
+            raise ValueError("음수 인덱스나 step은 지원하지 않습니다.")
+
+        results = []
+        if stop is None or start < stop:
+            hot_stop = self.hot_count if stop is None else min(stop, self.hot_count)
+            if start < hot_stop:
+                results.extend(self.hot_queryset[start:hot_stop])
+
+            if stop is None or stop > self.hot_count:
+                offset = max(start - self.hot_count, 0)
+                limit = None if stop is None else stop - max(start, self.hot_count)
+                rows = self._archived_rows(offset)
+                archived = []
+                for row in rows:
+                    if limit is not None and len(archived) >= limit:
+                        break
+                    archived.append(message_from_row(row))
+                archived = attach_senders(archived)
+                if self._fields is not None:
+                    archived = [
+                        instance_values(message, self._fields) for message in archived
+                    ]
+                results.extend(archived)
+        return results
+
+    def _archived_rows(self, offset):
+        return archive.iter_messages(
+            self.room_ids, offset=offset, before_id=self.before, cutoffs=self.cutoffs
+        )
+
+
+def room_history(room_id, before=None):
+    """채팅방 하나의 전체 히스토리 (최신순)
+
+    ``before`` (메시지 ID)를 주면 그보다 작은(오래된) ID의 메시지만 포함합니다.
+    저장 전(메시지 워커의 큐에 있는) ID도 그대로 커서로 쓸 수 있습니다.
+    """
+    queryset = (
+        Message.objects.filter(room_id=room_id).select_related("sender").order_by("-id")
+    )
+    if before is not None:
+        queryset = queryset.filter(id__lt=before)
+    return MessageHistory(queryset, [room_id], before=before)
+
+
+def find_message(message_id, room_ids):
+    """DB에 없는 메시지를 아카이브에서 찾아 Message 인스턴스로 반환합니다.
+
+    보존 기간이 지난 메시지는 찾지 않습니다.
+    """
+    row = archive.find_message(message_id, room_ids, retention.read_cutoffs(room_ids))
+    if row is None:
+        return None
+    return attach_senders([message_from_row(row)])[0]
@@ -1,11 +1,13 @@
-import asyncio
+import logging
 from urllib.parse import parse_qs
-from django.db import close_old_connections
 from django.contrib.auth.models import AnonymousUser
 from channels.middleware import BaseMiddleware
 from channels.auth import AuthMiddlewareStack
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from .executor import run_sync
+
+logger = logging.getLogger(__name__)
 
 
 class JWTAuthMiddleware(BaseMiddleware):
@@ -20,8 +22,8 @@ class JWTAuthMiddleware(BaseMiddleware):
         self.jwt_auth = JWTAuthentication()
 
     async def __call__(self, scope, receive, send):
-        # DB 연결 정리
-        close_old_connections()
+        # DB 연결 정리는 run_sync(DatabaseSyncToAsync)가 작업 스레드에서 처리하므로
+        # 핸드셰이크마다 이벤트 루프에서 close_old_connections()를 호출하지 않음
 
         # 쿼리 파라미터에서 토큰 추출
         query_string = scope.get("query_string", b"").decode()
@@ -34,23 +36,22 @@ class JWTAuthMiddleware(BaseMiddleware):
 
         # JWT 토큰 검증
         try:
-            # 동기 함수를 비동기로 실행
-            validated_token = await asyncio.to_thread(
-                self.jwt_auth.get_validated_token, token
-            )
-            user = await asyncio.to_thread(self.jwt_auth.get_user, validated_token)
-
-            # 인증된 사용자 정보를 스코프에 저장
-            scope["user"] = user
+            # 토큰 검증과 사용자 조회를 한 번의 스레드 전환으로 실행
+            scope["user"] = await run_sync(self.authenticate, token)
         except (InvalidToken, TokenError):
             # 토큰이 유효하지 않은 경우 AnonymousUser 설정
             scope["user"] = AnonymousUser()
         except Exception as e:
-            print(f"JWT 인증 오류: {e}")
+            logger.exception("JWT 인증 오류: %s", e)
             scope["user"] = AnonymousUser()
 
         return await self.inner(scope, receive, send)
 
+    def authenticate(self, token):
+        """토큰을 검증하고 해당 사용자를 반환합니다."""
+        validated_token = self.jwt_auth.get_validated_token(token)
+        return self.jwt_auth.get_user(validated_token)
+
 
 def JWTAuthMiddlewareStack(inner):
     """
@@ -0,0 +1,313 @@
+"""WebSocket 부하 생성기
+
+한 프로세스 안에서 수천 개의 가상 클라이언트를 ASGI 애플리케이션
+(``chat.asgi.application`` 또는 컨슈머 라우터)에 직접 연결해 부하를 만들고,
+연결 시간, 메시지 전파(fan-out) 지연 p50/p95/p99, 초당 메시지 수를 측정합니다.
+
+메시지 본문에 송신 시각을 담아 보내고, 같은 방의 다른 클라이언트가 받은
+시점과의 차이를 전파 지연으로 기록합니다. 송수신이 모두 같은 프로세스에서
+일어나므로 ``time.perf_counter()`` 를 그대로 비교할 수 있습니다.
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+
+from . import etags
+from .models import ChatRoom, ChatRoomMember
+
+LOADTEST_PREFIX = "loadtest_"
+MESSAGE_MARKER = "lt:"
+
+
+def parse_room_sizes(spec):
+    """``"2:60,10:30,100:10"`` 형식(방 크기:가중치)을 [(크기, 가중치)]로 변환"""
+    sizes = []
+    for part in spec.split(","):
+        size, _, weight = part.partition(":")
+        sizes.append((int(size), float(weight or 1)))
+    if not sizes or any(size < 1 or weight <= 0 for size, weight in sizes):
+        raise ValueError(f"잘못된 방 크기 분포: {spec}")
+    return sizes
+
+
+def plan_rooms(clients, room_sizes, rng):
+    """클라이언트 수를 방 크기 분포에 따라 방 단위로 나눕니다."""
+    sizes = [size for size, _ in room_sizes]
+    weights = [weight for _, weight in room_sizes]
+    plan = []
+    remaining = clients
+    while remaining > 0:
+        size = min(rng.choices(sizes, weights)[0], remaining)
+        plan.append(size)
+        remaining -= size
+    return plan
+
+
+def percentile(values, pct):
+    """최근접 순위(nearest-rank) 백분위수"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class LoadTestStats:
+    def __init__(self):
+        self.connect_times = []
+        self.latencies = []
+        self.connect_failures = 0
+        self.sent = 0
+        self.heartbeats = 0
+        self.received = 0
+        self.delivered = 0
+        self.reconnects = 0
+
+    def summary(self, elapsed):
+        def ms(values):
+            return {
+                f"p{p}": (round(percentile(values, p) * 1000, 3) if values else None)
+                for p in (50, 95, 99)
+            }
+
+        return {
+            "elapsed": round(elapsed, 3),
+            "connections": len(self.connect_times),
+            "connect_failures": self.connect_failures,
+            "reconnects": self.reconnects,
+            "connect_ms": ms(self.connect_times),
+            "fanout_ms": ms(self.latencies),
+            "messages_sent": self.sent,
+            "heartbeats_sent": self.heartbeats,
+            "frames_received": self.received,
+            "messages_delivered": self.delivered,
+            "sent_per_sec": round(self.sent / elapsed, 2) if elapsed else 0,
+            "delivered_per_sec": round(self.delivered / elapsed, 2) if elapsed else 0,
+        }
+
+
+class SimulatedClient:
+    """하나의 WebSocket 연결을 흉내 내는 가상 클라이언트"""
+
+    def __init__(self, harness, index, user, room_id, token=None):
+        self.harness = harness
+        self.index = index
+        self.user = user
+        self.room_id = room_id
+        self.token = token
+        self.communicator = None
+        self.reader = None
+        self.seq = 0
+
+    async def connect(self):
+        path = f"/ws/chat/{self.room_id}/"
+        if self.token:
+            path += f"?token={self.token}"
+        communicator = WebsocketCommunicator(self.harness.application, path)
+        if not self.token:
+            communicator.scope["user"] = self.user
+
+        started = time.perf_counter()
+        await communicator.send_input({"type": "websocket.connect"})
+        try:
+            # receive_output의 타임아웃은 애플리케이션을 취소하므로 큐를 직접 기다림
+            response = await asyncio.wait_for(
+                communicator.output_queue.get(), self.harness.connect_timeout
+            )
+        except asyncio.TimeoutError:
+            response = {"type": "websocket.close"}
+        if response["type"] != "websocket.accept":
+            self.harness.stats.connect_failures += 1
+            communicator.future.cancel()
+            return False
+
+        self.harness.stats.connect_times.append(time.perf_counter() - started)
+        self.communicator = communicator
+        self.reader = asyncio.create_task(self.read_loop())
+        return True
+
+    async def disconnect(self):
+        if self.communicator is None:
+            return
+        if self.reader:
+            self.reader.cancel()
+        await self.communicator.send_input(
+            {"type": "websocket.disconnect", "code": 1000}
+        )
+        try:
+            await asyncio.wait_for(self.communicator.future, 5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self.communicator.future.cancel()
+        self.communicator = None
+
+    async def read_loop(self):
+        stats = self.harness.stats
+        while True:
+            output = await self.communicator.output_queue.get()
+            if output["type"] != "websocket.send":
+                return
+            stats.received += 1
+            data = json.loads(output["text"])
+            message = data.get("message")
+            if data.get("type") == "message" and str(message).startswith(
+                MESSAGE_MARKER
+            ):
+                stats.delivered += 1
+                sent_at = float(message.rsplit(":", 1)[1])
+                stats.latencies.append(time.perf_counter() - sent_at)
+
+    async def send_message(self):
+        self.seq += 1
+        text = f"{MESSAGE_MARKER}{self.index}:{self.seq}:{time.perf_counter()}"
+        await self.communicator.send_input(
+            {"type": "websocket.receive", "text": json.dumps({"message": text})}
+        )
+        self.harness.stats.sent += 1
+
+    async def send_heartbeat(self):
+        await self.communicator.send_input(
+            {"type": "websocket.receive", "text": json.dumps({"type": "heartbeat"})}
+        )
+        self.harness.stats.heartbeats += 1
+
+    async def run(self, deadline):
+        cfg = self.harness
+        rng = cfg.rng
+        # 접속 시점 분산 (ramp-up)
+        await asyncio.sleep(rng.uniform(0, cfg.ramp_up))
+        if not await self.connect():
+            return
+
+        next_message = time.monotonic() + rng.uniform(0, cfg.message_interval)
+        next_heartbeat = time.monotonic() + cfg.heartbeat_interval
+        while time.monotonic() < deadline:
+            now = time.monotonic()
+            if now >= next_message:
+                await self.send_message()
+                next_message = now + rng.expovariate(1 / cfg.message_interval)
+            if now >= next_heartbeat:
+                await self.send_heartbeat()
+                next_heartbeat = now + cfg.heartbeat_interval
+            if cfg.reconnect_rate and rng.random() < cfg.reconnect_rate * cfg.tick:
+                await self.disconnect()
+                cfg.stats.reconnects += 1
+                if not await self.connect():
+                    return
+            await asyncio.sleep(cfg.tick)
+        await self.disconnect()
+
+
+class LoadTestHarness:
+    """가상 클라이언트 생성/실행 및 결과 집계"""
+
+    def __init__(
+        self,
+        clients=100,
+        room_sizes="2:60,10:30,50:10",
+        duration=30.0,
+        message_interval=5.0,
+        heartbeat_interval=10.0,
+        reconnect_rate=0.0,
+        ramp_up=1.0,
+        target="consumers",
+        connect_timeout=10.0,
+        tick=0.1,
+        seed=None,
+    ):
+        self.clients = clients
+        self.room_sizes = parse_room_sizes(room_sizes)
+        self.duration = duration
+        self.message_interval = message_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.reconnect_rate = reconnect_rate
+        self.ramp_up = ramp_up
+        self.target = target
+        self.connect_timeout = connect_timeout
+        self.tick = tick
+        self.rng = random.Random(seed)
+        self.stats = LoadTestStats()
+        self.application = self._application()
+
+    def _application(self):
+        if self.target == "asgi":
+            from .asgi import application
+
+            return application
+
+        from .routing import websocket_urlpatterns
+
+        return URLRouter(websocket_urlpatterns)
+
+    @database_sync_to_async
+    def setup_data(self):
+        """부하 테스트용 사용자/채팅방을 생성하고 (사용자, 방 ID) 목록을 반환합니다."""
+        plan = plan_rooms(self.clients, self.room_sizes, self.rng)
+        users = User.objects.bulk_create(
+            [
+                User(username=f"{LOADTEST_PREFIX}{i}_{self.rng.getrandbits(32):08x}")
+                for i in range(self.clients)
+            ]
+        )
+        if not all(user.pk for user in users):
+            users = list(
+                User.objects.filter(
+                    username__in=[user.username for user in users]
+                ).order_by("id")
+            )
+        rooms = ChatRoom.objects.bulk_create(
+            [
+                ChatRoom(name=f"{LOADTEST_PREFIX}room_{i}", room_type="group")
+                for i in range(len(plan))
+            ]
+        )
+        assignments = []
+        members = []
+        user_iter = iter(users)
+        for room, size in zip(rooms, plan):
+            for _ in range(size):
+                user = next(user_iter)
+                members.append(ChatRoomMember(user=user, room=room))
+                assignments.append((user, room.id))
+        ChatRoomMember.objects.bulk_create(members)
+        etags.rooms_changed()
+        return assignments
+
+    @database_sync_to_async
+    def cleanup_data(self):
+        ChatRoom.objects.filter(name__startswith=LOADTEST_PREFIX).delete()
+        User.objects.filter(username__startswith=LOADTEST_PREFIX).delete()
+        etags.rooms_changed()
+
+    def _token(self, user):
+        if self.target != "asgi":
+            return None
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        return str(AccessToken.for_user(user))
+
+    async def run(self, keep_data=False):
+        assignments = await self.setup_data()
+        clients = [
+            SimulatedClient(self, index, user, room_id, self._token(user))
+            for index, (user, room_id) in enumerate(assignments)
+        ]
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.ramp_up + self.duration
+        try:
+            await asyncio.gather(*(client.run(deadline) for client in clients))
+        finally:
+            elapsed = time.perf_counter() - started
+            await asyncio.gather(
+                *(client.disconnect() for client in clients), return_exceptions=True
+            )
+            if not keep_data:
+                await self.cleanup_data()
+        return self.stats.summary(elapsed)
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+
+from chat import archive, db_pool, partitions
+from chat.models import Message
+
+
+class Command(BaseCommand):
+    help = (
+        "오래된 월의 메시지를 압축 세그먼트 파일로 옮기고 DB(파티션)에서 제거합니다. "
+        "PostgreSQL에서는 다가올 월 파티션도 미리 생성합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hot-months",
+            type=int,
+            default=settings.MESSAGE_HOT_MONTHS,
+            help="DB에 유지할 최근 개월 수 (현재 월 포함)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="서버 사이드 커서로 한 번에 가져올 행 수",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="아카이브 대상 월만 출력하고 변경하지 않습니다.",
+        )
+
+    def handle(self, *args, **options):
+        db_pool.disable_statement_timeout()
+        current = partitions.month_start(timezone.now())
+        created = partitions.ensure_partitions(
+            current,
+            partitions.add_months(current, settings.MESSAGE_PARTITION_PREMAKE_MONTHS),
+        )
+        for month in created:
+            self.stdout.write(f"파티션 생성: {partitions.partition_name(month)}")
+
+        cutoff = partitions.add_months(current, -(options["hot_months"] - 1))
+        for month in self.cold_months(cutoff):
+            if options["dry_run"]:
+                self.stdout.write(f"아카이브 대상: {month:%Y-%m}")
+                continue
+            rows = self.archive_month(month, options["chunk_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"{month:%Y-%m}: {rows}건 아카이브 완료")
+            )
+
+    def cold_months(self, cutoff):
+        """cutoff 이전이면서 DB에 메시지가 남아 있는 월 목록"""
+        oldest = Message.objects.aggregate(oldest=Min("created_at"))["oldest"]
+        if oldest is None:
+            return []
+        months = []
+        month = partitions.month_start(oldest)
+        while month < cutoff:
+            months.append(month)
+            month = partitions.add_months(month, 1)
+        return months
+
+    def archive_month(self, month, chunk_size):
+        lower, upper = partitions.month_bounds(month)
+        queryset = Message.objects.filter(created_at__gte=lower, created_at__lt=upper)
+        rows = (
+            queryset.order_by("room_id", "created_at", "id")
+            .values("id", "room_id", "sender_id", "created_at", "is_read", "content")
+            .iterator(chunk_size=chunk_size)
+        )
+
+        if not archive.is_done(month):
+            # 이전 실행이 세그먼트 작성 도중 중단되었다면 처음부터 다시 작성
+            archive.discard_month(month)
+            writer = archive.SegmentWriter(month)
+            for row in rows:
+                writer.add(row)
+            writer.close()
+            archive.mark_done(month, writer.rows_written)
+            archived = writer.rows_written
+        else:
+            # 아카이브가 끝난 월에 늦게 들어온 행은 아카이브에 합친 뒤 제거
+            # (과거 메시지 적재, 재시도된 저장, 시계 오차)
+            archived = archive.merge_late_rows(month, rows)
+
+        # 세그먼트가 완료된 뒤에만 DB에서 제거
+        if not partitions.drop_partition(month):
+            while True:
+                ids = list(queryset.values_list("id", flat=True)[:chunk_size])
+                if not ids:
+                    break
+                Message.objects.filter(id__in=ids).delete()
+        return archived
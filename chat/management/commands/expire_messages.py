@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from chat import db_pool, retention
+
+
+class Command(BaseCommand):
+    help = (
+        "보존 기간이 지난 메시지를 채팅방별로 작은 배치로 나누어 지웁니다. "
+        "모든 채팅방에서 만료된 월은 파티션/아카이브 세그먼트 단위로 제거합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=retention.RETENTION_BATCH_SIZE,
+            help="트랜잭션당 삭제할 메시지 수",
+        )
+        parser.add_argument(
+            "--io-budget",
+            type=int,
+            default=retention.RETENTION_IO_BUDGET,
+            help="초당 최대 삭제 메시지 수 (0이면 제한 없음)",
+        )
+
+    def handle(self, *args, **options):
+        db_pool.disable_statement_timeout()
+        purger = retention.RetentionPurger(
+            chunk_size=options["batch_size"], rate_limit=options["io_budget"]
+        )
+        purger.run()
+
+        for month in purger.dropped_partitions:
+            self.stdout.write(f"파티션 삭제: {month:%Y-%m}")
+        for month in purger.dropped_segments:
+            self.stdout.write(f"아카이브 세그먼트 삭제: {month:%Y-%m}")
+        if purger.archived_deleted:
+            self.stdout.write(f"아카이브 메시지 삭제: {purger.archived_deleted}건")
+        if purger.expired_client_ids:
+            self.stdout.write(
+                f"client_msg_id 기록 삭제: {purger.expired_client_ids}건"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{purger.deleted}건 삭제 ({purger.rows_per_second:.0f}건/초, "
+                f"지연 {purger.lag.total_seconds():.0f}초)"
+            )
+        )
@@ -0,0 +1,103 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chat import db_pool
+from chat.bulk_import import Importer, ImportDataError, reader_for
+from chat.models import ImportCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "JSONL/CSV 입력을 채팅방, 멤버, 메시지로 대량 적재합니다. "
+        "PostgreSQL에서는 COPY, 그 외에는 bulk_create 배치를 사용하며 "
+        "중단 후 다시 실행하면 마지막 체크포인트부터 이어서 적재합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="입력 파일 경로 (.jsonl, .csv, .gz 지원)")
+        parser.add_argument(
+            "--format",
+            dest="input_format",
+            choices=["jsonl", "csv"],
+            help="입력 형식 (기본: 확장자로 판단)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="트랜잭션당 레코드 수"
+        )
+        parser.add_argument(
+            "--create-users",
+            action="store_true",
+            help="존재하지 않는 사용자명을 로그인 불가 계정으로 생성합니다.",
+        )
+        parser.add_argument(
+            "--defer-indexes",
+            action="store_true",
+            help="적재 동안 메시지 보조 인덱스를 삭제하고 끝난 뒤 재생성합니다 "
+            "(PostgreSQL 전용).",
+        )
+        parser.add_argument(
+            "--report-every",
+            type=float,
+            default=5.0,
+            help="진행 상황(rows/s) 출력 주기 (초)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="기존 체크포인트를 무시하고 처음부터 적재합니다.",
+        )
+
+    def handle(self, *args, **options):
+        db_pool.disable_statement_timeout()
+        path = os.path.abspath(options["path"])
+        if not os.path.exists(path):
+            raise CommandError(f"입력 파일이 없습니다: {path}")
+
+        if options["restart"]:
+            old = ImportCheckpoint.objects.filter(source=path).first()
+            if old is not None:
+                old.delete()
+                # 아직 재생성하지 못한 인덱스 정의는 새 체크포인트로 넘김
+                if old.dropped_indexes:
+                    ImportCheckpoint.objects.create(
+                        source=path, dropped_indexes=old.dropped_indexes
+                    )
+        importer = Importer(
+            source=path,
+            batch_size=options["batch_size"],
+            create_users=options["create_users"],
+            log=self.stdout.write,
+        )
+        if importer.checkpoint.completed_at:
+            # 적재 후 인덱스를 재생성하던 중에 중단된 경우 남은 인덱스를 만듦
+            self.rebuild_indexes(importer)
+            self.stdout.write("이미 적재가 완료된 입력입니다. (--restart로 다시 적재)")
+            return
+        elif importer.checkpoint.position:
+            self.stdout.write(
+                f"체크포인트 {importer.checkpoint.position}부터 이어서 적재"
+            )
+
+        if options["defer_indexes"]:
+            dropped = importer.drop_message_indexes()
+            if dropped:
+                self.stdout.write(f"인덱스 삭제: {', '.join(dropped)}")
+
+        try:
+            processed, elapsed = importer.run(
+                reader_for(path, options["input_format"]),
+                report_every=options["report_every"],
+            )
+        except ImportDataError as e:
+            raise CommandError(f"적재 실패: {e}")
+
+        self.rebuild_indexes(importer)
+        self.stdout.write(
+            self.style.SUCCESS(f"적재 완료: {importer.progress(processed, elapsed)}")
+        )
+
+    def rebuild_indexes(self, importer):
+        if importer.checkpoint.dropped_indexes:
+            rebuilt = importer.rebuild_message_indexes()
+            self.stdout.write(f"인덱스 {rebuilt}개 재생성 완료")
@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.loadtest import LoadTestHarness
+
+
+class Command(BaseCommand):
+    help = (
+        "가상 WebSocket 클라이언트로 채팅 서버에 부하를 주고 연결 시간, "
+        "메시지 전파 지연(p50/p95/p99), 초당 메시지 수를 측정합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clients", type=int, default=100, help="가상 클라이언트 수"
+        )
+        parser.add_argument(
+            "--room-sizes",
+            default="2:60,10:30,50:10",
+            help="방 크기 분포 (크기:가중치, 쉼표로 구분)",
+        )
+        parser.add_argument(
+            "--duration", type=float, default=30.0, help="측정 시간 (초)"
+        )
+        parser.add_argument(
+            "--message-interval",
+            type=float,
+            default=5.0,
+            help="클라이언트별 평균 메시지 전송 간격 (초, 지수 분포)",
+        )
+        parser.add_argument(
+            "--heartbeat-interval", type=float, default=10.0, help="하트비트 간격 (초)"
+        )
+        parser.add_argument(
+            "--reconnect-rate",
+            type=float,
+            default=0.0,
+            help="클라이언트별 초당 재접속 확률",
+        )
+        parser.add_argument(
+            "--ramp-up", type=float, default=1.0, help="접속을 분산할 시간 (초)"
+        )
+        parser.add_argument(
+            "--target",
+            choices=["consumers", "asgi"],
+            default="consumers",
+            help="consumers: 라우터에 직접 연결 / asgi: chat.asgi.application "
+            "(JWT 인증 미들웨어 포함)",
+        )
+        parser.add_argument("--seed", type=int, help="난수 시드")
+        parser.add_argument(
+            "--json", action="store_true", help="결과를 JSON으로 출력합니다."
+        )
+        parser.add_argument(
+            "--keep-data",
+            action="store_true",
+            help="테스트용 사용자/채팅방을 삭제하지 않습니다.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            harness = LoadTestHarness(
+                clients=options["clients"],
+                room_sizes=options["room_sizes"],
+                duration=options["duration"],
+                message_interval=options["message_interval"],
+                heartbeat_interval=options["heartbeat_interval"],
+                reconnect_rate=options["reconnect_rate"],
+                ramp_up=options["ramp_up"],
+                target=options["target"],
+                seed=options["seed"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        summary = asyncio.run(harness.run(keep_data=options["keep_data"]))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+
+        self.stdout.write(
+            f"연결 {summary['connections']}회 (실패 {summary['connect_failures']}, "
+            f"재접속 {summary['reconnects']}) / {summary['elapsed']}초"
+        )
+        for label, key in (("연결 시간", "connect_ms"), ("전파 지연", "fanout_ms")):
+            values = summary[key]
+            self.stdout.write(
+                f"{label} (ms): p50={values['p50']} p95={values['p95']} "
+                f"p99={values['p99']}"
+            )
+        self.stdout.write(
+            f"전송 {summary['messages_sent']}건 ({summary['sent_per_sec']}/s), "
+            f"전달 {summary['messages_delivered']}건 "
+            f"({summary['delivered_per_sec']}/s), "
+            f"하트비트 {summary['heartbeats_sent']}건"
+        )
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from chat import db_pool, purge
+
+
+class Command(BaseCommand):
+    help = (
+        "삭제된(소프트 삭제) 채팅방의 메시지를 청크 단위로 속도를 제한하며 지우고 "
+        "채팅방을 제거합니다. 중단 후 다시 실행하면 남은 메시지부터 이어서 지웁니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=purge.PURGE_CHUNK_SIZE,
+            help="트랜잭션당 삭제할 메시지 수",
+        )
+        parser.add_argument(
+            "--rate-limit",
+            type=int,
+            default=purge.PURGE_RATE_LIMIT,
+            help="초당 최대 삭제 메시지 수 (0이면 제한 없음)",
+        )
+        parser.add_argument(
+            "--watch",
+            type=float,
+            metavar="SECONDS",
+            help="종료하지 않고 지정한 간격(초)마다 삭제된 채팅방을 확인합니다.",
+        )
+
+    def handle(self, *args, **options):
+        db_pool.disable_statement_timeout()
+        purger = purge.RoomPurger(
+            chunk_size=options["chunk_size"], rate_limit=options["rate_limit"]
+        )
+        while True:
+            for room_id in purge.deleted_room_ids():
+                deleted = purger.purge_room(room_id)
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"채팅방 {room_id}: 메시지 {deleted}건 삭제 완료"
+                    )
+                )
+            if not options["watch"]:
+                break
+            time.sleep(options["watch"])
@@ -4,6 +4,7 @@ from django.contrib.auth import login
 from django.contrib.auth.models import AnonymousUser
 from django.utils.crypto import get_random_string
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from .db_routers import mark_primary
 
 
 class AutoCreateUserMiddleware:
@@ -47,3 +48,26 @@ class AutoCreateUserMiddleware:
 
         response = self.get_response(request)
         return response
+
+
+class PrimaryStickinessMiddleware:
+    """
+    쓰기 요청 후 읽기를 primary DB로 고정하는 미들웨어
+
+    - 인증된 사용자의 쓰기 요청(POST/PUT/PATCH/DELETE)이 성공하면
+      REPLICA_STICKY_SECONDS 동안 해당 사용자의 읽기를 복제본 대신 primary에서 처리합니다.
+    - DRF 뷰에서 JWT로 인증된 사용자도 응답 시점에는 request.user에 반영되어 있습니다.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in self.SAFE_METHODS and response.status_code < 400:
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                mark_primary(user.id)
+        return response
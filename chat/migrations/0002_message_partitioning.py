@@ -0,0 +1,121 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:02
+
+import django.db.models.deletion
+from datetime import date, datetime, timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _add_months(month, count):
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bounds(month):
+    upper = _add_months(month, 1)
+    return (
+        datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+        datetime(upper.year, upper.month, 1, tzinfo=timezone.utc),
+    )
+
+
+def partition_message_table(apps, schema_editor):
+    """PostgreSQL에서 chat_message를 created_at 기준 월 RANGE 파티션 테이블로 변환"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    Message = apps.get_model("chat", "Message")
+    table = Message._meta.db_table
+    legacy = f"{table}_legacy"
+    execute = schema_editor.execute
+
+    execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    # 파티션 테이블의 기본 키에는 파티션 키가 포함되어야 하므로 (id, created_at)
+    execute(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS, "
+        f"PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+    )
+    execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT min(created_at) FROM {legacy}")
+        oldest = cursor.fetchone()[0]
+
+    now = datetime.now(timezone.utc)
+    month = date(oldest.year, oldest.month, 1) if oldest else date(now.year, now.month, 1)
+    last = _add_months(date(now.year, now.month, 1), 2)
+    while month <= last:
+        lower, upper = _bounds(month)
+        execute(
+            f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [lower, upper],
+        )
+        month = _add_months(month, 1)
+
+    execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+    execute(f"DROP TABLE {legacy}")
+
+    # 파티션 테이블에는 IDENTITY 컬럼을 쓸 수 없는 버전이 있어 시퀀스 기본값으로 대체
+    execute(f"CREATE SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    execute(
+        f"SELECT setval('{table}_id_seq', "
+        f"COALESCE((SELECT max(id) FROM {table}), 0) + 1, false)"
+    )
+    execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
+
+    # 레거시 테이블과 함께 사라진 외래 키 인덱스/제약 조건 재생성
+    for field_name in ("room", "sender"):
+        field = Message._meta.get_field(field_name)
+        execute(schema_editor._create_index_sql(Message, fields=[field]))
+        execute(schema_editor._create_fk_sql(Message, field, "_fk_%(to_table)s_%(to_column)s"))
+
+
+def unpartition_message_table(apps, schema_editor):
+    """파티션 테이블 chat_message를 id 기본 키의 일반 테이블로 되돌림"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    Message = apps.get_model("chat", "Message")
+    table = Message._meta.db_table
+    partitioned = f"{table}_partitioned"
+    execute = schema_editor.execute
+
+    execute(f"ALTER TABLE {table} RENAME TO {partitioned}")
+    execute(f"CREATE TABLE {table} (LIKE {partitioned}, PRIMARY KEY (id))")
+    execute(f"INSERT INTO {table} SELECT * FROM {partitioned}")
+    # 0002가 만든 시퀀스(0006 이후에는 없음)는 파티션 테이블과 함께 지워짐
+    execute(f"DROP TABLE {partitioned} CASCADE")
+
+    # 0001의 BigAutoField와 같은 IDENTITY 컬럼으로 복원
+    execute(f"ALTER TABLE {table} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+    execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+        f"COALESCE((SELECT max(id) FROM {table}), 0) + 1, false)"
+    )
+
+    for field_name in ("room", "sender"):
+        field = Message._meta.get_field(field_name)
+        execute(schema_editor._create_index_sql(Message, fields=[field]))
+        execute(schema_editor._create_fk_sql(Message, field, "_fk_%(to_table)s_%(to_column)s"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_message_table, unpartition_message_table),
+        migrations.AlterField(
+            model_name='message',
+            name='sender',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['room', 'created_at'], name='chat_msg_room_created_idx'),
+        ),
+    ]
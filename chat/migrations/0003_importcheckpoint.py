@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_message_partitioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=500, unique=True)),
+                ('position', models.BigIntegerField(default=0)),
+                ('room_map', models.JSONField(default=dict)),
+                ('counts', models.JSONField(default=dict)),
+                ('dropped_indexes', models.JSONField(default=list)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroommember',
+            name='role',
+            field=models.CharField(choices=[('member', '일반'), ('admin', '관리자')], default='member', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='chatroom',
+            name='room_type',
+            field=models.CharField(choices=[('direct', '1:1 채팅'), ('group', '그룹 채팅'), ('channel', '채널')], max_length=10),
+        ),
+    ]
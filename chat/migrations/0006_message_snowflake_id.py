@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:35
+
+import chat.snowflake
+from django.db import migrations, models
+
+
+def drop_id_sequence(apps, schema_editor):
+    """PostgreSQL에서 0002가 만든 ID 시퀀스 기본값 제거 (ID는 애플리케이션이 생성)"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    table = apps.get_model("chat", "Message")._meta.db_table
+    schema_editor.execute(f"ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT")
+    schema_editor.execute(f"DROP SEQUENCE IF EXISTS {table}_id_seq")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_message_client_msg_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='id',
+            field=models.BigIntegerField(default=chat.snowflake.next_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.RunPython(drop_id_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0006_message_snowflake_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
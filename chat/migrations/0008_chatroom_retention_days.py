@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0007_chatroom_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='retention_days',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
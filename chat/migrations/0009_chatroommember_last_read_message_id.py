@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0008_chatroom_retention_days'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroommember',
+            name='last_read_message_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0009_chatroommember_last_read_message_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_msg_id', models.CharField(max_length=64)),
+                ('message_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='message',
+            name='chat_msg_client_id_uniq',
+        ),
+        migrations.AddField(
+            model_name='clientmessage',
+            name='sender',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='clientmessage',
+            constraint=models.UniqueConstraint(fields=('sender', 'client_msg_id'), name='chat_client_msg_uniq'),
+        ),
+    ]
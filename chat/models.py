@@ -1,4 +1,7 @@
 from django.db import models
+from django.utils import timezone
+
+from . import snowflake
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 
@@ -13,16 +16,22 @@ class ChatRoom(models.Model):
     ROOM_TYPES = (
         ("direct", "1:1 채팅"),
         ("group", "그룹 채팅"),
+        ("channel", "채널"),  # 인원 제한 없는 공지용 대규모 채팅방
     )
+    GROUP_MEMBER_LIMIT = 100
 
     name = models.CharField(max_length=255)
     room_type = models.CharField(max_length=10, choices=ROOM_TYPES)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # 메시지 보존 기간 (일). 없으면 채팅방 종류별 설정(MESSAGE_RETENTION_DAYS)을 따름
+    retention_days = models.PositiveIntegerField(null=True, blank=True)
+    # 삭제 요청 시각. 메시지는 purge_rooms 명령이 나누어 지운 뒤 행을 삭제함
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def clean(self):
         if self.room_type == "group":
-            if self.participants.count() > 100:
+            if self.participants.count() > self.GROUP_MEMBER_LIMIT:
                 raise ValidationError(
                     "그룹 채팅방은 최대 100명까지만 참여할 수 있습니다."
                 )
@@ -32,13 +41,21 @@ class ChatRoom(models.Model):
 
 
 class ChatRoomMember(models.Model):
+    ROLES = (
+        ("member", "일반"),
+        ("admin", "관리자"),  # 채널에 메시지를 보낼 수 있는 권한
+    )
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     room = models.ForeignKey(
         ChatRoom, on_delete=models.CASCADE, related_name="participants"
     )
+    role = models.CharField(max_length=10, choices=ROLES, default="member")
     is_online = models.BooleanField(default=False)
     joined_at = models.DateTimeField(auto_now_add=True)
     last_seen = models.DateTimeField(auto_now=True)
+    # 마지막으로 읽은 메시지 ID (읽지 않은 메시지 수의 기준)
+    last_read_message_id = models.BigIntegerField(null=True, blank=True)
 
     class Meta:
         unique_together = ("user", "room")
@@ -48,16 +65,68 @@ class ChatRoomMember(models.Model):
 
 
 class Message(models.Model):
+    # 보내는 시점에 서버가 정하는 시간순 ID (chat.snowflake)
+    id = models.BigIntegerField(primary_key=True, default=snowflake.next_id, editable=False)
     room = models.ForeignKey(
         ChatRoom, on_delete=models.CASCADE, related_name="messages"
     )
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField(validators=[validate_message_content])
-    created_at = models.DateTimeField(auto_now_add=True)
+    # 웹소켓 메시지는 ID에 담긴 시각(수신 시각)으로 저장
+    created_at = models.DateTimeField(default=timezone.now)
     is_read = models.BooleanField(default=False)
+    # 클라이언트가 재전송 시 중복 저장을 막기 위해 붙이는 ID (ClientMessage)
+    client_msg_id = models.CharField(max_length=64, null=True, blank=True)
 
     class Meta:
-        ordering = ["created_at"]
+        # ID가 시간순이므로 ID가 정렬 키 (DB와 아카이브 조회가 같은 순서)
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["room", "created_at"], name="chat_msg_room_created_idx"),
+            models.Index(fields=["room", "id"], name="chat_msg_room_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.sender.username}: {self.content[:50]}"
+
+
+class ClientMessage(models.Model):
+    """(발신자, client_msg_id) -> 저장된 메시지 ID
+
+    파티션 테이블의 고유 제약에는 파티션 키(created_at)가 포함되어야 하므로,
+    재전송 중복 저장을 막는 고유 인덱스는 파티션되지 않은 이 테이블에 둡니다.
+    """
+
+    sender = models.ForeignKey(User, on_delete=models.CASCADE)
+    client_msg_id = models.CharField(max_length=64)
+    message_id = models.BigIntegerField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["sender", "client_msg_id"], name="chat_client_msg_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.sender_id}:{self.client_msg_id} -> {self.message_id}"
+
+
+class ImportCheckpoint(models.Model):
+    """대량 적재(import_chat) 진행 상태
+
+    적재 배치와 같은 트랜잭션에서 갱신되므로 중단 후 재실행 시
+    마지막으로 커밋된 위치부터 이어서 적재합니다.
+    """
+
+    source = models.CharField(max_length=500, unique=True)
+    position = models.BigIntegerField(default=0)
+    room_map = models.JSONField(default=dict)  # 원본 채팅방 키 -> ChatRoom.id
+    counts = models.JSONField(default=dict)
+    dropped_indexes = models.JSONField(default=list)  # 지연 생성할 인덱스 정의
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} @ {self.position}"
@@ -0,0 +1,153 @@
+"""메시지 테이블 월 단위 파티션 관리
+
+PostgreSQL에서는 ``chat_message`` 테이블을 ``created_at`` 기준 RANGE 파티션으로
+운영합니다. 다른 DB(SQLite 등)에서는 파티션 없이 단일 테이블을 사용하며,
+이 모듈의 함수들은 월 경계 계산만 제공하고 DDL은 실행하지 않습니다.
+"""
+
+from datetime import date, datetime, timezone
+
+from django.db import connections, transaction
+
+MESSAGE_TABLE = "chat_message"
+DEFAULT_PARTITION = f"{MESSAGE_TABLE}_default"
+
+
+def month_start(value):
+    """datetime/date 값이 속한 달의 1일(date)을 반환합니다."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        value = value.date()
+    return value.replace(day=1)
+
+
+def add_months(month, count):
+    """월 단위로 날짜를 이동합니다."""
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """해당 월의 [시작, 끝) 구간을 UTC aware datetime으로 반환합니다."""
+    lower = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    upper_month = add_months(month, 1)
+    upper = datetime(upper_month.year, upper_month.month, 1, tzinfo=timezone.utc)
+    return lower, upper
+
+
+def partition_name(month):
+    return f"{MESSAGE_TABLE}_p{month:%Y%m}"
+
+
+def is_partitioned(using="default"):
+    """메시지 테이블이 네이티브 파티션 테이블인지 확인합니다."""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s",
+            [MESSAGE_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(using="default"):
+    """월 파티션 목록을 (월, 테이블명) 튜플로 오래된 순서대로 반환합니다."""
+    if not is_partitioned(using):
+        return []
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s",
+            [MESSAGE_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    prefix = f"{MESSAGE_TABLE}_p"
+    partitions = []
+    for name in names:
+        if not name.startswith(prefix):
+            continue
+        suffix = name[len(prefix) :]
+        partitions.append((date(int(suffix[:4]), int(suffix[4:6]), 1), name))
+    return sorted(partitions)
+
+
+def create_partition(cursor, month):
+    """월 파티션을 생성합니다.
+
+    기본(default) 파티션에 해당 월의 행이 이미 들어와 있으면 PostgreSQL은
+    파티션 생성을 거부하므로, 독립 테이블로 만든 뒤 행을 옮기고 ATTACH 합니다.
+    """
+    name = partition_name(month)
+    lower, upper = month_bounds(month)
+    cursor.execute(
+        f"SELECT 1 FROM {DEFAULT_PARTITION} "
+        "WHERE created_at >= %s AND created_at < %s LIMIT 1",
+        [lower, upper],
+    )
+    if cursor.fetchone() is None:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {MESSAGE_TABLE} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            [lower, upper],
+        )
+        return
+
+    cursor.execute(
+        f"CREATE TABLE {name} (LIKE {MESSAGE_TABLE} INCLUDING DEFAULTS)"
+    )
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        "WHERE created_at >= %s AND created_at < %s RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+        [lower, upper],
+    )
+    cursor.execute(
+        f"ALTER TABLE {MESSAGE_TABLE} ATTACH PARTITION {name} "
+        "FOR VALUES FROM (%s) TO (%s)",
+        [lower, upper],
+    )
+
+
+def ensure_partitions(first_month, last_month, using="default"):
+    """[first_month, last_month] 구간의 월 파티션이 모두 존재하도록 보장합니다.
+
+    생성한 파티션의 월 목록을 반환합니다.
+    """
+    if not is_partitioned(using):
+        return []
+
+    existing = {month for month, _ in list_partitions(using)}
+    created = []
+    month = month_start(first_month)
+    last_month = month_start(last_month)
+    while month <= last_month:
+        if month not in existing:
+            with transaction.atomic(using=using):
+                with connections[using].cursor() as cursor:
+                    create_partition(cursor, month)
+            created.append(month)
+        month = add_months(month, 1)
+    return created
+
+
+def drop_partition(month, using="default"):
+    """월 파티션을 분리(DETACH)한 뒤 삭제합니다.
+
+    파티션이 없으면 False를 반환합니다.
+    """
+    name = partition_name(month)
+    if month not in {m for m, _ in list_partitions(using)}:
+        return False
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {MESSAGE_TABLE} DETACH PARTITION {name}")
+            cursor.execute(f"DROP TABLE {name}")
+    return True
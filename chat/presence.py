@@ -0,0 +1,196 @@
+"""온라인 사용자 조회와 관심 범위 온라인 상태 알림
+
+온라인 여부는 컨슈머가 관리하는 ``CHAT_STORE`` 의 전역 온라인 집합
+(``global_online_users``)과 채팅방별 온라인 집합(``online_users_<room_id>``)에서
+읽습니다. 온라인 사용자가 아주 많아도 한 번의 요청 비용이 페이지 크기에만
+비례하도록 합니다.
+
+- 전체 목록은 SSCAN 커서로 나누어 읽습니다. (집합 전체를 읽지 않음)
+- 연락처(1:1 채팅 상대)나 참여 채팅방으로 거르는 경우에는 후보가 요청한
+  사용자의 관계 수로 제한되므로, 후보 ID를 정렬해 마지막 ID를 커서로 씁니다.
+  같은 채팅방(채널 제외) 참여자는 DB에서 ID 순으로 나누어 읽으며 한 페이지가
+  찰 때까지만 확인합니다. (채팅방 온라인 집합의 합집합을 만들지 않음)
+- 인원 수만 필요하면 SCARD 등으로 목록 없이 셉니다.
+- 사용자 정보는 ``user_row_<id>`` 캐시에서 한 번에(get_many) 읽고, 없는
+  사용자만 한 번의 쿼리로 DB에서 읽어 채웁니다.
+
+온라인 상태 변경 알림도 관심 있는 연결에만 보냅니다. 사용자마다
+``presence_<user_id>`` 채널 레이어 그룹이 있고, ``OnlineStatusConsumer`` 는
+같은 채팅방(채널 제외) 사용자나 클라이언트가 지정한 관심 목록의 그룹에만
+가입합니다. 상태가 바뀐 사용자의 그룹에만 바뀐 사용자 ID를 담아 보내므로,
+알림 수가 전체 온라인 사용자 수의 제곱이 아니라 관심 관계 수에 비례합니다.
+
+연결은 받은 변경을 바로 보내지 않고 ``PRESENCE_DIGEST_INTERVAL`` 동안 모아
+마지막으로 알린 상태와 달라진 사용자만 한 프레임으로 보냅니다. 구간 안에서
+접속했다가 끊긴 것처럼 서로 상쇄되는 변경은 보내지 않으므로, 변경이 아무리
+많아도 연결당 프레임 수는 구간당 하나 이하입니다.
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from . import metrics
+from .models import ChatRoomMember
+from .store import GLOBAL_ONLINE_KEY, get_store
+
+ONLINE_PAGE_SIZE = 50  # 기본 페이지 크기
+ONLINE_MAX_PAGE_SIZE = 200  # 최대 페이지 크기
+ONLINE_SCOPES = ("all", "contacts", "rooms")
+PRESENCE_CHECK_BATCH = 1000  # 연락처 온라인 여부를 한 번에 확인할 사용자 수
+USER_ROW_TTL = 300  # 사용자 정보 캐시 유지 시간 (초)
+USER_ROW_FIELDS = ("id", "username", "first_name", "email")  # UserSerializer와 같음
+PRESENCE_WATCH_LIMIT = 500  # 연결 하나가 구독할 수 있는 최대 사용자 수
+# 온라인 상태 변경을 모아 보내는 간격 (초)
+PRESENCE_DIGEST_INTERVAL = getattr(settings, "PRESENCE_DIGEST_INTERVAL", 1.0)
+
+
+def watch_group(user_id):
+    return f"presence_{user_id}"
+
+
+def user_row_key(user_id):
+    return f"user_row_{user_id}"
+
+
+def user_rows(user_ids):
+    """사용자 정보 목록 (``user_ids`` 순서, 없는 사용자는 제외)"""
+    keys = {user_id: user_row_key(user_id) for user_id in user_ids}
+    cached = cache.get_many(keys.values())
+    rows = {user_id: cached[key] for user_id, key in keys.items() if key in cached}
+
+    missing = [user_id for user_id in keys if user_id not in rows]
+    if missing:
+        loaded = {
+            row["id"]: row
+            for row in User.objects.filter(id__in=missing).values(*USER_ROW_FIELDS)
+        }
+        cache.set_many(
+            {keys[user_id]: row for user_id, row in loaded.items()}, USER_ROW_TTL
+        )
+        rows.update(loaded)
+    return [rows[user_id] for user_id in user_ids if user_id in rows]
+
+
+def invalidate_user_row(user_id):
+    cache.delete(user_row_key(user_id))
+
+
+def contact_ids(user):
+    """1:1 채팅 상대 ID 목록 (정렬됨)"""
+    return sorted(
+        set(
+            ChatRoomMember.objects.filter(
+                room__room_type="direct", room__participants__user=user
+            )
+            .exclude(user=user)
+            .values_list("user_id", flat=True)
+        )
+    )
+
+
+def room_ids(user):
+    return list(
+        ChatRoomMember.objects.filter(user=user).values_list("room_id", flat=True)
+    )
+
+
+def _shared_members(user_id):
+    """같은 채팅방(채널 제외)에 참여 중인 다른 사용자 ID (ID 순, 중복 없음)"""
+    return (
+        ChatRoomMember.objects.filter(room__participants__user_id=user_id)
+        .exclude(room__room_type="channel")
+        .exclude(user_id=user_id)
+        .values_list("user_id", flat=True)
+        .distinct()
+        .order_by("user_id")
+    )
+
+
+def shared_member_ids(user, after, limit):
+    """같은 채팅방(채널 제외) 참여자 ID 중 ``after`` 보다 큰 최대 ``limit`` 개"""
+    return list(_shared_members(user.id).filter(user_id__gt=after)[:limit])
+
+
+def online_page(user, scope="all", cursor=0, limit=ONLINE_PAGE_SIZE):
+    """온라인 사용자 ID 한 페이지와 다음 커서 (끝이면 None)"""
+    store = get_store()
+    if scope == "all":
+        next_cursor, ids = store.scan_members(GLOBAL_ONLINE_KEY, cursor, limit)
+        return ids, next_cursor or None
+
+    if scope == "contacts":
+        # 후보를 나누어 확인하며 한 페이지가 찰 때까지만 Redis에 묻는다
+        candidates = [user_id for user_id in contact_ids(user) if user_id > cursor]
+        ids = []
+        for start in range(0, len(candidates), PRESENCE_CHECK_BATCH):
+            batch = candidates[start : start + PRESENCE_CHECK_BATCH]
+            ids.extend(store.present_members(GLOBAL_ONLINE_KEY, batch))
+            if len(ids) > limit:
+                break
+    else:
+        ids, after = [], cursor
+        while len(ids) <= limit:
+            batch = shared_member_ids(user, after, PRESENCE_CHECK_BATCH)
+            if not batch:
+                break
+            ids.extend(store.present_members(GLOBAL_ONLINE_KEY, batch))
+            after = batch[-1]
+
+    page = ids[:limit]
+    return page, (page[-1] if len(ids) > limit else None)
+
+
+def online_count(user, scope="all"):
+    """온라인 사용자 수 (목록을 만들지 않음)"""
+    store = get_store()
+    if scope == "all":
+        return store.count_members(GLOBAL_ONLINE_KEY)
+    if scope == "contacts":
+        return len(store.present_members(GLOBAL_ONLINE_KEY, contact_ids(user)))
+    total, after = 0, 0
+    while True:
+        batch = shared_member_ids(user, after, PRESENCE_CHECK_BATCH)
+        if not batch:
+            return total
+        total += len(store.present_members(GLOBAL_ONLINE_KEY, batch))
+        after = batch[-1]
+
+
+async def shared_room_user_ids(user_id, limit=PRESENCE_WATCH_LIMIT):
+    """같은 채팅방(채널 제외)에 참여 중인 다른 사용자 ID (최대 ``limit`` 명)"""
+    return [member async for member in _shared_members(user_id)[:limit]]
+
+
+async def online_states(user_ids):
+    """``[{"id": ..., "is_online": ...}]`` (전역 온라인 집합 기준)"""
+    online = set(await get_store().smismember(GLOBAL_ONLINE_KEY, list(user_ids)))
+    return [{"id": user_id, "is_online": user_id in online} for user_id in user_ids]
+
+
+async def publish(channel_layer, user_ids, is_online):
+    """상태가 바뀐 사용자를 구독 중인 연결에만 알립니다."""
+    for user_id in user_ids:
+        await metrics.group_send(
+            channel_layer,
+            watch_group(user_id),
+            {
+                "type": "presence_update",
+                "users": [{"id": user_id, "is_online": is_online}],
+            },
+        )
+
+
+def net_changes(reported, pending, watching):
+    """``pending`` 중 마지막으로 알린 상태(``reported``)와 달라진 변경 목록
+
+    ``reported`` 를 새 상태로 갱신하며, 구독하지 않는 사용자는 건너뜁니다.
+    """
+    changes = []
+    for user_id in sorted(pending):
+        is_online = pending[user_id]
+        if user_id not in watching or reported.get(user_id) == is_online:
+            continue
+        reported[user_id] = is_online
+        changes.append({"id": user_id, "is_online": is_online})
+    return changes
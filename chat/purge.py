@@ -0,0 +1,115 @@
+"""삭제된 채팅방 정리(purge)
+
+마지막 참여자가 나간 채팅방은 요청 안에서 바로 지우지 않고 ``deleted_at`` 만
+기록합니다. (소프트 삭제) 한 번의 ``delete()`` 는 모든 메시지와 참여자 행을
+하나의 트랜잭션으로 지우므로 큰 채팅방에서는 오래 걸리고 잠금을 오래 잡기
+때문입니다. 삭제된 채팅방은 목록/조회/참여/메시지 API에서 바로 보이지 않습니다.
+
+실제 행은 ``purge_rooms`` 명령이 지웁니다.
+
+- 메시지를 ``PURGE_CHUNK_SIZE`` 개씩 오래된 순서로 지우며, 청크마다 커밋하므로
+  잠금은 청크 하나 동안만 유지됩니다.
+- 초당 삭제 행 수가 ``PURGE_RATE_LIMIT`` 를 넘지 않도록 청크 사이에 쉽니다.
+- 아카이브 세그먼트 파일에 옮겨진 메시지도 채팅방 보존 기간 만료와 같은
+  경로(``archive.expire_room``)로 지웁니다. (세그먼트를 다시 써서 디스크에서도
+  사라짐)
+- 채팅방 행은 메시지와 참여자를 모두 지운 뒤 마지막에 지웁니다. 중간에
+  중단되어도 채팅방이 남아 있으므로 다시 실행하면 남은 메시지부터 이어서
+  지웁니다.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import archive, etags, roster
+from .models import ChatRoom, ChatRoomMember, Message
+
+logger = logging.getLogger(__name__)
+
+PURGE_CHUNK_SIZE = getattr(settings, "PURGE_CHUNK_SIZE", 1000)  # 청크당 메시지 수
+# 초당 최대 삭제 메시지 수 (0이면 제한 없음)
+PURGE_RATE_LIMIT = getattr(settings, "PURGE_RATE_LIMIT", 5000)
+
+
+def soft_delete_room(room_id):
+    """채팅방을 삭제된 것으로 표시합니다. (메시지는 purge_rooms 가 지움)"""
+    ChatRoom.objects.filter(id=room_id, deleted_at__isnull=True).update(
+        deleted_at=timezone.now()
+    )
+    roster.invalidate(room_id)
+    etags.rooms_changed()
+
+
+def deleted_room_ids():
+    """정리할 채팅방 ID 목록 (삭제 요청 순)"""
+    return list(
+        ChatRoom.objects.filter(deleted_at__isnull=False)
+        .order_by("deleted_at", "id")
+        .values_list("id", flat=True)
+    )
+
+
+class RoomPurger:
+    """삭제된 채팅방의 메시지를 청크 단위로, 속도를 제한하며 지웁니다."""
+
+    def __init__(
+        self, chunk_size=PURGE_CHUNK_SIZE, rate_limit=PURGE_RATE_LIMIT, sleep=None
+    ):
+        self.chunk_size = chunk_size
+        self.rate_limit = rate_limit
+        self.sleep = sleep or time.sleep
+
+    def purge_room(self, room_id):
+        """채팅방 하나를 정리하고 지운 메시지 수(아카이브 포함)를 반환합니다."""
+        deleted = self.delete_messages(room_id)
+        deleted += archive.expire_room(room_id, timezone.now())
+        with transaction.atomic():
+            ChatRoomMember.objects.filter(room_id=room_id).delete()
+            ChatRoom.objects.filter(id=room_id, deleted_at__isnull=False).delete()
+        logger.info("채팅방 %s 정리 완료: 메시지 %d건", room_id, deleted)
+        return deleted
+
+    def delete_messages(self, room_id, before=None):
+        """채팅방의 (``before`` 이전) 메시지를 청크 단위로 지우고 지운 수를 반환합니다."""
+        deleted = 0
+        while True:
+            started = time.monotonic()
+            count = self.delete_chunk(room_id, before)
+            if not count:
+                break
+            deleted += count
+            logger.debug("채팅방 %s 메시지 %d건 삭제", room_id, deleted)
+            self.throttle(count, time.monotonic() - started)
+        return deleted
+
+    def delete_chunk(self, room_id, before=None):
+        """가장 오래된 메시지 한 청크를 지우고 지운 수를 반환합니다.
+
+        ``(room, created_at)`` 인덱스 순서로 읽으므로 청크마다 인덱스 앞부분만
+        훑습니다.
+        """
+        messages = Message.objects.filter(room_id=room_id)
+        if before is not None:
+            messages = messages.filter(created_at__lt=before)
+        ids = list(
+            messages.order_by("created_at").values_list("id", flat=True)[
+                : self.chunk_size
+            ]
+        )
+        if not ids:
+            return 0
+        with transaction.atomic():
+            Message.objects.filter(room_id=room_id, id__in=ids).delete()
+        return len(ids)
+
+    def throttle(self, count, elapsed):
+        """``count`` 건 삭제가 초당 ``rate_limit`` 건을 넘지 않도록 쉽니다."""
+        if self.rate_limit <= 0:
+            return
+        delay = count / self.rate_limit - elapsed
+        if delay > 0:
+            self.sleep(delay)
@@ -0,0 +1,166 @@
+"""메시지 보존 기간(retention)
+
+보존 기간은 채팅방 종류별로 ``MESSAGE_RETENTION_DAYS`` (예:
+``{"direct": 365, "group": 90}``)에 정하고, 채팅방마다
+``ChatRoom.retention_days`` 로 덮어쓸 수 있습니다. 둘 다 없으면 메시지를
+지우지 않습니다.
+
+보존 기간이 지난 메시지는 ``expire_messages`` 명령이 한 번의 큰 ``DELETE``
+대신 채팅방별로 ``(room, created_at)`` 인덱스를 오래된 순서로 훑으며
+``RETENTION_BATCH_SIZE`` 개씩 지웁니다. 배치마다 커밋하고, 초당 삭제 행 수가
+``RETENTION_IO_BUDGET`` 를 넘지 않도록 배치 사이에 쉽니다. (``purge.RoomPurger``)
+
+모든 채팅방의 보존 기간이 정해져 있으면 가장 긴 보존 기간보다 오래된 월은
+통째로 지울 수 있으므로, 그런 월의 파티션(PostgreSQL)과 아카이브 세그먼트는
+행 단위로 지우지 않고 DROP/파일 삭제로 제거합니다. 채팅방별로 만료된 아카이브
+메시지는 ``archive.expire_room()`` 이 해당 블록을 다시 써서 지우고, 명령이
+실행되기 전에도 아카이브를 읽는 경로(히스토리, 메시지 조회, 내보내기)는
+``read_cutoffs()`` 로 만료된 메시지를 거릅니다.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import archive, dedupe, etags, partitions
+from .models import ChatRoom, Message
+from .purge import RoomPurger
+
+# 채팅방 종류 -> 보존 기간 (일)
+MESSAGE_RETENTION_DAYS = getattr(settings, "MESSAGE_RETENTION_DAYS", {})
+RETENTION_BATCH_SIZE = getattr(settings, "RETENTION_BATCH_SIZE", 500)  # 배치당 행 수
+# 초당 최대 삭제 행 수 (0이면 제한 없음)
+RETENTION_IO_BUDGET = getattr(settings, "RETENTION_IO_BUDGET", 2000)
+
+
+def retention_days(room_type, override=None):
+    """채팅방의 보존 기간 (일, 무기한이면 None)"""
+    if override:
+        return override
+    return MESSAGE_RETENTION_DAYS.get(room_type)
+
+
+def room_cutoffs(now):
+    """보존 기간이 있는 (삭제되지 않은) 채팅방의 ``(채팅방 ID, 기준 시각)`` 목록"""
+    rooms = ChatRoom.objects.filter(deleted_at__isnull=True).values_list(
+        "id", "room_type", "retention_days"
+    )
+    cutoffs = []
+    for room_id, room_type, override in rooms.order_by("id"):
+        days = retention_days(room_type, override)
+        if days:
+            cutoffs.append((room_id, now - timedelta(days=days)))
+    return cutoffs
+
+
+def read_cutoffs(room_ids, now=None):
+    """읽기에서 거를 ``{채팅방 ID: 기준 시각}`` (보존 기간이 없는 채팅방은 제외)
+
+    아카이브가 비어 있으면 쿼리하지 않습니다.
+    """
+    if not archive.archived_months():
+        return {}
+    now = now or timezone.now()
+    rooms = ChatRoom.objects.filter(id__in=room_ids).values_list(
+        "id", "room_type", "retention_days"
+    )
+    cutoffs = {}
+    for room_id, room_type, override in rooms:
+        days = retention_days(room_type, override)
+        if days:
+            cutoffs[room_id] = now - timedelta(days=days)
+    return cutoffs
+
+
+def layout_cutoff(now):
+    """모든 채팅방에서 보존 기간이 지난 기준 시각 (무기한인 채팅방이 있으면 None)"""
+    policies = ChatRoom.objects.values_list("room_type", "retention_days").distinct()
+    days = [retention_days(room_type, override) for room_type, override in policies]
+    if not days or None in days:
+        return None
+    return now - timedelta(days=max(days))
+
+
+def expired_months(months, cutoff):
+    """``cutoff`` 이전에 끝나는 월 목록"""
+    return [month for month in months if partitions.month_bounds(month)[1] <= cutoff]
+
+
+class RetentionPurger(RoomPurger):
+    """보존 기간이 지난 메시지를 채팅방별로 나누어 지우고 진행 상황을 기록합니다.
+
+    ``deleted`` 는 지운 행 수(``archived_deleted`` 는 그중 아카이브 행 수),
+    ``lag`` 는 지우기 전 가장 오래 남아 있던 만료 메시지가 기준 시각을 넘긴
+    시간입니다. (작업이 밀린 정도)
+    """
+
+    def __init__(
+        self,
+        chunk_size=RETENTION_BATCH_SIZE,
+        rate_limit=RETENTION_IO_BUDGET,
+        sleep=None,
+    ):
+        super().__init__(chunk_size, rate_limit, sleep)
+        self.deleted = 0
+        self.archived_deleted = 0
+        self.lag = timedelta(0)
+        self.elapsed = 0.0
+        self.dropped_partitions = []
+        self.dropped_segments = []
+        self.expired_client_ids = 0
+
+    @property
+    def rows_per_second(self):
+        return self.deleted / self.elapsed if self.elapsed else 0.0
+
+    def run(self, now=None):
+        now = now or timezone.now()
+        started = time.monotonic()
+        self.drop_expired_months(now)
+        archived = archive.oldest_rows()
+        for room_id, cutoff in room_cutoffs(now):
+            if room_id in archived and archived[room_id] < cutoff:
+                self.expire_archive(room_id, cutoff)
+            self.expire_room(room_id, cutoff)
+        self.expired_client_ids = dedupe.expire_client_ids(now, self.chunk_size)
+        self.elapsed = time.monotonic() - started
+        return self
+
+    def drop_expired_months(self, now):
+        """모든 채팅방에서 만료된 월의 파티션과 아카이브 세그먼트를 지웁니다."""
+        cutoff = layout_cutoff(now)
+        if cutoff is None:
+            return
+        monthly = [month for month, _ in partitions.list_partitions()]
+        for month in expired_months(monthly, cutoff):
+            if partitions.drop_partition(month):
+                self.dropped_partitions.append(month)
+        for month in expired_months(archive.archived_months(), cutoff):
+            archive.discard_month(month)
+            self.dropped_segments.append(month)
+
+    def expire_archive(self, room_id, cutoff):
+        """채팅방의 만료된 아카이브 메시지를 지웁니다."""
+        deleted = archive.expire_room(room_id, cutoff)
+        self.archived_deleted += deleted
+        self.deleted += deleted
+        if deleted:
+            etags.messages_changed(room_id)
+        return deleted
+
+    def expire_room(self, room_id, cutoff):
+        oldest = (
+            Message.objects.filter(room_id=room_id, created_at__lt=cutoff)
+            .order_by("created_at")
+            .values_list("created_at", flat=True)
+            .first()
+        )
+        if oldest is None:
+            return 0
+        self.lag = max(self.lag, cutoff - oldest)
+        deleted = self.delete_messages(room_id, before=cutoff)
+        self.deleted += deleted
+        etags.messages_changed(room_id)
+        return deleted
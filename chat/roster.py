@@ -0,0 +1,115 @@
+"""채팅방 참여자 목록(roster) 캐시
+
+``ChatConsumer`` 는 연결할 때와 온라인 상태가 바뀔 때마다 방의 모든 수신자에게
+참여자 목록을 보냅니다. 참여자 구성은 자주 바뀌지 않으므로 (사용자 ID,
+사용자 이름) 목록을 프로세스 내 LRU 캐시에 두고, 온라인 여부만 읽는 시점에
+``CHAT_STORE`` 의 온라인 집합과 합칩니다.
+
+캐시 항목에는 ``roster_version_<room_id>`` 버전 카운터 값을 함께 저장합니다.
+참여자를 바꾸는 뷰(생성/1:1 생성/참여/나가기)만 ``invalidate()`` 로 카운터를
+올리므로, 다른 워커 프로세스의 캐시도 다음 조회에서 버전이 달라진 것을 보고
+DB에서 다시 읽습니다. 조회 한 번은 버전과 온라인 집합을 함께 읽는 저장소
+왕복 한 번이며, 버전이 같으면 DB 쿼리가 없습니다.
+"""
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+from . import metrics
+from .models import ChatRoomMember
+from .store import get_store, online_key, roster_version_key
+
+ROSTER_CACHE_SIZE = getattr(settings, "ROSTER_CACHE_SIZE", 1000)
+
+
+class RosterCache:
+    """채팅방 ID -> (버전, 참여자 목록) LRU 캐시"""
+
+    def __init__(self, limit=ROSTER_CACHE_SIZE):
+        self.limit = limit
+        self._entries = OrderedDict()
+
+    def get(self, room_id, version):
+        """버전이 일치하는 참여자 목록 (없거나 오래되었으면 None)"""
+        entry = self._entries.get(room_id)
+        if entry is None or entry[0] != version:
+            return None
+        self._entries.move_to_end(room_id)
+        return entry[1]
+
+    def put(self, room_id, version, members):
+        self._entries[room_id] = (version, members)
+        self._entries.move_to_end(room_id)
+        while len(self._entries) > self.limit:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+rosters = RosterCache()
+member_counts = RosterCache()  # 채널(대규모 채팅방)의 참여자 수
+
+
+async def _load_members(room_id):
+    """DB에서 (사용자 ID, 사용자 이름) 목록을 읽습니다.
+
+    버전이 바뀐 직후(참여자 변경 직후)에 읽게 되므로 복제 지연이 있는
+    복제본 대신 primary에서 읽습니다. 변경이 없는 한 다시 읽지 않습니다.
+    """
+    members = ChatRoomMember.objects.filter(room_id=room_id).values_list(
+        "user_id", "user__username"
+    )
+    return tuple([member async for member in members])
+
+
+async def room_users_status(room_id):
+    """참여자 목록과 각 사용자의 온라인 여부"""
+    version, online_users = await get_store().version_and_members(
+        roster_version_key(room_id), online_key(room_id)
+    )
+    members = rosters.get(room_id, version)
+    if members is None:
+        metrics.ROSTER_LOOKUPS.inc("miss")
+        members = await _load_members(room_id)
+        rosters.put(room_id, version, members)
+    else:
+        metrics.ROSTER_LOOKUPS.inc("hit")
+
+    return [
+        {"id": user_id, "username": username, "is_online": user_id in online_users}
+        for user_id, username in members
+    ]
+
+
+async def room_counts(room_id):
+    """채널용 집계 온라인 상태: 참여자 수와 온라인 사용자 수
+
+    수만 명의 참여자 목록을 만들지 않도록 참여자 수만 버전별로 캐시하고,
+    온라인 사용자 수는 온라인 집합의 크기로 구합니다.
+    """
+    version, online = await get_store().version_and_count(
+        roster_version_key(room_id), online_key(room_id)
+    )
+    members = member_counts.get(room_id, version)
+    if members is None:
+        metrics.ROSTER_LOOKUPS.inc("miss")
+        members = await ChatRoomMember.objects.filter(room_id=room_id).acount()
+        member_counts.put(room_id, version, members)
+    else:
+        metrics.ROSTER_LOOKUPS.inc("hit")
+    return {"members": members, "online": online}
+
+
+def invalidate(room_id):
+    """채팅방 참여자가 바뀌었음을 알립니다.
+
+    트랜잭션이 커밋된 뒤에 버전을 올려, 다른 프로세스가 커밋 전 데이터를
+    새 버전으로 캐시하지 않도록 합니다.
+    """
+    transaction.on_commit(lambda: get_store().bump_version(roster_version_key(room_id)))
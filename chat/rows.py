@@ -0,0 +1,137 @@
+"""읽기 전용 응답의 빠른 직렬화 경로
+
+메시지 히스토리, 채팅방 목록, 참여자 목록처럼 읽기만 하는 응답은 모델
+인스턴스와 DRF ``ModelSerializer`` 필드 객체를 거치지 않고, ``values_list()``
+튜플을 미리 컴파일한 변환 함수로 바로 dict로 만듭니다. 응답 형식은 같은
+데이터를 DRF 시리얼라이저(``chat.serializers``)로 만든 것과 같습니다.
+(``tests/test_rows.py`` 에서 비교)
+
+쓰기(생성/수정)와 상세 조회는 계속 DRF 시리얼라이저를 사용합니다.
+"""
+
+import json
+
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+
+def format_datetime(value, tz):
+    """DRF ``DateTimeField`` 와 같은 ISO 8601 문자열 (``tz`` 시간대, UTC는 Z)"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(tz)
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+class RowMapper:
+    """``values_list()`` 행을 응답 dict로 바꾸는 변환기
+
+    ``shape`` 은 응답 키 -> 컬럼 이름 매핑입니다. 값이 dict이면 중첩 객체,
+    (컬럼 이름, 함수) 튜플이면 컬럼 값을 함수로 변환합니다. 생성할 때 행
+    하나를 dict 리터럴 하나로 만드는 함수를 컴파일해 두므로, 행마다 필드
+    목록을 순회하지 않습니다.
+
+    변환 함수는 (컬럼 값, 현재 시간대)를 받습니다. 현재 시간대는 행마다 찾지
+    않고 ``map()`` 호출마다 한 번 찾습니다.
+    """
+
+    def __init__(self, shape):
+        self.columns = []
+        self._converters = {}
+        source = self._compile(shape)
+        namespace = dict(self._converters)
+        exec(f"def to_dict(row, tz):\n    return {source}\n", namespace)
+        self.to_dict = namespace["to_dict"]
+
+    def _compile(self, shape):
+        items = []
+        for key, column in shape.items():
+            if isinstance(column, dict):
+                value = self._compile(column)
+            elif isinstance(column, tuple):
+                column, converter = column
+                name = f"_convert_{len(self._converters)}"
+                self._converters[name] = converter
+                value = f"{name}(row[{self._index(column)}], tz)"
+            else:
+                value = f"row[{self._index(column)}]"
+            items.append(f"{key!r}: {value}")
+        return "{" + ", ".join(items) + "}"
+
+    def _index(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+        return self.columns.index(column)
+
+    def rows(self, queryset):
+        """변환에 필요한 컬럼만 읽는 쿼리셋"""
+        return queryset.values_list(*self.columns)
+
+    def map(self, rows):
+        to_dict = self.to_dict
+        tz = timezone.get_current_timezone()
+        return [to_dict(row, tz) for row in rows]
+
+
+def _user_shape(prefix):
+    return {
+        "id": f"{prefix}_id",
+        "username": f"{prefix}__username",
+        "first_name": f"{prefix}__first_name",
+        "email": f"{prefix}__email",
+    }
+
+
+# MessageSerializer
+MESSAGE = RowMapper(
+    {
+        "id": "id",
+        "room": "room_id",
+        "sender": _user_shape("sender"),
+        "content": "content",
+        "created_at": ("created_at", format_datetime),
+    }
+)
+
+# ChatRoomSerializer
+ROOM = RowMapper(
+    {
+        "id": "id",
+        "name": "name",
+        "room_type": "room_type",
+        "retention_days": "retention_days",
+        "created_at": ("created_at", format_datetime),
+    }
+)
+
+# 참여자 목록 API (ChatRoomMemberSerializer의 user + is_online)
+MEMBER = RowMapper({**_user_shape("user"), "is_online": "is_online"})
+
+
+class RowJSONRenderer(JSONRenderer):
+    """이미 JSON 기본 타입으로만 이루어진 응답을 C 인코더로 바로 인코딩합니다.
+
+    DRF ``JSONRenderer`` 는 날짜/지연 문자열 등을 위해 파이썬 인코더 클래스를
+    거칩니다. 변환할 수 없는 값이 있으면 (오류 응답 등) DRF 렌더러로
+    되돌아갑니다. 들여쓰기를 요청한 경우에도 DRF 렌더러를 사용합니다.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if not self.get_indent(accepted_media_type or "", renderer_context or {}):
+            try:
+                ret = json.dumps(
+                    data, ensure_ascii=False, separators=(",", ":"), allow_nan=False
+                )
+            except (TypeError, ValueError):
+                pass
+            else:
+                # DRF와 같이 자바스크립트 문자열에 그대로 넣을 수 있도록 이스케이프
+                ret = ret.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+                return ret.encode()
+        return super().render(data, accepted_media_type, renderer_context)
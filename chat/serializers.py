@@ -46,17 +46,17 @@ class ChatRoomMemberSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ChatRoomMember
-        fields = ["id", "room", "user", "is_online", "joined_at"]
+        fields = ["id", "room", "user", "role", "is_online", "joined_at"]
 
 
 class MessageSerializer(serializers.ModelSerializer):
     """채팅 메시지 시리얼라이저"""
 
-    user = UserSerializer(read_only=True)
+    sender = UserSerializer(read_only=True)
 
     class Meta:
         model = Message
-        fields = ["id", "room", "user", "message", "created_at"]
+        fields = ["id", "room", "sender", "content", "created_at"]
 
 
 class ChatRoomSerializer(serializers.ModelSerializer):
@@ -64,7 +64,7 @@ class ChatRoomSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ChatRoom
-        fields = ["id", "name", "room_type", "created_at"]
+        fields = ["id", "name", "room_type", "retention_days", "created_at"]
 
     def get_last_message(self, obj):
         last_message = obj.messages.order_by("-created_at").first()
@@ -14,6 +14,8 @@ from pathlib import Path
 import os
 from datetime import timedelta
 
+from chat.db_pool import pool_options
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -52,6 +54,7 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "chat.middleware.AutoCreateUserMiddleware",
+    "chat.middleware.PrimaryStickinessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -81,6 +84,10 @@ ASGI_APPLICATION = "chat.asgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# 비동기로 옮길 수 없는 동기 작업(JWT 검증 등)을 실행할 스레드 수
+# (DB 커넥션 풀 크기도 이 값에 맞춰 정해짐)
+CHAT_SYNC_THREADS = int(os.getenv("CHAT_SYNC_THREADS", "16"))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -89,9 +96,29 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "django_chat_password"),
         "HOST": os.getenv("POSTGRES_HOST", "db"),
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        # psycopg3 커넥션 풀 (chat.db_pool 참고). 풀 사용 시 CONN_MAX_AGE는 0이어야 함
+        "OPTIONS": {
+            "pool": pool_options(
+                CHAT_SYNC_THREADS,
+                min_size=int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+                max_size=int(os.getenv("DB_POOL_MAX_SIZE", "0")) or None,
+            ),
+        },
     }
 }
 
+# 읽기 전용 복제본 (chat.db_routers 참고)
+# POSTGRES_REPLICA_HOSTS 에 쉼표로 구분한 호스트를 지정하면 replica_reads() 경로의
+# 읽기 쿼리가 복제본으로 분산됩니다.
+DATABASE_ROUTERS = ["chat.db_routers.ReplicaRouter"]
+DATABASE_REPLICAS = []
+_replica_hosts = os.getenv("POSTGRES_REPLICA_HOSTS", "")
+for index, host in enumerate(filter(None, _replica_hosts.split(","))):
+    alias = f"replica{index + 1}"
+    DATABASES[alias] = {**DATABASES["default"], "HOST": host}
+    DATABASE_REPLICAS.append(alias)
+REPLICA_STICKY_SECONDS = 5  # 쓰기 후 해당 사용자의 읽기를 primary로 고정할 시간 (초)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -156,6 +183,101 @@ CACHES = {
     }
 }
 
+# 온라인 상태/메시지 큐 저장소 (redis://... 또는 memory://)
+# 컨슈머는 redis.asyncio 클라이언트로 이벤트 루프에서 바로 접근합니다.
+CHAT_STORE_URL = os.getenv(
+    "CHAT_STORE_URL", f"redis://{os.getenv('REDIS_HOST', 'redis')}:6379/2"
+)
+
+# 메시지 ID(snowflake) 노드 ID (0~1023). 지정하지 않으면 CHAT_STORE에서 워커
+# 프로세스마다 겹치지 않는 번호를 임대하며, 직접 지정할 때는 워커 프로세스마다
+# 달라야 합니다.
+SNOWFLAKE_NODE_ID = (
+    int(os.environ["SNOWFLAKE_NODE_ID"]) if os.getenv("SNOWFLAKE_NODE_ID") else None
+)
+
+# /metrics 스크랩용 Bearer 토큰 (비어 있으면 스태프 로그인 세션만 허용)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# /ws/online/ 연결에 온라인 상태 변경을 모아 보내는 간격 (초)
+PRESENCE_DIGEST_INTERVAL = float(os.getenv("PRESENCE_DIGEST_INTERVAL", "1"))
+
+# 배포 시 드레인: SIGTERM을 받으면 새 연결을 거절하고, 큐의 메시지를 저장한 뒤
+# 연결을 DRAIN_DURATION 초에 걸쳐 나누어 닫습니다. 클라이언트에는 재연결 대기
+# 시간(1초 + 최대 DRAIN_RECONNECT_JITTER 초의 지터)을 알립니다.
+DRAIN_DURATION = int(os.getenv("DRAIN_DURATION", "10"))
+DRAIN_RECONNECT_JITTER = int(os.getenv("DRAIN_RECONNECT_JITTER", "30"))
+
+# 채팅방 참여자 목록 프로세스 내 캐시 크기 (LRU, 채팅방 수)
+# 참여/나가기/생성 뷰가 CHAT_STORE 의 버전 카운터를 올리면 다시 읽습니다.
+ROSTER_CACHE_SIZE = int(os.getenv("ROSTER_CACHE_SIZE", "1000"))
+
+# 채팅방 연결 직후 스냅샷(hello) 프레임에 포함할 최근 메시지 수
+HELLO_MESSAGE_COUNT = int(os.getenv("HELLO_MESSAGE_COUNT", "50"))
+
+# 메시지 저장소 설정
+# PostgreSQL에서는 메시지 테이블을 월 단위로 파티셔닝하고,
+# MESSAGE_HOT_MONTHS 보다 오래된 월은 archive_messages 명령으로
+# 압축 세그먼트 파일로 옮깁니다.
+MESSAGE_HOT_MONTHS = int(os.getenv("MESSAGE_HOT_MONTHS", "6"))
+MESSAGE_PARTITION_PREMAKE_MONTHS = 2  # 미리 만들어 둘 미래 파티션 수
+MESSAGE_ARCHIVE_ROOT = os.getenv(
+    "MESSAGE_ARCHIVE_ROOT", os.path.join(BASE_DIR, "message_archive")
+)
+MESSAGE_ARCHIVE_BLOCK_ROWS = 256  # 세그먼트 블록당 최대 메시지 수
+EXPORT_CHUNK_SIZE = 2000  # 내보내기 시 서버 사이드 커서 청크 크기
+
+# 삭제된 채팅방 정리 설정
+# 마지막 참여자가 나간 채팅방은 소프트 삭제되고, purge_rooms 명령이 메시지를
+# PURGE_CHUNK_SIZE 개씩, 초당 PURGE_RATE_LIMIT 개 이하로 나누어 지웁니다.
+PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", "1000"))
+PURGE_RATE_LIMIT = int(os.getenv("PURGE_RATE_LIMIT", "5000"))
+
+# 메시지 보존 기간 (일, 채팅방 종류별). 예: MESSAGE_RETENTION_DAYS="direct=365,group=90"
+# 설정이 없는 종류는 무기한 보관하며, 채팅방의 retention_days 가 우선합니다.
+# expire_messages 명령이 RETENTION_BATCH_SIZE 개씩, 초당 RETENTION_IO_BUDGET 개
+# 이하로 지웁니다.
+MESSAGE_RETENTION_DAYS = {
+    room_type: int(days)
+    for room_type, days in (
+        item.split("=")
+        for item in os.getenv("MESSAGE_RETENTION_DAYS", "").split(",")
+        if item
+    )
+}
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+RETENTION_IO_BUDGET = int(os.getenv("RETENTION_IO_BUDGET", "2000"))
+# client_msg_id 중복 저장 방지 기록(ClientMessage)도 이 기간이 지나면 같은 명령이 지움
+CLIENT_MSG_ID_RETENTION_DAYS = int(os.getenv("CLIENT_MSG_ID_RETENTION_DAYS", "30"))
+
+# 로깅/트레이싱 설정
+# chat 로거는 JSON 한 줄 형식으로 기록하며, 출력은 백그라운드 스레드에서
+# 처리해 이벤트 루프를 막지 않습니다.
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))  # 스팬 샘플링 비율
+TRACE_SLOW_TOP_N = 10  # 구간별로 기록할 가장 느린 작업 수
+TRACE_SLOW_INTERVAL = 60  # 느린 작업 기록 주기 (초)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "chat.tracing.JSONFormatter"},
+    },
+    "handlers": {
+        "async": {
+            "class": "chat.tracing.AsyncLogHandler",
+            "formatter": "json",
+        },
+    },
+    "loggers": {
+        "chat": {
+            "handlers": ["async"],
+            "level": os.getenv("CHAT_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
 # 세션 설정
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
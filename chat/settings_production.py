@@ -0,0 +1,35 @@
+from psycopg_pool import ConnectionPool
+
+from .settings import *
+
+# 운영 환경 설정
+DEBUG = False
+SECRET_KEY = os.environ["DJANGO_SECRET_KEY"]
+ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS", "www.midagedev.com").split(",")
+
+# DB 커넥션 풀
+# - 워커 시작 시 min_size 만큼 연결을 미리 맺어 두고 (chat.asgi 에서 warm_pools)
+# - 연결을 빌려줄 때마다 상태를 확인해 끊어진 연결은 새로 맺으며
+# - 오래된/유휴 연결은 주기적으로 교체합니다.
+# 워커 수 x DB_POOL_MAX_SIZE 가 PostgreSQL max_connections 안에 들어와야 합니다.
+DATABASES["default"]["OPTIONS"]["pool"] = pool_options(
+    CHAT_SYNC_THREADS,
+    min_size=int(os.getenv("DB_POOL_MIN_SIZE", "4")),
+    max_size=int(os.getenv("DB_POOL_MAX_SIZE", "0")) or None,
+    timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+    check=ConnectionPool.check_connection,
+    max_lifetime=30 * 60,  # 30분마다 연결 교체
+    max_idle=5 * 60,  # 5분 이상 유휴 연결 정리
+)
+
+# 쿼리 타임아웃 (밀리초, 관리 명령과 마이그레이션은 db_pool.disable_statement_timeout 으로 해제)
+DATABASES["default"]["OPTIONS"]["options"] = (
+    f"-c statement_timeout={os.getenv('DB_STATEMENT_TIMEOUT_MS', '5000')}"
+)
+
+# 로그는 WARNING 이상만 기록 (스팬 샘플/느린 작업 로그는 chat.trace 에서 별도 설정)
+LOGGING["loggers"]["chat"]["level"] = os.getenv("CHAT_LOG_LEVEL", "WARNING")
+LOGGING["loggers"]["chat.trace"] = {"level": "INFO"}
+
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
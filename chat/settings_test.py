@@ -5,8 +5,16 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": ":memory:",  # In-memory SQLite 데이터베이스
-    }
+    },
+    # 복제본 라우팅 테스트용 별칭 (테스트 중에는 default와 같은 DB를 바라봄)
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+        "TEST": {"MIRROR": "default"},
+    },
 }
+# 복제본 라우팅은 필요한 테스트에서만 override_settings로 켬
+DATABASE_REPLICAS = []
 
 # 테스트용 채널 레이어 설정 (In-Memory Channel Layer 사용)
 CHANNEL_LAYERS = {
@@ -27,8 +35,23 @@ PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
 
+# 온라인 상태/메시지 큐 저장소 (프로세스 내 구현 사용)
+CHAT_STORE_URL = "memory://"
+
 # 테스트용 미디어 파일 설정
 MEDIA_ROOT = "/tmp/test_media/"
 
 # 테스트용 이메일 백엔드
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+# 테스트용 메시지 아카이브 경로
+MESSAGE_ARCHIVE_ROOT = "/tmp/test_message_archive/"
+
+# 테스트 출력이 스팬 로그로 채워지지 않도록 샘플링 비활성화
+TRACE_SAMPLE_RATE = 0
+
+# 테스트 프로세스의 SIGTERM 처리는 바꾸지 않음
+DRAIN_ON_SIGTERM = False
+
+# 온라인 상태 요약 프레임 간격 (테스트 대기 시간 단축)
+PRESENCE_DIGEST_INTERVAL = 0.1
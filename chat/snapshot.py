@@ -0,0 +1,127 @@
+"""연결 직후 보내는 채팅방 스냅샷(hello) 프레임
+
+``ChatConsumer`` 는 연결을 수락하면 화면을 처음 그리는 데 필요한 정보를
+프레임 하나로 보냅니다. 클라이언트가 연결 후 ``messages/``, ``users/`` API를
+따로 호출하지 않아도 됩니다.
+
+- ``users``: 참여자 목록과 온라인 여부 (채널은 ``online_count`` 인원 수)
+- ``messages``: 최근 ``HELLO_MESSAGE_COUNT`` 개 메시지 (시간순)
+- ``last_read_message_id``, ``unread_count``: 읽음 위치와 읽지 않은 메시지 수
+- ``seq``: 스냅샷에 포함된 가장 최근 메시지 ID. 스냅샷과 이후 실시간 메시지가
+  겹칠 수 있으므로 ``id`` 가 ``seq`` 이하인 ``message`` 프레임은 버리면 됩니다.
+
+참여자 목록은 ``roster`` 캐시에서 읽고, 메시지와 읽지 않은 수는 각각 쿼리
+한 번으로 구합니다. 아직 DB에 저장되지 않은 메시지는 저장 대기 큐와 저장 중
+목록의 끝부분에서 함께 읽습니다.
+
+연결은 채팅방 그룹에 먼저 참여한 뒤 스냅샷을 만듭니다. 메시지는 큐 → 저장 중
+목록 → DB 순서로만 옮겨지고(저장 중 목록에서는 커밋 후에 지움), 스냅샷은 큐와
+저장 중 목록을 한 번에 읽은 다음 DB를 읽으므로, 그룹 참여 전에 전파된 메시지도
+스냅샷에서 빠지지 않습니다.
+"""
+
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from . import roster, snowflake
+from .models import Message
+from .store import get_store, inflight_key, queue_key
+
+HELLO_MESSAGE_COUNT = getattr(settings, "HELLO_MESSAGE_COUNT", 50)
+UNREAD_COUNT_LIMIT = 1000  # 읽지 않은 메시지는 최대 이 수까지만 셈 (COUNT 비용 제한)
+
+# 메시지 행: (created_at, id, sender_id, 사용자 이름, 내용)
+
+
+async def recent_messages(room_id, limit=HELLO_MESSAGE_COUNT):
+    """DB의 최근 메시지 행 목록 (최신순)"""
+    rows = (
+        Message.objects.filter(room_id=room_id)
+        .order_by("-id")
+        .values_list("created_at", "id", "sender_id", "sender__username", "content")
+    )
+    return [row async for row in rows[:limit]]
+
+
+async def queued_messages(room_id, usernames, limit=HELLO_MESSAGE_COUNT):
+    """저장 대기 큐와 저장 중 목록의 최근 메시지 행 목록 (시간순)
+
+    보낸 사용자 이름은 ``usernames`` (참여자 목록)에서 찾고, 없는 사용자만
+    한 번의 쿼리로 읽습니다.
+    """
+    entries = await get_store().pending_entries(
+        queue_key(room_id), inflight_key(room_id), limit
+    )
+    entries = [entry for entry in entries if "id" in entry]
+    entries.sort(key=lambda entry: entry["id"])
+    entries = entries[-limit:]
+    missing = {entry["sender"] for entry in entries} - usernames.keys()
+    if missing:
+        users = User.objects.filter(id__in=missing).values_list("id", "username")
+        usernames = {**usernames, **{user_id: name async for user_id, name in users}}
+    return [
+        (
+            snowflake.to_datetime(entry["id"]),
+            entry["id"],
+            entry["sender"],
+            usernames.get(entry["sender"]),
+            entry["content"],
+        )
+        for entry in entries
+    ]
+
+
+async def unread_count(room_id, user_id, last_read_message_id, queued=()):
+    """읽음 위치 이후 다른 사용자가 보낸 메시지 수 (최대 ``UNREAD_COUNT_LIMIT``)"""
+    messages = Message.objects.filter(room_id=room_id).exclude(sender_id=user_id)
+    if last_read_message_id is not None:
+        messages = messages.filter(id__gt=last_read_message_id)
+        if snowflake.is_snowflake(last_read_message_id):
+            # (room, created_at) 인덱스와 월 파티션 범위를 쓰도록 시각 조건을 함께 줌
+            messages = messages.filter(
+                created_at__gte=snowflake.to_datetime(last_read_message_id)
+            )
+    count = await messages[:UNREAD_COUNT_LIMIT].acount()
+    count += sum(
+        1
+        for _, message_id, sender_id, _, _ in queued
+        if sender_id != user_id
+        and (last_read_message_id is None or message_id > last_read_message_id)
+    )
+    return min(count, UNREAD_COUNT_LIMIT)
+
+
+async def hello_frame(room_id, user_id, last_read_message_id, is_channel=False):
+    frame = {"type": "hello"}
+    if is_channel:
+        frame["online_count"] = await roster.room_counts(room_id)
+        usernames = {}
+    else:
+        frame["users"] = await roster.room_users_status(room_id)
+        usernames = {user["id"]: user["username"] for user in frame["users"]}
+
+    # 큐/저장 중 목록을 DB보다 먼저 읽음 (저장 직후에는 두 곳에 모두 있을 수
+    # 있으므로 ID로 합침)
+    queued = await queued_messages(room_id, usernames)
+    rows = {row[1]: row for row in await recent_messages(room_id)}
+    rows.update((row[1], row) for row in queued)
+    rows = sorted(rows.values(), key=lambda row: (row[0], row[1]))
+    rows = rows[-HELLO_MESSAGE_COUNT:]
+
+    frame["messages"] = [
+        {
+            "id": message_id,
+            "user": username,
+            "message": content,
+            "created_at": created_at.isoformat(),
+        }
+        for created_at, message_id, _, username, content in rows
+    ]
+    frame["last_read_message_id"] = last_read_message_id
+    frame["unread_count"] = await unread_count(
+        room_id, user_id, last_read_message_id, queued
+    )
+    frame["seq"] = rows[-1][1] if rows else None
+    return json.dumps(frame)
@@ -0,0 +1,212 @@
+"""시간순으로 정렬되는 64비트 메시지 ID (snowflake 방식)
+
+``| 41비트 밀리초 타임스탬프 | 10비트 노드 ID | 12비트 순번 |``
+
+- 타임스탬프는 ``EPOCH`` (2000-01-01)부터 지난 밀리초이므로 ID 순서가 곧
+  생성 시각 순서입니다. (2069년까지 사용 가능) 과거 메시지를 적재할 때도 원래
+  생성 시각으로 ID를 만들 수 있도록 ``EPOCH`` 는 적재할 데이터보다 이르게
+  잡습니다.
+- 노드 ID는 워커 프로세스마다 다르므로 ID를 만들 때마다 프로세스끼리
+  조율하지 않아도 됩니다. ``SNOWFLAKE_NODE_ID`` 로 직접 지정하지 않으면
+  ``CHAT_STORE`` 에서 만료 시간이 있는 노드 번호를 임대(``NodeLease``)합니다.
+  같은 노드 ID를 쓰는 프로세스가 같은 밀리초에 만든 ID는 겹치므로, 해시처럼
+  겹칠 수 있는 방법으로 정하지 않습니다. 임대 연장은 백그라운드 스레드가
+  하므로 ``next_id()`` 는 저장소를 호출하지 않습니다. (이벤트 루프를 막지 않음)
+- 같은 밀리초에 4096개를 넘게 만들면 다음 밀리초 값을 미리 사용하고,
+  시계가 뒤로 가면 마지막으로 사용한 시각을 계속 사용해 순서를 유지합니다.
+
+스노플레이크 이전에 저장된 메시지는 작은 자동 증가 ID를 가지므로 항상 새
+ID보다 작습니다. (``is_snowflake`` 로 구분)
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from .store import get_store
+
+logger = logging.getLogger(__name__)
+
+EPOCH_MS = 946684800000  # 2000-01-01T00:00:00Z
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+LOW_BITS = NODE_BITS + SEQUENCE_BITS
+MAX_NODE = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+NODE_LEASE_PREFIX = "snowflake_node_"
+NODE_LEASE_TTL = getattr(settings, "SNOWFLAKE_NODE_LEASE_TTL", 60)  # 초
+NODE_LEASE_RETRY = 1  # 연장에 실패했을 때 다시 시도할 간격 (초)
+
+
+def compose(timestamp_ms, low):
+    """타임스탬프(밀리초)와 하위 22비트(노드 ID + 순번)로 ID를 만듭니다."""
+    return ((timestamp_ms - EPOCH_MS) << LOW_BITS) | (low & ((1 << LOW_BITS) - 1))
+
+
+def timestamp_ms(snowflake_id):
+    return (snowflake_id >> LOW_BITS) + EPOCH_MS
+
+
+def to_datetime(snowflake_id):
+    """ID가 만들어진 시각 (UTC, 밀리초 단위)"""
+    return datetime.fromtimestamp(timestamp_ms(snowflake_id) / 1000, timezone.utc)
+
+
+def from_datetime(value, low=0):
+    """``value`` 시각의 ID (커서 경계나 과거 메시지 적재용)"""
+    return compose(int(value.timestamp() * 1000), low)
+
+
+def historical_id(value, low=0):
+    """과거 메시지 적재용 ID (``from_datetime`` 과 같되 ``EPOCH`` 이후 시각만 허용)
+
+    ``EPOCH`` 이전 시각은 시간순을 지키는 양수 ID를 만들 수 없으므로
+    ValueError를 발생시킵니다.
+    """
+    ms = int(value.timestamp() * 1000)
+    if ms <= EPOCH_MS:
+        raise ValueError(f"메시지 ID 기준 시각(2000-01-01) 이전 시각입니다: {value}")
+    return compose(ms, low)
+
+
+def is_snowflake(message_id):
+    """스노플레이크 ID인지 (이전의 자동 증가 ID가 아닌지) 여부"""
+    return message_id >= 1 << LOW_BITS
+
+
+class Generator:
+    """프로세스(노드)별 ID 생성기 (스레드 안전)"""
+
+    def __init__(self, node_id):
+        if not 0 <= node_id <= MAX_NODE:
+            raise ValueError(f"노드 ID는 0~{MAX_NODE} 사이여야 합니다.")
+        self.node_id = node_id
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next_id(self):
+        with self._lock:
+            now = max(time.time_ns() // 1_000_000, self._last_ms)
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    now += 1  # 이번 밀리초의 순번을 다 썼으면 다음 밀리초를 사용
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return compose(now, (self.node_id << SEQUENCE_BITS) | self._sequence)
+
+
+class NodeLease:
+    """``CHAT_STORE`` 에서 임대한 노드 ID
+
+    ``snowflake_node_<n>`` 키를 ``ttl`` 초 동안 점유하고, 절반이 지나면
+    ``refresh()`` 에서 연장합니다. 그 사이 만료되어 다른 프로세스가 가져갔으면
+    (오래 유휴 상태였던 경우) 새 번호를 임대합니다.
+
+    ``start()`` 하면 백그라운드 스레드가 만료 전에 ``refresh()`` 를 호출합니다.
+    연장하지 못한 채 만료 시각이 지나면 ``valid()`` 가 False가 되어, 만료된
+    번호로 ID를 만드는 일은 없습니다.
+    """
+
+    def __init__(self, store, ttl=NODE_LEASE_TTL):
+        self.store = store
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self._stopped = threading.Event()
+        self.acquire()
+
+    def acquire(self):
+        started = time.monotonic()
+        node_id = self.store.lease(
+            NODE_LEASE_PREFIX, MAX_NODE + 1, self.owner, self.ttl
+        )
+        if node_id is None:
+            raise RuntimeError("임대할 수 있는 메시지 ID 노드 번호가 없습니다.")
+        self.node_id = node_id
+        self.renew_at = started + self.ttl / 2
+        self.expires_at = started + self.ttl
+
+    def refresh(self):
+        """연장할 때가 되었으면 연장하고, 노드 ID가 바뀌었으면 True를 반환합니다."""
+        started = time.monotonic()
+        if started < self.renew_at:
+            return False
+        key = f"{NODE_LEASE_PREFIX}{self.node_id}"
+        if self.store.renew_lease(key, self.owner, self.ttl):
+            self.renew_at = started + self.ttl / 2
+            self.expires_at = started + self.ttl
+            return False
+        self.acquire()
+        return True
+
+    def valid(self):
+        """임대가 아직 만료되지 않았는지 (저장소를 호출하지 않음)"""
+        return time.monotonic() < self.expires_at
+
+    def start(self, on_change):
+        """백그라운드에서 임대를 연장하고, 노드 ID가 바뀌면 ``on_change(node_id)``"""
+        threading.Thread(
+            target=self._run, args=(on_change,), name="snowflake-lease", daemon=True
+        ).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self, on_change):
+        delay = 0
+        while not self._stopped.wait(delay):
+            try:
+                if self.refresh():
+                    on_change(self.node_id)
+                delay = max(self.renew_at - time.monotonic(), 0)
+            except Exception as e:
+                logger.exception("메시지 ID 노드 번호 임대 연장 오류: %s", e)
+                delay = NODE_LEASE_RETRY
+
+
+_generator = None
+_lease = None
+_generator_lock = threading.Lock()
+
+
+def _change_node(node_id):
+    global _generator
+    with _generator_lock:
+        _generator = Generator(node_id)
+
+
+def get_generator():
+    """이 프로세스의 ID 생성기
+
+    처음 호출할 때(fork 된 워커 프로세스에서는 다시) 노드 번호를 임대하므로,
+    서버는 시작할 때 미리 호출해 둡니다. (``chat.asgi``)
+    """
+    global _generator, _lease
+    with _generator_lock:
+        if _generator is None or _generator.pid != os.getpid():
+            # fork 된 워커 프로세스에서는 노드 ID를 다시 정함
+            node_id = getattr(settings, "SNOWFLAKE_NODE_ID", None)
+            _lease = None
+            if node_id is None:
+                _lease = NodeLease(get_store())
+                _lease.start(_change_node)
+                node_id = _lease.node_id
+            _generator = Generator(node_id)
+        elif _lease is not None and not _lease.valid():
+            raise RuntimeError("메시지 ID 노드 번호 임대가 만료되었습니다.")
+        return _generator
+
+
+def next_id():
+    """새 메시지 ID (``Message.id`` 기본값)"""
+    return get_generator().next_id()
@@ -0,0 +1,687 @@
+"""온라인 상태/메시지 큐 비동기 저장소
+
+컨슈머의 온라인 상태 집합(``online_users_<room_id>``, ``global_online_users``),
+DB 저장 대기 메시지 큐(``message_queue_<room_id>``)와 저장 중인 메시지 배치
+(``message_inflight_<room_id>``, 배치 토큰 -> 옮긴 시각과 항목), 참여자 목록 캐시의 버전
+카운터(``roster_version_<room_id>``), 조건부 GET(ETag)용 버전 카운터
+(``rooms_version``, ``presence_version_<room_id>``,
+``messages_version_<room_id>``), 클라이언트 메시지 ID 중복 확인 키
+(``client_msg_<sender_id>_<client_msg_id>``), 사용자별/채팅방별 연결 수
+(``connections_<user_id>``, ``connections_<user_id>_<room_id>``), 메시지 ID
+노드 번호 임대(``snowflake_node_<n>``)를 다룹니다.
+
+``RedisStore`` 는 ``redis.asyncio`` 클라이언트로 이벤트 루프에서 바로 Redis에
+접근하므로 ``sync_to_async(cache.get/set)`` 처럼 스레드를 오가지 않습니다.
+온라인 상태는 Redis 집합(SADD/SREM), 메시지 큐는 리스트(RPUSH/LPOP)로 저장해
+읽고-수정하고-쓰는 과정 없이 원자적으로 갱신됩니다.
+
+``MemoryStore`` 는 같은 인터페이스의 프로세스 내 구현으로, 테스트나 단일
+프로세스 개발 서버에서 사용합니다. 사용할 저장소는 ``CHAT_STORE_URL``
+(``redis://...`` 또는 ``memory://``)로 지정합니다.
+"""
+
+import json
+import time
+import uuid
+import weakref
+import asyncio
+
+from django.conf import settings
+
+CHAT_STORE_URL = getattr(settings, "CHAT_STORE_URL", "memory://")
+
+
+def _now_ms():
+    return time.time_ns() // 1_000_000
+
+
+def online_key(room_id):
+    return f"online_users_{room_id}"
+
+
+def queue_key(room_id):
+    return f"message_queue_{room_id}"
+
+
+def inflight_key(room_id):
+    return f"message_inflight_{room_id}"
+
+
+def roster_version_key(room_id):
+    return f"roster_version_{room_id}"
+
+
+def presence_version_key(room_id):
+    return f"presence_version_{room_id}"
+
+
+def messages_version_key(room_id):
+    return f"messages_version_{room_id}"
+
+
+def client_msg_key(sender_id, client_msg_id):
+    return f"client_msg_{sender_id}_{client_msg_id}"
+
+
+def connection_count_key(user_id, room_id=None):
+    if room_id is None:
+        return f"connections_{user_id}"
+    return f"connections_{user_id}_{room_id}"
+
+
+GLOBAL_ONLINE_KEY = "global_online_users"
+ROOMS_VERSION_KEY = "rooms_version"  # 채팅방 목록 버전
+
+# 카운터를 1 줄이고, 0 이하가 되면 삭제해 0을 반환 (원자적으로 처리)
+DECR_TO_ZERO_SCRIPT = """
+local values = {}
+for i, key in ipairs(KEYS) do
+    local value = redis.call("DECR", key)
+    if value <= 0 then
+        redis.call("DEL", key)
+        value = 0
+    else
+        redis.call("EXPIRE", key, ARGV[1])
+    end
+    values[i] = value
+end
+return values
+"""
+
+# 비어 있는 슬롯 하나를 만료 시간과 함께 점유해 번호를 반환 (모두 사용 중이면 -1)
+# KEYS[1]: 시작 위치 카운터, ARGV: 슬롯 수, 소유자, TTL, 슬롯 키 접두어
+LEASE_SCRIPT = """
+local start = redis.call("INCR", KEYS[1])
+local slots = tonumber(ARGV[1])
+for i = 0, slots - 1 do
+    local slot = (start + i) % slots
+    if redis.call("SET", ARGV[4] .. slot, ARGV[2], "NX", "EX", ARGV[3]) then
+        return slot
+    end
+end
+return -1
+"""
+
+# 큐 앞쪽에서 최대 ARGV[1]개를 꺼내 저장 중 해시(KEYS[2])에 배치로 기록
+# (필드: 배치 토큰, 값: "옮긴 시각(밀리초)\n항목\n항목...")
+BEGIN_BATCH_SCRIPT = r"""
+local items = redis.call("LRANGE", KEYS[1], 0, ARGV[1] - 1)
+if #items > 0 then
+    redis.call("LTRIM", KEYS[1], #items, -1)
+    redis.call("HSET", KEYS[2], ARGV[2], ARGV[3] .. "\n" .. table.concat(items, "\n"))
+    redis.call("EXPIRE", KEYS[2], ARGV[4])
+end
+return items
+"""
+
+# 저장 중 배치를 큐 앞쪽에 되돌림. ARGV[1]이 있으면 그 배치만, 없으면 ARGV[2]
+# (밀리초) 이전에 옮긴 배치를 오래된 배치가 앞에 오도록 되돌림
+REQUEUE_SCRIPT = r"""
+local batches = {}
+if ARGV[1] ~= "" then
+    local value = redis.call("HGET", KEYS[1], ARGV[1])
+    if value then
+        batches[1] = {ARGV[1], value}
+    end
+else
+    local all = redis.call("HGETALL", KEYS[1])
+    for i = 1, #all, 2 do
+        local at = tonumber(string.match(all[i + 1], "^%d+"))
+        if at <= tonumber(ARGV[2]) then
+            batches[#batches + 1] = {all[i], all[i + 1], at}
+        end
+    end
+    table.sort(batches, function(a, b) return a[3] > b[3] end)
+end
+local count = 0
+for _, batch in ipairs(batches) do
+    local lines = {}
+    for line in string.gmatch(batch[2], "[^\n]+") do
+        lines[#lines + 1] = line
+    end
+    for i = #lines, 2, -1 do
+        redis.call("LPUSH", KEYS[2], lines[i])
+        count = count + 1
+    end
+    redis.call("HDEL", KEYS[1], batch[1])
+end
+if count > 0 then
+    redis.call("EXPIRE", KEYS[2], ARGV[3])
+end
+return count
+"""
+
+# 소유자가 같을 때만 만료 시간을 연장
+RENEW_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class MemoryStore:
+    """프로세스 내 저장소 (테스트/개발용)"""
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+
+    def _peek(self, key):
+        """만료되지 않은 값 (없으면 None)"""
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return self._data.get(key)
+
+    def _get(self, key, default_factory):
+        value = self._peek(key)
+        if value is None:
+            value = self._data[key] = default_factory()
+        return value
+
+    def _touch(self, key, ttl):
+        if ttl:
+            self._expires[key] = time.monotonic() + ttl
+
+    async def sadd(self, key, *members, ttl=None):
+        """멤버를 추가하고 새로 추가된 수를 반환합니다."""
+        items = self._get(key, set)
+        added = len(set(members) - items)
+        items.update(members)
+        self._touch(key, ttl)
+        return added
+
+    async def srem(self, key, *members, ttl=None):
+        """멤버를 제거하고 실제로 제거된 수를 반환합니다."""
+        items = self._get(key, set)
+        removed = len(items & set(members))
+        items.difference_update(members)
+        self._touch(key, ttl)
+        return removed
+
+    async def smembers(self, key):
+        return set(self._get(key, set))
+
+    async def smembers_many(self, keys):
+        return [set(self._get(key, set)) for key in keys]
+
+    async def smismember(self, key, members):
+        """``members`` 중 집합에 있는 것만 순서대로 반환합니다."""
+        return self.present_members(key, members)
+
+    async def rpush(self, key, *values, ttl=None):
+        items = self._get(key, list)
+        items.extend(values)
+        self._touch(key, ttl)
+        return len(items)
+
+    async def lpush_front(self, key, values):
+        """``values`` 를 순서를 유지한 채 리스트 앞쪽에 되돌려 놓습니다."""
+        items = self._get(key, list)
+        items[:0] = values
+
+    async def lpop(self, key, count):
+        items = self._get(key, list)
+        popped = items[:count]
+        del items[:count]
+        return popped
+
+    async def ltail(self, key, count):
+        """리스트의 마지막 ``count`` 개 (꺼내지 않음)"""
+        return list(self._get(key, list)[-count:])
+
+    async def begin_batch(self, key, inflight, count, ttl):
+        """큐 앞쪽에서 최대 ``count`` 개를 꺼내 저장 중 배치로 옮깁니다.
+
+        (배치 토큰, 항목 목록)을 반환합니다. 저장이 끝나면 ``finish_batch``,
+        실패하면 ``requeue_batch`` 를 호출해야 합니다.
+        """
+        token = uuid.uuid4().hex
+        entries = await self.lpop(key, count)
+        if entries:
+            self._get(inflight, dict)[token] = (_now_ms(), entries)
+            self._touch(inflight, ttl)
+        return token, entries
+
+    async def finish_batch(self, inflight, token):
+        """저장이 끝난 배치를 저장 중 목록에서 지웁니다."""
+        self._get(inflight, dict).pop(token, None)
+
+    async def requeue_batch(self, inflight, key, token, ttl):
+        """배치가 아직 저장 중 목록에 있으면 큐 앞쪽에 되돌리고 항목 수를 반환합니다."""
+        batch = self._get(inflight, dict).pop(token, None)
+        if batch is None:
+            return 0
+        await self.lpush_front(key, batch[1])
+        self._touch(key, ttl)
+        return len(batch[1])
+
+    async def requeue_stale(self, inflight, key, older_than, ttl):
+        """``older_than`` 초보다 오래 저장 중인 배치를 큐 앞쪽에 되돌립니다.
+
+        배치를 옮긴 워커가 저장 전에 죽은 경우를 복구합니다. 되돌린 항목 수를
+        반환합니다.
+        """
+        batches = self._get(inflight, dict)
+        cutoff = _now_ms() - older_than * 1000
+        stale = sorted(
+            (batch for batch in batches.items() if batch[1][0] <= cutoff),
+            key=lambda batch: batch[1][0],
+        )
+        entries = []
+        for token, (_, batch) in stale:
+            del batches[token]
+            entries.extend(batch)
+        if entries:
+            await self.lpush_front(key, entries)
+            self._touch(key, ttl)
+        return len(entries)
+
+    async def pending_entries(self, key, inflight, count):
+        """저장 중 배치와 큐의 마지막 ``count`` 개 항목 (같은 시점 기준)"""
+        entries = [
+            entry for _, batch in self._get(inflight, dict).values() for entry in batch
+        ]
+        return entries + list(self._get(key, list)[-count:])
+
+    async def llen_many(self, keys):
+        return [len(self._get(key, list)) for key in keys]
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    async def incr_many(self, keys, ttl):
+        """카운터들을 1씩 늘리고 새 값 목록을 반환합니다."""
+        values = []
+        for key in keys:
+            self._data[key] = (self._peek(key) or 0) + 1
+            self._touch(key, ttl)
+            values.append(self._data[key])
+        return values
+
+    async def decr_many(self, keys, ttl):
+        """카운터들을 1씩 줄이고 새 값 목록을 반환합니다. (0이 되면 삭제)"""
+        values = []
+        for key in keys:
+            value = (self._peek(key) or 0) - 1
+            if value <= 0:
+                await self.delete(key)
+                value = 0
+            else:
+                self._data[key] = value
+                self._touch(key, ttl)
+            values.append(value)
+        return values
+
+    async def count_many(self, keys):
+        """카운터들의 현재 값 목록 (없거나 만료되었으면 0)"""
+        return [self._peek(key) or 0 for key in keys]
+
+    async def expire_many(self, keys, ttl):
+        """있는 키들의 만료 시간을 갱신합니다."""
+        for key in keys:
+            if self._peek(key) is not None:
+                self._touch(key, ttl)
+
+    async def version_and_members(self, version_key, members_key):
+        """버전 카운터와 집합을 함께 읽습니다."""
+        version = self._get(version_key, time.time_ns)
+        return version, set(self._get(members_key, set))
+
+    async def version_and_count(self, version_key, members_key):
+        """버전 카운터와 집합 크기를 함께 읽습니다."""
+        version = self._get(version_key, time.time_ns)
+        return version, len(self._get(members_key, set))
+
+    def bump_version(self, key):
+        """버전 카운터를 증가시킵니다. (동기 뷰에서 호출)"""
+        self._data[key] = self._get(key, time.time_ns) + 1
+
+    async def bump_versions(self, keys):
+        """여러 버전 카운터를 증가시킵니다."""
+        for key in keys:
+            self.bump_version(key)
+
+    def versions(self, keys):
+        """버전 카운터 값 목록 (동기 뷰에서 호출)"""
+        return [self._get(key, time.time_ns) for key in keys]
+
+    def scan_members(self, key, cursor, count):
+        """집합을 ``count`` 개 정도씩 나누어 읽습니다. (SSCAN, 동기 뷰에서 호출)
+
+        다음 커서와 멤버 목록을 반환하며, 다음 커서가 0이면 끝입니다.
+        """
+        members = sorted(self._get(key, set))
+        page = members[cursor : cursor + count]
+        next_cursor = cursor + count if cursor + count < len(members) else 0
+        return next_cursor, page
+
+    def count_members(self, key):
+        """집합 크기 (동기 뷰에서 호출)"""
+        return len(self._get(key, set))
+
+    def present_members(self, key, members):
+        """``members`` 중 집합에 있는 것만 순서대로 반환합니다. (동기 뷰에서 호출)"""
+        existing = self._get(key, set)
+        return [member for member in members if member in existing]
+
+    async def claim(self, key, value, ttl):
+        """키가 없으면 ``value`` 로 만들고 None을, 있으면 현재 값을 반환합니다."""
+        current = self._peek(key)
+        if current is None:
+            self._data[key] = value
+            self._touch(key, ttl)
+        return current
+
+    def lease(self, prefix, slots, owner, ttl):
+        """``<prefix>0`` ~ ``<prefix><slots - 1>`` 중 빈 슬롯 하나를 ``ttl`` 초 동안
+        점유하고 번호를 반환합니다. (모두 사용 중이면 None, 동기 코드에서 호출)
+        """
+        start = self._data[f"{prefix}next"] = self._data.get(f"{prefix}next", 0) + 1
+        for i in range(slots):
+            slot = (start + i) % slots
+            if self._peek(f"{prefix}{slot}") is None:
+                self._data[f"{prefix}{slot}"] = owner
+                self._touch(f"{prefix}{slot}", ttl)
+                return slot
+        return None
+
+    def renew_lease(self, key, owner, ttl):
+        """아직 ``owner`` 가 점유 중이면 만료 시간을 연장하고 True를 반환합니다."""
+        if self._peek(key) != owner:
+            return False
+        self._touch(key, ttl)
+        return True
+
+    async def flush(self):
+        self._data.clear()
+        self._expires.clear()
+
+
+class RedisStore:
+    """``redis.asyncio`` 기반 저장소
+
+    redis-py의 비동기 연결 풀은 생성된 이벤트 루프에 묶이므로 루프마다
+    클라이언트를 따로 만듭니다. (운영 환경에서는 워커당 루프가 하나입니다.)
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self._clients = weakref.WeakKeyDictionary()
+        self._sync_client = None
+
+    @property
+    def sync_client(self):
+        """뷰 등 동기 코드용 클라이언트 (스레드 안전한 연결 풀 사용)"""
+        if self._sync_client is None:
+            import redis
+
+            self._sync_client = redis.Redis.from_url(self.url)
+        return self._sync_client
+
+    @property
+    def client(self):
+        import redis.asyncio as redis
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = redis.Redis.from_url(self.url)
+        return client
+
+    async def sadd(self, key, *members, ttl=None):
+        """멤버를 추가하고 새로 추가된 수를 반환합니다."""
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.sadd(key, *members)
+            if ttl:
+                pipe.expire(key, ttl)
+            added, *_ = await pipe.execute()
+        return added
+
+    async def srem(self, key, *members, ttl=None):
+        """멤버를 제거하고 실제로 제거된 수를 반환합니다."""
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.srem(key, *members)
+            if ttl:
+                pipe.expire(key, ttl)
+            removed, *_ = await pipe.execute()
+        return removed
+
+    async def smembers(self, key):
+        return {int(member) for member in await self.client.smembers(key)}
+
+    async def smembers_many(self, keys):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.smembers(key)
+            results = await pipe.execute()
+        return [{int(member) for member in members} for members in results]
+
+    async def smismember(self, key, members):
+        """``members`` 중 집합에 있는 것만 순서대로 반환합니다."""
+        if not members:
+            return []
+        flags = await self.client.smismember(key, members)
+        return [member for member, flag in zip(members, flags) if flag]
+
+    async def rpush(self, key, *values, ttl=None):
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.rpush(key, *(json.dumps(value) for value in values))
+            if ttl:
+                pipe.expire(key, ttl)
+            length, *_ = await pipe.execute()
+        return length
+
+    async def lpush_front(self, key, values):
+        """``values`` 를 순서를 유지한 채 리스트 앞쪽에 되돌려 놓습니다."""
+        if values:
+            await self.client.lpush(
+                key, *(json.dumps(value) for value in reversed(values))
+            )
+
+    async def lpop(self, key, count):
+        items = await self.client.lpop(key, count)
+        return [json.loads(item) for item in items or ()]
+
+    async def ltail(self, key, count):
+        """리스트의 마지막 ``count`` 개 (꺼내지 않음)"""
+        items = await self.client.lrange(key, -count, -1)
+        return [json.loads(item) for item in items]
+
+    async def begin_batch(self, key, inflight, count, ttl):
+        """큐 앞쪽에서 최대 ``count`` 개를 꺼내 저장 중 배치로 옮깁니다.
+
+        꺼내기와 옮기기는 하나의 스크립트로 원자적으로 실행됩니다. (배치 토큰,
+        항목 목록)을 반환합니다.
+        """
+        token = uuid.uuid4().hex
+        items = await self.client.eval(
+            BEGIN_BATCH_SCRIPT, 2, key, inflight, count, token, _now_ms(), ttl
+        )
+        return token, [json.loads(item) for item in items]
+
+    async def finish_batch(self, inflight, token):
+        """저장이 끝난 배치를 저장 중 목록에서 지웁니다."""
+        await self.client.hdel(inflight, token)
+
+    async def requeue_batch(self, inflight, key, token, ttl):
+        """배치가 아직 저장 중 목록에 있으면 큐 앞쪽에 되돌리고 항목 수를 반환합니다."""
+        return await self.client.eval(REQUEUE_SCRIPT, 2, inflight, key, token, 0, ttl)
+
+    async def requeue_stale(self, inflight, key, older_than, ttl):
+        """``older_than`` 초보다 오래 저장 중인 배치를 큐 앞쪽에 되돌립니다.
+
+        배치를 옮긴 워커가 저장 전에 죽은 경우를 복구합니다. 되돌린 항목 수를
+        반환합니다.
+        """
+        cutoff = _now_ms() - int(older_than * 1000)
+        return await self.client.eval(REQUEUE_SCRIPT, 2, inflight, key, "", cutoff, ttl)
+
+    async def pending_entries(self, key, inflight, count):
+        """저장 중 배치와 큐의 마지막 ``count`` 개 항목 (MULTI로 같은 시점 기준)"""
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hvals(inflight)
+            pipe.lrange(key, -count, -1)
+            batches, items = await pipe.execute()
+        entries = [
+            json.loads(line)
+            for batch in batches
+            for line in batch.decode().split("\n")[1:]
+        ]
+        return entries + [json.loads(item) for item in items]
+
+    async def llen_many(self, keys):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.llen(key)
+            return await pipe.execute()
+
+    async def delete(self, *keys):
+        if keys:
+            await self.client.delete(*keys)
+
+    async def incr_many(self, keys, ttl):
+        """카운터들을 1씩 늘리고(INCR) 새 값 목록을 반환합니다."""
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.incr(key)
+                pipe.expire(key, ttl)
+            results = await pipe.execute()
+        return results[::2]
+
+    async def decr_many(self, keys, ttl):
+        """카운터들을 1씩 줄이고(DECR) 새 값 목록을 반환합니다.
+
+        0 이하가 되면 같은 스크립트 안에서 키를 지우므로, 만료 후 감소로
+        음수가 남거나 동시에 늘어난 값을 지우는 일이 없습니다.
+        """
+        if not keys:
+            return []
+        return await self.client.eval(DECR_TO_ZERO_SCRIPT, len(keys), *keys, ttl)
+
+    async def count_many(self, keys):
+        """카운터들의 현재 값 목록 (없거나 만료되었으면 0)"""
+        if not keys:
+            return []
+        return [int(value or 0) for value in await self.client.mget(keys)]
+
+    async def expire_many(self, keys, ttl):
+        """있는 키들의 만료 시간을 갱신합니다."""
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def version_and_members(self, version_key, members_key):
+        """버전 카운터와 집합을 한 번의 왕복으로 읽습니다.
+
+        카운터가 없으면(만료/Redis 재시작) 현재 시각(ns)으로 초기화해, 이전에
+        쓰던 작은 버전 값과 다시 겹치지 않게 합니다.
+        """
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(version_key, time.time_ns(), nx=True)
+            pipe.get(version_key)
+            pipe.smembers(members_key)
+            _, version, members = await pipe.execute()
+        return int(version), {int(member) for member in members}
+
+    async def version_and_count(self, version_key, members_key):
+        """버전 카운터와 집합 크기(SCARD)를 한 번의 왕복으로 읽습니다."""
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(version_key, time.time_ns(), nx=True)
+            pipe.get(version_key)
+            pipe.scard(members_key)
+            _, version, count = await pipe.execute()
+        return int(version), count
+
+    def bump_version(self, key):
+        """버전 카운터를 증가시킵니다. (동기 뷰에서 호출)"""
+        with self.sync_client.pipeline(transaction=False) as pipe:
+            pipe.set(key, time.time_ns(), nx=True)
+            pipe.incr(key)
+            pipe.execute()
+
+    async def bump_versions(self, keys):
+        """여러 버전 카운터를 한 번의 왕복으로 증가시킵니다."""
+        if not keys:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, time.time_ns(), nx=True)
+                pipe.incr(key)
+            await pipe.execute()
+
+    def versions(self, keys):
+        """버전 카운터 값 목록 (한 번의 왕복, 동기 뷰에서 호출)
+
+        없는 카운터는 현재 시각(나노초)으로 만들므로, 저장소가 비워져도 이전에
+        읽은 값이 다시 나오지 않습니다.
+        """
+        with self.sync_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, time.time_ns(), nx=True)
+            pipe.mget(keys)
+            *_, values = pipe.execute()
+        return [int(value) for value in values]
+
+    def scan_members(self, key, cursor, count):
+        """집합을 ``count`` 개 정도씩 나누어 읽습니다. (SSCAN, 동기 뷰에서 호출)
+
+        집합 크기와 관계없이 페이지당 O(count)이며, 다음 커서가 0이면
+        끝입니다. 읽는 도중 집합이 바뀌면 멤버가 중복될 수 있습니다.
+        """
+        cursor, members = self.sync_client.sscan(key, cursor, count=count)
+        return cursor, [int(member) for member in members]
+
+    def count_members(self, key):
+        """집합 크기 (SCARD, 동기 뷰에서 호출)"""
+        return self.sync_client.scard(key)
+
+    def present_members(self, key, members):
+        """``members`` 중 집합에 있는 것만 순서대로 반환합니다. (SMISMEMBER)"""
+        if not members:
+            return []
+        flags = self.sync_client.smismember(key, members)
+        return [member for member, flag in zip(members, flags) if flag]
+
+    async def claim(self, key, value, ttl):
+        """키가 없으면 ``value`` 로 만들고 None을, 있으면 현재 값을 반환합니다."""
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(key, value, nx=True, ex=ttl)
+            pipe.get(key)
+            created, current = await pipe.execute()
+        return None if created else current.decode()
+
+    def lease(self, prefix, slots, owner, ttl):
+        """``<prefix>0`` ~ ``<prefix><slots - 1>`` 중 빈 슬롯 하나를 ``ttl`` 초 동안
+        점유하고 번호를 반환합니다. (모두 사용 중이면 None, 한 번의 왕복)
+        """
+        slot = self.sync_client.eval(
+            LEASE_SCRIPT, 1, f"{prefix}next", slots, owner, ttl, prefix
+        )
+        return None if slot < 0 else slot
+
+    def renew_lease(self, key, owner, ttl):
+        """아직 ``owner`` 가 점유 중이면 만료 시간을 연장하고 True를 반환합니다."""
+        return bool(self.sync_client.eval(RENEW_LEASE_SCRIPT, 1, key, owner, ttl))
+
+    async def flush(self):
+        await self.client.flushdb()
+
+
+_store = None
+
+
+def get_store():
+    """설정된 저장소 인스턴스 (프로세스당 하나)"""
+    global _store
+    if _store is None:
+        if CHAT_STORE_URL.startswith("memory://"):
+            _store = MemoryStore()
+        else:
+            _store = RedisStore(CHAT_STORE_URL)
+    return _store
@@ -0,0 +1,8 @@
+"""컨슈머/뷰 핫 패스 마이크로벤치마크
+
+``python -m chat.tests.benchmarks`` 로 실행합니다. 테스트 설정
+(SQLite, In-Memory 채널 레이어, 로컬 메모리 캐시)을 사용하며 결과를 JSON으로
+출력하고 저장된 기준값(baseline.json)과 비교해 성능 저하를 표시합니다.
+
+벤치마크 모듈 이름은 ``bench_*.py`` 이므로 테스트 러너가 수집하지 않습니다.
+"""
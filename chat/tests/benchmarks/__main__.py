@@ -0,0 +1,79 @@
+"""벤치마크 실행기
+
+사용법::
+
+    python -m chat.tests.benchmarks                   # 실행 후 기준값과 비교
+    python -m chat.tests.benchmarks --only consumer   # 이름 접두어로 선택
+    python -m chat.tests.benchmarks --save-baseline   # 결과를 기준값으로 저장
+    python -m chat.tests.benchmarks --output out.json # 결과 JSON 저장
+
+기준값보다 ``--threshold`` (기본 25%) 이상 느려진 항목이 있으면 종료 코드 1을
+반환합니다.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m chat.tests.benchmarks")
+    parser.add_argument("--only", nargs="*", help="실행할 벤치마크 이름 접두어")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--output", help="결과 JSON 파일 경로 (기본: 표준 출력)")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chat.settings_test")
+    import django
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from . import (  # noqa: F401 (벤치마크 등록)
+        bench_consumers,
+        bench_serializers,
+        bench_views,
+    )
+    from .context import BenchContext
+    from .runner import compare, load, run_all, save
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        results = run_all(BenchContext(), names=args.only, rounds=args.rounds)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    regressions = []
+    baseline = load(args.baseline)
+    if args.save_baseline:
+        save(args.baseline, results)
+    elif baseline:
+        regressions = compare(results, baseline, args.threshold)
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            fp.write(output + "\n")
+    else:
+        print(output)
+
+    for name, base, current, ratio in regressions:
+        print(
+            f"성능 저하: {name} {base:.1f}us -> {current:.1f}us ({ratio - 1:+.0%})",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""컨슈머 및 WebSocket 인증 미들웨어 벤치마크"""
+
+import json
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chat import snowflake
+from chat.consumers import ChatConsumer, OnlineStatusConsumer
+from chat.jwt_middleware import JWTAuthMiddleware
+from chat.store import get_store, queue_key
+
+from .runner import benchmark
+
+QUEUE_RESET_EVERY = 100  # 워커가 비우는 주기를 흉내 내기 위한 큐 초기화 간격
+
+
+def _queue_resetter(consumer):
+    key = queue_key(consumer.room_id)
+    calls = 0
+
+    async def maybe_reset():
+        nonlocal calls
+        calls += 1
+        if calls % QUEUE_RESET_EVERY == 0:
+            await get_store().delete(key)
+
+    return maybe_reset
+
+
+@benchmark("consumer.receive.message")
+async def receive_message(ctx):
+    consumer = await ctx.make_consumer(ChatConsumer)
+    maybe_reset = _queue_resetter(consumer)
+    payload = json.dumps({"message": "벤치마크 메시지입니다"})
+
+    async def operation():
+        await consumer.receive(text_data=payload)
+        await maybe_reset()
+
+    return operation
+
+
+@benchmark("consumer.receive.heartbeat")
+async def receive_heartbeat(ctx):
+    consumer = await ctx.make_consumer(ChatConsumer)
+    payload = json.dumps({"type": "heartbeat"})
+
+    async def operation():
+        await consumer.receive(text_data=payload)
+
+    return operation
+
+
+@benchmark("consumer.add_message_to_queue")
+async def add_message_to_queue(ctx):
+    consumer = await ctx.make_consumer(ChatConsumer)
+    maybe_reset = _queue_resetter(consumer)
+
+    async def operation():
+        await consumer.add_message_to_queue("벤치마크 메시지입니다")
+        await maybe_reset()
+
+    return operation
+
+
+@benchmark("consumer.message_worker.flush", number=20)
+async def message_worker_flush(ctx):
+    """큐에 100개를 채운 뒤 한 번 flush (채우는 비용 포함)"""
+    consumer = await ctx.make_consumer(ChatConsumer)
+    key = queue_key(consumer.room_id)
+
+    async def operation():
+        pending = [
+            {"id": snowflake.next_id(), "sender": ctx.user.id, "content": f"queued {i}"}
+            for i in range(100)
+        ]
+        await get_store().rpush(key, *pending)
+        await consumer.flush_message_queue()
+
+    return operation
+
+
+@benchmark("consumer.get_room_users_status")
+async def get_room_users_status(ctx):
+    consumer = await ctx.make_consumer(ChatConsumer)
+    return consumer.get_room_users_status
+
+
+@benchmark("online.update_global_status", number=100)
+async def update_global_status(ctx):
+    consumer = await ctx.make_consumer(OnlineStatusConsumer)
+
+    async def operation():
+        await consumer.update_global_status(True)
+
+    return operation
+
+
+@benchmark("jwt_middleware.call")
+def jwt_middleware_call(ctx):
+    async def inner(scope, receive, send):
+        return scope["user"]
+
+    middleware = JWTAuthMiddleware(inner)
+    token = str(AccessToken.for_user(ctx.user))
+    query_string = f"token={token}".encode()
+
+    async def operation():
+        await middleware(
+            {"type": "websocket", "query_string": query_string}, None, None
+        )
+
+    return operation
@@ -0,0 +1,77 @@
+"""읽기 응답 직렬화 벤치마크: DRF 시리얼라이저 경로와 ``chat.rows`` 경로
+
+같은 행을 조회해 JSON 바이트로 렌더링하기까지를 측정하며, 결과의
+``rows_per_sec`` 로 두 경로를 비교합니다.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+from chat import rows
+from chat.models import ChatRoom, ChatRoomMember, Message
+from chat.serializers import (
+    ChatRoomMemberSerializer,
+    ChatRoomSerializer,
+    MessageSerializer,
+)
+
+from .runner import benchmark
+
+
+def _drf(queryset, serializer_class):
+    renderer = JSONRenderer()
+    count = queryset.count()
+
+    def operation():
+        renderer.render(serializer_class(list(queryset), many=True).data)
+
+    operation.rows = count
+    return operation
+
+
+def _rows(queryset, mapper):
+    renderer = rows.RowJSONRenderer()
+    count = queryset.count()
+
+    def operation():
+        renderer.render(mapper.map(mapper.rows(queryset)))
+
+    operation.rows = count
+    return operation
+
+
+def _messages(ctx):
+    return Message.objects.filter(room=ctx.room).order_by("-created_at", "-id")
+
+
+def _members(ctx):
+    return ChatRoomMember.objects.filter(room=ctx.room)
+
+
+@benchmark("serializers.messages.drf", number=20)
+def messages_drf(ctx):
+    return _drf(_messages(ctx).select_related("sender"), MessageSerializer)
+
+
+@benchmark("serializers.messages.rows", number=20)
+def messages_rows(ctx):
+    return _rows(_messages(ctx), rows.MESSAGE)
+
+
+@benchmark("serializers.members.drf", number=50)
+def members_drf(ctx):
+    return _drf(_members(ctx).select_related("user"), ChatRoomMemberSerializer)
+
+
+@benchmark("serializers.members.rows", number=50)
+def members_rows(ctx):
+    return _rows(_members(ctx), rows.MEMBER)
+
+
+@benchmark("serializers.rooms.drf", number=50)
+def rooms_drf(ctx):
+    return _drf(ChatRoom.objects.all(), ChatRoomSerializer)
+
+
+@benchmark("serializers.rooms.rows", number=50)
+def rooms_rows(ctx):
+    return _rows(ChatRoom.objects.all(), rows.ROOM)
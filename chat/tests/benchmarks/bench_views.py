@@ -0,0 +1,33 @@
+"""REST 뷰 벤치마크"""
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from chat.views import ChatRoomViewSet
+
+from .runner import benchmark
+
+factory = APIRequestFactory()
+
+
+def _action(ctx, action):
+    view = ChatRoomViewSet.as_view({"get": action})
+    path = f"/api/rooms/{ctx.room.id}/{action}/"
+
+    def operation():
+        request = factory.get(path)
+        force_authenticate(request, user=ctx.user)
+        response = view(request, pk=ctx.room.id)
+        assert response.status_code == 200, response.data
+        response.render()
+
+    return operation
+
+
+@benchmark("views.rooms.messages", number=50)
+def room_messages(ctx):
+    return _action(ctx, "messages")
+
+
+@benchmark("views.rooms.users", number=50)
+def room_users(ctx):
+    return _action(ctx, "users")
@@ -0,0 +1,71 @@
+"""벤치마크 공용 픽스처"""
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+
+from chat.models import ChatRoom, ChatRoomMember, Message
+from chat.store import get_store
+
+ROOM_MEMBERS = 50
+ROOM_MESSAGES = 200
+EXTRA_ROOMS = 49  # 채팅방 목록 벤치마크용
+
+
+class BenchContext:
+    """채팅방 하나(멤버 50명, 메시지 200개)와 사용자들을 준비합니다.
+
+    채팅방 목록용으로 빈 채팅방 49개를 함께 만듭니다.
+    """
+
+    def __init__(self):
+        cache.clear()
+        async_to_sync(get_store().flush)()
+        self.users = User.objects.bulk_create(
+            [User(username=f"bench_{i}") for i in range(ROOM_MEMBERS)]
+        )
+        self.user = self.users[0]
+        self.room = ChatRoom.objects.create(name="Bench Room", room_type="group")
+        ChatRoom.objects.bulk_create(
+            [ChatRoom(name=f"Bench Room {i}") for i in range(EXTRA_ROOMS)]
+        )
+        ChatRoomMember.objects.bulk_create(
+            [ChatRoomMember(user=user, room=self.room) for user in self.users]
+        )
+        now = timezone.now()
+        Message.objects.bulk_create(
+            [
+                Message(
+                    room=self.room,
+                    sender=self.users[i % ROOM_MEMBERS],
+                    content=f"bench message {i}",
+                    created_at=now,
+                )
+                for i in range(ROOM_MESSAGES)
+            ]
+        )
+        self.channel_layer = get_channel_layer()
+
+    async def make_consumer(self, consumer_class, user=None):
+        """소켓 없이 핸들러를 직접 호출할 수 있도록 컨슈머를 구성합니다."""
+        user = user or self.user
+        consumer = consumer_class()
+        consumer.scope = {
+            "type": "websocket",
+            "user": user,
+            "url_route": {"kwargs": {"room_id": str(self.room.id)}},
+        }
+        consumer.user = user
+        consumer.room_id = str(self.room.id)
+        consumer.room_group_name = f"chat_{self.room.id}"
+        consumer.channel_layer = self.channel_layer
+        consumer.channel_name = await self.channel_layer.new_channel()
+        consumer.sent_frames = 0
+
+        async def send(text_data=None, bytes_data=None, close=False):
+            consumer.sent_frames += 1
+
+        consumer.send = send
+        return consumer
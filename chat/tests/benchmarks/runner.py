@@ -0,0 +1,147 @@
+"""벤치마크 등록/실행/비교 도구"""
+
+import asyncio
+import inspect
+import json
+import platform
+import statistics
+import sys
+import time
+
+BENCHMARKS = {}
+
+
+def benchmark(name, number=200):
+    """벤치마크 등록 데코레이터
+
+    등록 함수는 픽스처(``BenchContext``)를 받아 측정할 연산(동기 함수 또는
+    코루틴 함수)을 반환합니다. ``number`` 는 라운드당 호출 횟수입니다.
+    연산에 ``rows`` 속성(호출당 처리 행 수)이 있으면 ``rows_per_sec`` 도
+    기록합니다.
+    """
+
+    def decorator(func):
+        BENCHMARKS[name] = (func, number)
+        return func
+
+    return decorator
+
+
+def _time_sync(operation, number):
+    started = time.perf_counter_ns()
+    for _ in range(number):
+        operation()
+    return time.perf_counter_ns() - started
+
+
+async def _time_async(operation, number):
+    started = time.perf_counter_ns()
+    for _ in range(number):
+        await operation()
+    return time.perf_counter_ns() - started
+
+
+class ThreadHopCounter:
+    """이벤트 루프에서 스레드 풀로 넘긴 호출(``run_in_executor``) 수를 셉니다.
+
+    ``sync_to_async``, ``database_sync_to_async``, Django 비동기 ORM,
+    ``asyncio.to_thread`` 모두 이 경로를 거칩니다.
+    """
+
+    def __init__(self, loop):
+        self.count = 0
+        original = loop.run_in_executor
+
+        def run_in_executor(executor, func, *args):
+            self.count += 1
+            return original(executor, func, *args)
+
+        loop.run_in_executor = run_in_executor
+
+
+def run_benchmark(loop, operation, number, rounds, warmup=1, hops=None):
+    """라운드별 연산당 소요 시간(마이크로초) 목록을 반환합니다.
+
+    ``hops`` 가 주어지면 측정 라운드 동안의 연산당 스레드 전환 횟수를
+    ``hops.per_op`` 에 기록합니다.
+    """
+    is_async = inspect.iscoroutinefunction(operation)
+    samples = []
+    for index in range(warmup + rounds):
+        if index == warmup and hops is not None:
+            hops.count = 0
+        if is_async:
+            elapsed = loop.run_until_complete(_time_async(operation, number))
+        else:
+            elapsed = _time_sync(operation, number)
+        if index >= warmup:
+            samples.append(elapsed / number / 1000)
+    if hops is not None:
+        hops.per_op = hops.count / (number * rounds)
+    return samples
+
+
+def run_all(context, names=None, rounds=5):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    hops = ThreadHopCounter(loop)
+    results = {}
+    try:
+        for name, (factory, number) in sorted(BENCHMARKS.items()):
+            if names and not any(name.startswith(n) for n in names):
+                continue
+            operation = factory(context)
+            if inspect.iscoroutine(operation):
+                operation = loop.run_until_complete(operation)
+            samples = run_benchmark(loop, operation, number, rounds, hops=hops)
+            median = statistics.median(samples)
+            results[name] = {
+                "median_us": round(median, 3),
+                "min_us": round(min(samples), 3),
+                "ops_per_sec": round(1_000_000 / median, 1) if median else None,
+                "thread_hops_per_op": round(hops.per_op, 3),
+                "number": number,
+                "rounds": rounds,
+            }
+            rows = getattr(operation, "rows", None)
+            if rows and median:
+                results[name]["rows_per_sec"] = round(rows * 1_000_000 / median, 1)
+            results[name].update(getattr(operation, "extra", {}))
+    finally:
+        loop.close()
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """기준값 대비 중앙값이 ``threshold`` 비율 이상 느려진 항목 목록"""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median_us"):
+            continue
+        ratio = result["median_us"] / base["median_us"]
+        result["baseline_us"] = base["median_us"]
+        result["change"] = round(ratio - 1, 3)
+        if ratio - 1 > threshold:
+            regressions.append((name, base["median_us"], result["median_us"], ratio))
+    return regressions
+
+
+def load(path):
+    try:
+        with open(path, encoding="utf-8") as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return None
+
+
+def save(path, data):
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump(data, fp, indent=2, sort_keys=True)
+        fp.write("\n")
@@ -0,0 +1,151 @@
+import os
+import shutil
+import tempfile
+import zlib
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from chat import archive
+from chat.history import room_history
+from chat.models import ChatRoom, ChatRoomMember, Message
+
+
+class MessageArchiveTests(TestCase):
+    def setUp(self):
+        self.archive_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MESSAGE_ARCHIVE_ROOT=self.archive_root,
+            MESSAGE_HOT_MONTHS=2,
+            MESSAGE_ARCHIVE_BLOCK_ROWS=4,
+        )
+        self.settings_override.enable()
+
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.chat_room = ChatRoom.objects.create(name="Test Room", room_type="group")
+        self.other_room = ChatRoom.objects.create(name="Other Room", room_type="group")
+        ChatRoomMember.objects.create(user=self.user, room=self.chat_room)
+
+        now = timezone.now()
+        # 오래된 메시지 10개 (아카이브 대상) + 최근 메시지 3개
+        for i in range(10):
+            self._create_message(self.chat_room, f"old {i}", now - timedelta(days=200 - i))
+        self._create_message(self.other_room, "other old", now - timedelta(days=195))
+        for i in range(3):
+            self._create_message(self.chat_room, f"new {i}", now - timedelta(minutes=3 - i))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.archive_root, ignore_errors=True)
+
+    def _create_message(self, room, content, created_at):
+        message = Message.objects.create(room=room, sender=self.user, content=content)
+        Message.objects.filter(id=message.id).update(created_at=created_at)
+
+    def test_archive_moves_cold_months_out_of_db(self):
+        call_command("archive_messages", stdout=StringIO())
+
+        self.assertEqual(Message.objects.filter(room=self.chat_room).count(), 3)
+        self.assertFalse(Message.objects.filter(room=self.other_room).exists())
+        self.assertEqual(archive.count([self.chat_room.id]), 10)
+        self.assertEqual(archive.count([self.other_room.id]), 1)
+
+    def _segment_rows(self):
+        """세그먼트 파일에 남은 모든 블록의 행 (인덱스가 가리키지 않는 블록 포함)"""
+        rows = []
+        for name in sorted(os.listdir(self.archive_root)):
+            if not name.endswith(".seg"):
+                continue
+            with open(os.path.join(self.archive_root, name), "rb") as fp:
+                data = fp.read()
+            while data:
+                block = zlib.decompressobj()
+                rows.extend(block.decompress(data).decode("utf-8").split("\n"))
+                data = block.unused_data
+        return rows
+
+    def test_rewrites_leave_no_stale_blocks_in_segments(self):
+        call_command("archive_messages", stdout=StringIO())
+        late_at = timezone.now() - timedelta(days=195, hours=12)
+        self._create_message(self.chat_room, "late", late_at)
+        call_command("archive_messages", stdout=StringIO())
+
+        # 늦게 들어온 행을 합친 뒤에도 각 행은 세그먼트에 한 번만 남음
+        self.assertEqual(len(self._segment_rows()), 12)
+
+        # 보존 기간이 지나 지운 메시지는 세그먼트 파일에서도 사라짐
+        cutoff = timezone.now() - timedelta(days=195, hours=1)
+        self.assertEqual(archive.expire_room(self.chat_room.id, cutoff), 6)
+        rows = "\n".join(self._segment_rows())
+        self.assertNotIn('"old 0"', rows)
+        self.assertNotIn('"late"', rows)
+        self.assertIn('"old 5"', rows)
+        self.assertIn('"other old"', rows)
+        self.assertEqual(archive.count([self.chat_room.id]), 5)
+        self.assertEqual(archive.count([self.other_room.id]), 1)
+
+    def test_history_reads_across_hot_and_archive(self):
+        expected = list(
+            Message.objects.filter(room=self.chat_room)
+            .order_by("-id")
+            .values_list("id", "content")
+        )
+        call_command("archive_messages", stdout=StringIO())
+
+        history = room_history(self.chat_room.id)
+        self.assertEqual(history.count(), 13)
+        self.assertEqual([(m.id, m.content) for m in history[:]], expected)
+        # 핫/아카이브 경계를 걸치는 슬라이스와 블록을 건너뛰는 슬라이스
+        self.assertEqual([m.content for m in history[2:5]], ["new 0", "old 9", "old 8"])
+        self.assertEqual([m.content for m in history[9:11]], ["old 3", "old 2"])
+        self.assertEqual(history[12].sender, self.user)
+
+        # ID 커서는 핫/아카이브 경계를 넘어 같은 순서로 이어짐
+        ids = [message_id for message_id, _ in expected]
+        self.assertEqual([m.id for m in room_history(self.chat_room.id, ids[1])[:]], ids[2:])
+        self.assertEqual(
+            [m.id for m in room_history(self.chat_room.id, ids[6])[:3]], ids[7:10]
+        )
+
+    def test_archive_is_idempotent(self):
+        call_command("archive_messages", stdout=StringIO())
+        call_command("archive_messages", stdout=StringIO())
+        self.assertEqual(room_history(self.chat_room.id).count(), 13)
+
+    def test_late_rows_in_archived_month_are_merged_before_delete(self):
+        call_command("archive_messages", stdout=StringIO())
+        # 아카이브가 끝난 월에 늦게 들어온 메시지 (과거 메시지 적재 등)
+        late_at = timezone.now() - timedelta(days=195, hours=12)
+        self._create_message(self.chat_room, "late", late_at)
+
+        call_command("archive_messages", stdout=StringIO())
+        call_command("archive_messages", stdout=StringIO())
+
+        self.assertFalse(Message.objects.filter(created_at__lte=late_at).exists())
+        self.assertEqual(archive.count([self.chat_room.id]), 11)
+        self.assertEqual(archive.count([self.other_room.id]), 1)
+        contents = [m.content for m in room_history(self.chat_room.id)[3:]]
+        self.assertEqual(contents[:6], ["old 9", "old 8", "old 7", "old 6", "old 5", "late"])
+        self.assertEqual(len(contents), 11)
+
+    def test_messages_endpoint_includes_archived_messages(self):
+        call_command("archive_messages", stdout=StringIO())
+        self.client.force_login(self.user)
+
+        response = self.client.get(f"/api/rooms/{self.chat_room.id}/messages/")
+        self.assertEqual(response.status_code, 200)
+        contents = [m["content"] for m in response.json()["results"]]
+        self.assertEqual(contents[:2], ["old 0", "old 1"])
+        self.assertEqual(contents[-1], "new 2")
+        self.assertEqual(response.json()["results"][0]["sender"]["username"], "testuser")
+
+        archived_id = room_history(self.chat_room.id)[12].id
+        response = self.client.get(
+            f"/api/rooms/{self.chat_room.id}/messages/{archived_id}/"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["content"], "old 0")
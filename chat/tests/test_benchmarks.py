@@ -0,0 +1,20 @@
+from django.test import SimpleTestCase
+
+from chat.tests.benchmarks.runner import compare
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+    def test_flags_only_regressions_over_threshold(self):
+        baseline = {"results": {"a": {"median_us": 100}, "b": {"median_us": 100}}}
+        current = {
+            "results": {
+                "a": {"median_us": 130},
+                "b": {"median_us": 110},
+                "new": {"median_us": 5},
+            }
+        }
+        regressions = compare(current, baseline, threshold=0.25)
+
+        self.assertEqual([name for name, *_ in regressions], ["a"])
+        self.assertEqual(current["results"]["b"]["change"], 0.1)
+        self.assertNotIn("change", current["results"]["new"])
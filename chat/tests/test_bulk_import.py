@@ -0,0 +1,179 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import NOT_PROVIDED
+from django.test import TestCase
+
+from chat import snowflake
+from chat.bulk_import import MEMBER_COLUMNS, MESSAGE_COLUMNS, Importer, JSONLReader
+from chat.models import ChatRoom, ChatRoomMember, ImportCheckpoint, Message
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        User.objects.create_user(username="alice", password="12345")
+        self.records = [
+            {
+                "type": "room",
+                "id": "r1",
+                "name": "Legacy",
+                "created_at": "2020-01-01T00:00:00Z",
+            },
+            {"type": "member", "room": "r1", "user": "alice"},
+            {"type": "member", "room": "r1", "user": "bob"},
+        ]
+        for i in range(7):
+            self.records.append(
+                {
+                    "type": "message",
+                    "room": "r1",
+                    "sender": "alice" if i % 2 else "bob",
+                    "content": f"legacy {i}",
+                    "created_at": f"2020-01-02T00:00:0{i}Z",
+                }
+            )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write_jsonl(self, records):
+        path = os.path.join(self.tmpdir, "input.jsonl")
+        with open(path, "w", encoding="utf-8") as fp:
+            for record in records:
+                fp.write(json.dumps(record) + "\n")
+        return path
+
+    def test_import_jsonl_preserves_timestamps(self):
+        path = self._write_jsonl(self.records)
+        call_command(
+            "import_chat",
+            path,
+            "--create-users",
+            "--batch-size",
+            "3",
+            stdout=StringIO(),
+        )
+
+        room = ChatRoom.objects.get(name="Legacy")
+        self.assertEqual(room.created_at.year, 2020)
+        self.assertEqual(ChatRoomMember.objects.filter(room=room).count(), 2)
+        messages = list(Message.objects.filter(room=room).order_by("created_at"))
+        self.assertEqual(len(messages), 7)
+        self.assertEqual(messages[0].content, "legacy 0")
+        self.assertEqual(messages[0].sender.username, "bob")
+        self.assertEqual(messages[0].created_at.year, 2020)
+        # 과거 메시지도 원래 생성 시각의 시간순 ID를 가짐
+        ids = [message.id for message in messages]
+        self.assertEqual(ids, sorted(ids))
+        self.assertTrue(all(snowflake.is_snowflake(i) for i in ids))
+        self.assertEqual(
+            snowflake.to_datetime(messages[0].id).replace(microsecond=0),
+            messages[0].created_at.replace(microsecond=0),
+        )
+
+        checkpoint = ImportCheckpoint.objects.get(source=path)
+        self.assertIsNotNone(checkpoint.completed_at)
+        self.assertEqual(checkpoint.counts["message"], 7)
+
+    def test_colliding_ids_are_moved_to_free_ids(self):
+        # 같은 밀리초의 메시지를 두 입력 소스로 적재하고, 하위 비트도 모두
+        # 겹치도록 해도 메시지를 잃지 않음
+        for record in self.records:
+            if record["type"] == "message":
+                record["created_at"] = "2020-01-02T00:00:00Z"
+        path = self._write_jsonl(self.records)
+        other = os.path.join(self.tmpdir, "other.jsonl")
+        shutil.copy(path, other)
+        with mock.patch.object(Importer, "_message_low_bits", return_value=0):
+            for source in (path, other):
+                call_command("import_chat", source, "--create-users", stdout=StringIO())
+
+        self.assertEqual(Message.objects.count(), 14)
+        self.assertEqual(Message.objects.values("id").distinct().count(), 14)
+
+    def test_unknown_user_without_create_users_fails(self):
+        path = self._write_jsonl(self.records)
+        with self.assertRaises(CommandError):
+            call_command("import_chat", path, stdout=StringIO())
+
+    def test_resume_after_interruption_does_not_duplicate(self):
+        path = self._write_jsonl(self.records)
+
+        class Interrupted(Exception):
+            pass
+
+        class FailingReader(JSONLReader):
+            def records(self, position):
+                for index, item in enumerate(super().records(position)):
+                    if index == 6:
+                        raise Interrupted()
+                    yield item
+
+        importer = Importer(path, batch_size=4, create_users=True)
+        with self.assertRaises(Interrupted):
+            importer.run(FailingReader(path))
+        # 첫 배치(4건)만 커밋된 상태
+        self.assertEqual(Message.objects.count(), 1)
+
+        call_command("import_chat", path, "--create-users", stdout=StringIO())
+        self.assertEqual(ChatRoom.objects.filter(name="Legacy").count(), 1)
+        self.assertEqual(Message.objects.count(), 7)
+        self.assertEqual(ChatRoomMember.objects.count(), 2)
+
+    def test_rebuilds_indexes_left_after_completed_import(self):
+        path = self._write_jsonl(self.records)
+        call_command("import_chat", path, "--create-users", stdout=StringIO())
+        # 인덱스 재생성 도중 중단된 체크포인트
+        ImportCheckpoint.objects.filter(source=path).update(
+            dropped_indexes=[
+                "CREATE INDEX import_test_idx ON chat_message (content)",
+                "CREATE UNIQUE INDEX import_test_uniq ON chat_message (id, content)",
+            ]
+        )
+
+        out = StringIO()
+        call_command("import_chat", path, stdout=out)
+        self.assertIn("인덱스 2개 재생성 완료", out.getvalue())
+        self.assertEqual(ImportCheckpoint.objects.get(source=path).dropped_indexes, [])
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, "chat_message")
+        self.assertIn("import_test_idx", indexes)
+        self.assertTrue(indexes["import_test_uniq"]["unique"])
+
+    def test_copy_columns_cover_not_null_columns(self):
+        # COPY 경로(PostgreSQL)는 모델 기본값을 쓰지 않으므로, DB 기본값이 없는
+        # NOT NULL 컬럼이 빠지면 적재가 실패함
+        for model, columns in (
+            (ChatRoomMember, MEMBER_COLUMNS),
+            (Message, MESSAGE_COLUMNS),
+        ):
+            required = {
+                field.column
+                for field in model._meta.concrete_fields
+                if not field.null
+                and field.db_default is NOT_PROVIDED
+                and not (field.primary_key and field.db_returning)
+            }
+            self.assertLessEqual(required, set(columns), model.__name__)
+
+    def test_import_csv(self):
+        path = os.path.join(self.tmpdir, "input.csv")
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.write("type,id,name,room,user,sender,content,created_at\n")
+            fp.write("room,r1,CSV Room,,,,,\n")
+            fp.write("member,,,r1,alice,,,\n")
+            fp.write('message,,,r1,,alice,"hello, world",2021-05-01T10:00:00Z\n')
+        call_command("import_chat", path, stdout=StringIO())
+
+        message = Message.objects.get()
+        self.assertEqual(message.content, "hello, world")
+        self.assertEqual(message.room.name, "CSV Room")
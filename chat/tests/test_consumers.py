@@ -1,5 +1,6 @@
 import json
 import asyncio
+from unittest import mock
 from channels.testing import WebsocketCommunicator
 from channels.db import database_sync_to_async
 from channels.routing import URLRouter
@@ -8,8 +9,18 @@ from django.urls import re_path
 from django.test import TransactionTestCase
 from django.contrib.auth.models import User
 from django.core.cache import cache
+from chat import consumers, presence, snowflake
 from chat.consumers import ChatConsumer, OnlineStatusConsumer
 from chat.models import ChatRoom, ChatRoomMember, Message
+from chat.store import (
+    GLOBAL_ONLINE_KEY,
+    client_msg_key,
+    connection_count_key,
+    get_store,
+    inflight_key,
+    online_key,
+    queue_key,
+)
 
 
 class ChatConsumerTests(TransactionTestCase):
@@ -27,6 +38,7 @@ class ChatConsumerTests(TransactionTestCase):
     async def asyncSetUp(self):
         # 테스트 데이터 초기화
         await database_sync_to_async(cache.clear)()
+        await get_store().flush()
 
         # 테스트 사용자와 채팅방 생성
         self.user1 = await database_sync_to_async(User.objects.create_user)(
@@ -165,6 +177,32 @@ class ChatConsumerTests(TransactionTestCase):
         connected, _ = await communicator.connect()
         self.assertFalse(connected, "권한 없는 사용자가 채팅방에 접속할 수 있습니다")
 
+    async def test_second_tab_keeps_user_online(self):
+        """같은 방에 연결된 다른 탭이 남아 있으면 오프라인이 되지 않는지 테스트"""
+        await self.asyncSetUp()
+        store = get_store()
+        tabs = [await self.setup_communicator(self.user1) for _ in range(2)]
+        for tab in tabs:
+            connected, _ = await tab.connect()
+            self.assertTrue(connected)
+
+        await tabs[0].disconnect()
+        self.assertIn(
+            self.user1.id, await store.smembers(online_key(self.chat_room.id))
+        )
+        self.assertIn(self.user1.id, await store.smembers(GLOBAL_ONLINE_KEY))
+        member = await ChatRoomMember.objects.aget(user=self.user1, room=self.chat_room)
+        self.assertTrue(member.is_online)
+
+        # 마지막 연결이 끊기면 오프라인
+        await tabs[1].disconnect()
+        self.assertNotIn(
+            self.user1.id, await store.smembers(online_key(self.chat_room.id))
+        )
+        self.assertNotIn(self.user1.id, await store.smembers(GLOBAL_ONLINE_KEY))
+        await member.arefresh_from_db()
+        self.assertFalse(member.is_online)
+
     async def test_online_status_update(self):
         """온라인 상태 업데이트 테스트"""
         await self.asyncSetUp()
@@ -264,6 +302,139 @@ class ChatConsumerTests(TransactionTestCase):
         await communicator.disconnect()
         await asyncio.sleep(0.1)
 
+    async def test_typing_indicator_is_coalesced_and_not_persisted(self):
+        """입력 중 표시 테스트"""
+        await self.asyncSetUp()
+        communicator1 = await self.setup_communicator(self.user1)
+        communicator2 = await self.setup_communicator(self.user2)
+        for communicator in (communicator1, communicator2):
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+        # 제한 시간 안의 반복 입력 시작은 한 번으로 묶임
+        for _ in range(5):
+            await communicator1.send_json_to({"type": "typing"})
+
+        typing_frames = []
+        while True:
+            try:
+                frame = await asyncio.wait_for(
+                    communicator2.receive_json_from(), timeout=0.5
+                )
+            except asyncio.TimeoutError:
+                break
+            if frame["type"] == "typing":
+                typing_frames.append(frame["users"])
+        self.assertEqual(typing_frames, [["testuser1"]])
+
+        # 입력 중지는 다음 전파 주기에 빈 목록으로 전달
+        await communicator1.send_json_to({"type": "typing", "is_typing": False})
+        while True:
+            frame = await asyncio.wait_for(communicator2.receive_json_from(), timeout=2)
+            if frame["type"] == "typing":
+                break
+        self.assertEqual(frame["users"], [])
+
+        # DB와 메시지 큐에는 아무것도 남지 않음
+        self.assertEqual(await Message.objects.acount(), 0)
+        self.assertEqual(
+            await get_store().lpop(f"message_queue_{self.chat_room.id}", 10), []
+        )
+
+        await communicator1.disconnect()
+        await communicator2.disconnect()
+
+    async def test_client_msg_id_dedupes_and_acknowledges(self):
+        """client_msg_id 재전송 중복 제거 및 서버 메시지 ID 응답 테스트"""
+        await self.asyncSetUp()
+        communicator1 = await self.setup_communicator(self.user1)
+        communicator2 = await self.setup_communicator(self.user2)
+        for communicator in (communicator1, communicator2):
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+        payload = {"message": "한 번만 저장", "client_msg_id": "c-1"}
+        await communicator1.send_json_to(payload)
+        await communicator1.send_json_to(payload)
+
+        # 보낸 연결은 저장을 기다리지 않고 서버 메시지 ID를 바로 받고,
+        # 재전송에도 같은 ID로 응답받음
+        acks = []
+        while len(acks) < 2:
+            frame = await asyncio.wait_for(communicator1.receive_json_from(), timeout=1)
+            if frame["type"] == "ack":
+                acks.append(frame)
+        message_id = acks[0]["id"]
+        self.assertEqual(
+            acks[1], {"type": "ack", "client_msg_id": "c-1", "id": message_id}
+        )
+
+        # 상대방에게는 서버 메시지 ID와 함께 한 번만 전파
+        received = []
+        while True:
+            try:
+                frame = await asyncio.wait_for(
+                    communicator2.receive_json_from(), timeout=0.5
+                )
+            except asyncio.TimeoutError:
+                break
+            if frame["type"] == "message":
+                received.append((frame["id"], frame["client_msg_id"]))
+        self.assertEqual(received, [(message_id, "c-1")])
+
+        # 메시지 워커가 같은 ID로 저장 (ID에 담긴 시각이 생성 시각)
+        await asyncio.sleep(1.5)
+        message = await Message.objects.aget()
+        self.assertEqual(message.id, message_id)
+        self.assertEqual(message.created_at, snowflake.to_datetime(message_id))
+
+        # 중복 확인 기간이 지나 저장소 키가 사라진 뒤의 재전송도 다시 저장하지 않음
+        await get_store().delete(client_msg_key(self.user1.id, "c-1"))
+        await communicator1.send_json_to(payload)
+        await asyncio.sleep(1.5)
+        self.assertEqual(await Message.objects.acount(), 1)
+
+        await communicator1.disconnect()
+        await communicator2.disconnect()
+
+    async def test_worker_requeues_batches_left_by_crashed_worker(self):
+        """저장 도중 죽은 워커가 남긴 배치 복구 테스트"""
+        await self.asyncSetUp()
+        store = get_store()
+        queue, inflight = queue_key(self.chat_room.id), inflight_key(self.chat_room.id)
+        entries = [
+            {"id": snowflake.next_id(), "sender": self.user1.id, "content": f"{i}"}
+            for i in range(3)
+        ]
+        await store.rpush(queue, *entries, ttl=60)
+
+        # 배치를 꺼낸 뒤 저장 전에 죽은 워커와, 저장은 했지만 배치를 지우기 전에
+        # 죽은 워커
+        await store.begin_batch(queue, inflight, 1, ttl=60)
+        _, saved = await store.begin_batch(queue, inflight, 1, ttl=60)
+        await Message.objects.acreate(
+            id=saved[0]["id"],
+            room=self.chat_room,
+            sender=self.user1,
+            content=saved[0]["content"],
+            created_at=snowflake.to_datetime(saved[0]["id"]),
+        )
+
+        consumer = ChatConsumer()
+        consumer.room_id = self.chat_room.id
+        # 아직 시간 제한 안의 배치는 다른 워커가 저장 중일 수 있으므로 그대로 둠
+        self.assertEqual(await consumer.recover_inflight(), 0)
+        with mock.patch.object(consumers, "MESSAGE_INFLIGHT_TIMEOUT", 0):
+            with self.assertLogs("chat.consumers", level="WARNING"):
+                self.assertEqual(await consumer.recover_inflight(), 2)
+        self.assertEqual(await consumer.flush_message_queue(), 3)
+
+        # 모든 메시지가 한 번씩만 저장되고 저장 중 배치는 남지 않음
+        self.assertEqual(
+            [m.content async for m in Message.objects.order_by("id")], ["0", "1", "2"]
+        )
+        self.assertEqual(await store.pending_entries(queue, inflight, 10), [])
+
 
 class OnlineStatusConsumerTests(TransactionTestCase):
     @classmethod
@@ -279,6 +450,7 @@ class OnlineStatusConsumerTests(TransactionTestCase):
     async def asyncSetUp(self):
         # 테스트 데이터 초기화
         await database_sync_to_async(cache.clear)()
+        await get_store().flush()
 
         # 테스트 사용자 생성
         self.user = await database_sync_to_async(User.objects.create_user)(
@@ -302,7 +474,224 @@ class OnlineStatusConsumerTests(TransactionTestCase):
         # 응답 타입 확인 (실제 응답은 online_users_update)
         self.assertEqual(response["type"], "online_users_update")
 
-        # 이 응답에는 users 키가 없음 - OnlineStatusConsumer.online_status_update 메서드 참조
+        # 구독 중인 사용자(같은 채팅방 사용자)가 없으므로 빈 상태 목록
+        self.assertEqual(response["users"], [])
 
         await communicator.disconnect()
         await asyncio.sleep(0.1)
+
+    async def test_cleanup_keeps_users_connected_to_other_nodes(self):
+        """상태 정리는 이 노드의 하트비트가 아니라 연결 수 카운터로 판단"""
+        await self.asyncSetUp()
+        other = await User.objects.acreate(username="other")
+        room = await ChatRoom.objects.acreate(name="room", room_type="group")
+        for user in (self.user, other):
+            await ChatRoomMember.objects.acreate(user=user, room=room, is_online=True)
+        store = get_store()
+        await store.sadd(GLOBAL_ONLINE_KEY, self.user.id, other.id, ttl=30)
+        await store.sadd(online_key(room.id), self.user.id, other.id, ttl=30)
+        # 다른 노드에 연결된 사용자 (이 노드에는 하트비트 기록이 없음)
+        await store.incr_many(
+            [
+                connection_count_key(self.user.id),
+                connection_count_key(self.user.id, room.id),
+            ],
+            ttl=60,
+        )
+
+        consumer = OnlineStatusConsumer()
+        consumer.channel_layer = self.channel_layer
+        await consumer.cleanup_global_online_status()
+        await consumer.cleanup_room_online_status()
+
+        # 연결 수 카운터가 없는(만료된) 사용자만 오프라인 처리
+        self.assertEqual(await store.smembers(GLOBAL_ONLINE_KEY), {self.user.id})
+        self.assertEqual(await store.smembers(online_key(room.id)), {self.user.id})
+        self.assertEqual(
+            [
+                user_id
+                async for user_id in ChatRoomMember.objects.filter(
+                    room=room, is_online=True
+                ).values_list("user_id", flat=True)
+            ],
+            [self.user.id],
+        )
+
+    async def connect_online(self, user):
+        communicator = WebsocketCommunicator(self.application, "/ws/online/")
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator, await communicator.receive_json_from()
+
+    async def test_presence_updates_only_reach_watchers(self):
+        """같은 채팅방 사용자나 관심 목록의 변경만 받는지 테스트"""
+        await self.asyncSetUp()
+        friend, stranger = [
+            await database_sync_to_async(User.objects.create_user)(
+                username=name, password="12345"
+            )
+            for name in ("friend", "stranger")
+        ]
+        room = await ChatRoom.objects.acreate(name="Friends", room_type="direct")
+        for user in (self.user, friend):
+            await ChatRoomMember.objects.acreate(user=user, room=room)
+
+        watcher, snapshot = await self.connect_online(self.user)
+        self.assertEqual(snapshot["users"], [{"id": friend.id, "is_online": False}])
+
+        # 같은 채팅방 사용자의 접속은 바뀐 사용자 ID와 함께 알림
+        friend_socket, _ = await self.connect_online(friend)
+        update = await asyncio.wait_for(watcher.receive_json_from(), timeout=1)
+        self.assertEqual(update["users"], [{"id": friend.id, "is_online": True}])
+
+        # 관계없는 사용자의 접속은 알리지 않음
+        stranger_socket, _ = await self.connect_online(stranger)
+        self.assertTrue(await watcher.receive_nothing(timeout=0.2))
+
+        # 관심 목록을 지정하면 현재 상태를 받고 이후 변경도 받음
+        await watcher.send_json_to({"type": "watch", "user_ids": [stranger.id]})
+        snapshot = await asyncio.wait_for(watcher.receive_json_from(), timeout=1)
+        self.assertEqual(snapshot["users"], [{"id": stranger.id, "is_online": True}])
+
+        await friend_socket.disconnect()
+        await stranger_socket.disconnect()
+        update = await asyncio.wait_for(watcher.receive_json_from(), timeout=1)
+        self.assertEqual(update["users"], [{"id": stranger.id, "is_online": False}])
+        self.assertTrue(await watcher.receive_nothing(timeout=0.2))
+
+        await watcher.disconnect()
+
+    async def test_presence_changes_are_digested_per_tick(self):
+        """상쇄된 변경은 버리고 구간당 한 프레임만 보내는지 테스트"""
+        await self.asyncSetUp()
+        friends = [
+            await database_sync_to_async(User.objects.create_user)(
+                username=f"friend{i}", password="12345"
+            )
+            for i in range(3)
+        ]
+        room = await ChatRoom.objects.acreate(name="Friends", room_type="group")
+        for user in (self.user, *friends):
+            await ChatRoomMember.objects.acreate(user=user, room=room)
+        watcher, _ = await self.connect_online(self.user)
+
+        async def flap(user, *states):
+            for is_online in states:
+                await self.channel_layer.group_send(
+                    presence.watch_group(user.id),
+                    {
+                        "type": "presence_update",
+                        "users": [{"id": user.id, "is_online": is_online}],
+                    },
+                )
+
+        # 한 구간 안의 많은 변경은 최종 상태가 바뀐 사용자만 한 프레임으로
+        await flap(friends[0], True, False, True, False, True)
+        await flap(friends[1], True, False)
+        await flap(friends[2], True)
+        frame = await asyncio.wait_for(watcher.receive_json_from(), timeout=1)
+        self.assertEqual(
+            frame["users"],
+            [
+                {"id": friends[0].id, "is_online": True},
+                {"id": friends[2].id, "is_online": True},
+            ],
+        )
+        self.assertTrue(await watcher.receive_nothing(timeout=0.2))
+
+        # 접속 후 바로 종료한 것처럼 상쇄되는 변경은 보내지 않음
+        await flap(friends[0], False, True)
+        self.assertTrue(await watcher.receive_nothing(timeout=0.3))
+
+        await watcher.disconnect()
+
+
+class ChannelRoomTests(TransactionTestCase):
+    """채널(대규모 채팅방) 모드 테스트"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.application = URLRouter(
+            [re_path(r"ws/chat/(?P<room_id>\d+)/$", ChatConsumer.as_asgi())]
+        )
+
+    async def asyncSetUp(self):
+        await get_store().flush()
+        self.admin = await database_sync_to_async(User.objects.create_user)(
+            username="announcer", password="12345"
+        )
+        self.members = [
+            await database_sync_to_async(User.objects.create_user)(
+                username=f"listener{i}", password="12345"
+            )
+            for i in range(3)
+        ]
+        self.channel = await database_sync_to_async(ChatRoom.objects.create)(
+            name="Announcements", room_type="channel"
+        )
+        await ChatRoomMember.objects.acreate(
+            user=self.admin, room=self.channel, role="admin"
+        )
+        for member in self.members:
+            await ChatRoomMember.objects.acreate(user=member, room=self.channel)
+
+    async def connect(self, user):
+        communicator = WebsocketCommunicator(
+            self.application, f"/ws/chat/{self.channel.id}/"
+        )
+        communicator.scope["user"] = user
+        communicator.scope["url_route"] = {"kwargs": {"room_id": str(self.channel.id)}}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def receive_until(self, communicator, frame_type):
+        """``frame_type`` 프레임까지 받고, 그 전에 받은 프레임 종류를 반환합니다."""
+        skipped = []
+        while True:
+            frame = await communicator.receive_json_from(timeout=1)
+            if frame["type"] == frame_type:
+                return frame, skipped
+            skipped.append(frame["type"])
+
+    async def test_channel_uses_one_relay_and_counts_presence(self):
+        await self.asyncSetUp()
+        listeners = [await self.connect(member) for member in self.members]
+
+        # 스냅샷에는 참여자 목록이 아닌 인원 수
+        hello, skipped = await self.receive_until(listeners[0], "hello")
+        self.assertEqual(set(skipped) - {"online_count"}, set())
+        self.assertNotIn("users", hello)
+        self.assertEqual(hello["online_count"]["members"], 4)
+
+        # 연결이 여러 개여도 채널 레이어 그룹에는 중계 채널 하나만 가입
+        channel_layer = get_channel_layer()
+        group = channel_layer.groups[f"chat_{self.channel.id}"]
+        self.assertEqual(len(group), 1)
+
+        announcer = await self.connect(self.admin)
+        await announcer.send_json_to({"message": "공지입니다"})
+        for listener in listeners:
+            frame, skipped = await self.receive_until(listener, "message")
+            self.assertEqual(frame["message"], "공지입니다")
+            # 입장 알림은 기본적으로 보내지 않음
+            self.assertNotIn("join", skipped)
+
+        for communicator in [announcer, *listeners]:
+            await communicator.disconnect()
+        self.assertNotIn(f"chat_{self.channel.id}", channel_layer.groups)
+
+    async def test_only_privileged_members_can_post(self):
+        await self.asyncSetUp()
+        listener = await self.connect(self.members[0])
+        await listener.receive_json_from()
+
+        await listener.send_json_to({"message": "저도 말할래요"})
+        await self.receive_until(listener, "error")
+
+        self.assertEqual(
+            await get_store().lpop(f"message_queue_{self.channel.id}", 10), []
+        )
+        await listener.disconnect()
@@ -0,0 +1,47 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import SimpleTestCase, TestCase
+
+from chat import db_pool
+from chat.db_pool import pool_max_size, pool_options, warm_pools
+
+
+class PoolOptionsTests(SimpleTestCase):
+    def test_max_size_follows_sync_threads(self):
+        options = pool_options(16)
+
+        self.assertEqual(options["max_size"], pool_max_size(16))
+        self.assertGreater(options["max_size"], 16)
+        self.assertEqual(options["min_size"], 2)
+
+    def test_explicit_sizes_and_extra_pool_arguments(self):
+        options = pool_options(4, min_size=10, max_size=3, max_idle=60)
+
+        self.assertEqual(options["max_size"], 3)
+        self.assertEqual(options["min_size"], 3)
+        self.assertEqual(options["max_idle"], 60)
+
+    def test_warm_pools_skips_databases_without_pool(self):
+        # 테스트 설정(SQLite)에는 풀이 없으므로 아무 작업도 하지 않아야 함
+        warm_pools()
+
+
+class StatementTimeoutTests(TestCase):
+    def test_commands_disable_statement_timeout_for_new_connections(self):
+        with mock.patch.object(
+            db_pool,
+            "disable_statement_timeout",
+            wraps=db_pool.disable_statement_timeout,
+        ) as disable:
+            call_command("purge_rooms", "--rate-limit", "0", stdout=StringIO())
+        disable.assert_called_once_with()
+
+        # 이후에 맺는 PostgreSQL 연결에도 적용
+        postgres = mock.MagicMock(vendor="postgresql")
+        connection_created.send(sender=type(connection), connection=postgres)
+        cursor = postgres.cursor.return_value.__enter__.return_value
+        cursor.execute.assert_called_once_with("SET statement_timeout = 0")
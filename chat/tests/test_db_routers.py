@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chat import db_routers
+from chat.db_routers import replica_reads
+from chat.models import ChatRoom, ChatRoomMember
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTests(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        db_routers._local_sticky.clear()
+        self.user = User.objects.create_user(username="reader", password="12345")
+        self.room = ChatRoom.objects.create(name="Replica Room", room_type="group")
+        ChatRoomMember.objects.create(user=self.user, room=self.room)
+        self.client = APIClient()
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def _queries(self, func):
+        """채팅 테이블 쿼리 수를 (primary, replica) 별로 셉니다.
+
+        인증 미들웨어의 사용자 조회는 라우팅 대상이 아니므로 제외합니다.
+        """
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                response = func()
+
+        def count(context):
+            return sum('"chat_' in q["sql"] for q in context.captured_queries)
+
+        return response, count(primary), count(replica)
+
+    def test_read_only_views_use_replica(self):
+        response, primary, replica = self._queries(
+            lambda: self.client.get(f"/api/rooms/{self.room.id}/messages/")
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_reads_stick_to_primary_after_write(self):
+        other = ChatRoom.objects.create(name="Other Room", room_type="group")
+        response = self.client.post(f"/api/rooms/{other.id}/join/")
+        self.assertEqual(response.status_code, 200)
+
+        response, primary, replica = self._queries(
+            lambda: self.client.get(f"/api/rooms/{other.id}/users/")
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_objects_read_from_replica_are_written_to_primary(self):
+        with replica_reads():
+            room = ChatRoom.objects.get(pk=self.room.pk)
+        self.assertEqual(room._state.db, "replica")
+
+        room.name = "Renamed"
+        with CaptureQueriesContext(connections["default"]) as primary:
+            room.save()
+
+        self.assertTrue(any("UPDATE" in q["sql"] for q in primary.captured_queries))
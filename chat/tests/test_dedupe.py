@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from chat import dedupe, snowflake
+from chat.models import ChatRoom, ClientMessage, Message
+
+
+class SaveMessagesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.other = User.objects.create_user(username="other", password="12345")
+        self.room = ChatRoom.objects.create(name="room", room_type="group")
+
+    def message(self, client_msg_id, sender=None, content="안녕"):
+        message_id = snowflake.next_id()
+        return Message(
+            id=message_id,
+            room=self.room,
+            sender=sender or self.user,
+            content=content,
+            created_at=snowflake.to_datetime(message_id),
+            client_msg_id=client_msg_id,
+        )
+
+    def test_resend_after_store_window_is_not_saved_again(self):
+        first, plain = self.message("c-1"), self.message(None)
+        self.assertEqual(dedupe.save_messages([first, plain]), [first, plain])
+        self.assertEqual(Message.objects.count(), 2)
+
+        # 생성 시각(ID)이 다른 재전송도 같은 (발신자, client_msg_id)면 저장하지 않음
+        resend = self.message("c-1")
+        other_sender = self.message("c-1", sender=self.other)
+        self.assertEqual(dedupe.save_messages([resend, other_sender]), [other_sender])
+        self.assertEqual(
+            ClientMessage.objects.get(sender=self.user, client_msg_id="c-1").message_id,
+            first.id,
+        )
+        self.assertFalse(Message.objects.filter(id=resend.id).exists())
+
+    def test_duplicates_in_one_batch_keep_first(self):
+        first, second = self.message("c-2"), self.message("c-2", content="두 번째")
+        self.assertEqual(dedupe.save_messages([first, second]), [first])
+        self.assertEqual(
+            list(Message.objects.values_list("content", flat=True)), ["안녕"]
+        )
+
+    def test_expire_client_ids(self):
+        now = timezone.now()
+        for days in (1, dedupe.CLIENT_MSG_ID_RETENTION_DAYS + 1):
+            ClientMessage.objects.create(
+                sender=self.user,
+                client_msg_id=f"c-{days}",
+                message_id=days,
+                created_at=now - timedelta(days=days),
+            )
+        self.assertEqual(dedupe.expire_client_ids(now, chunk_size=1), 1)
+        self.assertEqual(
+            list(ClientMessage.objects.values_list("client_msg_id", flat=True)),
+            ["c-1"],
+        )
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import time
+from unittest import mock
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+from django.urls import re_path
+
+from chat import drain
+from chat.consumers import ChatConsumer
+from chat.models import ChatRoom, ChatRoomMember, Message
+from chat.store import get_store
+
+CONNECTIONS = 20
+MESSAGES_PER_CONNECTION = 3
+
+
+async def idle_worker(self):
+    """다른 노드의 메시지 워커가 없는 상황을 흉내 냄"""
+
+
+class RollingRestartTests(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.application = drain.DrainMiddleware(
+            URLRouter([re_path(r"ws/chat/(?P<room_id>\d+)/$", ChatConsumer.as_asgi())])
+        )
+
+    def setUp(self):
+        self.room = ChatRoom.objects.create(name="Drain Room", room_type="group")
+        self.users = []
+        for i in range(CONNECTIONS):
+            user = User.objects.create_user(username=f"user{i}", password="12345")
+            ChatRoomMember.objects.create(user=user, room=self.room)
+            self.users.append(user)
+        drain.drainer.random.seed(0)
+
+    def tearDown(self):
+        drain.drainer.draining = False
+        drain.drainer.connections.clear()
+
+    async def connect(self, user):
+        communicator = WebsocketCommunicator(
+            self.application, f"/ws/chat/{self.room.id}/"
+        )
+        communicator.scope["user"] = user
+        communicator.scope["url_route"] = {"kwargs": {"room_id": str(self.room.id)}}
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+    async def receive_reconnect_hint(self, communicator):
+        while True:
+            output = await asyncio.wait_for(communicator.receive_output(), timeout=5)
+            if output["type"] == "websocket.close":
+                self.fail("재연결 안내 없이 연결이 닫혔습니다.")
+            frame = json.loads(output["text"])
+            if frame["type"] == "reconnect":
+                close = await asyncio.wait_for(communicator.receive_output(), timeout=5)
+                return frame, close
+
+    @mock.patch.object(ChatConsumer, "message_worker", idle_worker)
+    async def test_rolling_restart_loses_no_messages_and_spreads_reconnects(self):
+        await get_store().flush()
+        communicators = []
+        for user in self.users:
+            communicator, connected, _ = await self.connect(user)
+            self.assertTrue(connected)
+            communicators.append(communicator)
+
+        for i, communicator in enumerate(communicators):
+            for j in range(MESSAGES_PER_CONNECTION):
+                await communicator.send_json_to({"message": f"{i}-{j}"})
+        await asyncio.sleep(0.2)
+        self.assertEqual(await Message.objects.acount(), 0)
+
+        started = time.monotonic()
+        with self.assertLogs("chat.drain", level="INFO"):
+            task = asyncio.create_task(drain.drainer.drain(duration=0.5, jitter=10))
+            await asyncio.sleep(0)
+
+            # 드레인 중에는 새 연결을 인증 전에 거절
+            _, connected, code = await self.connect(self.users[0])
+            self.assertFalse(connected)
+            self.assertEqual(code, drain.DRAIN_REJECT_CODE)
+
+            hints = []
+            for communicator in communicators:
+                frame, close = await self.receive_reconnect_hint(communicator)
+                self.assertEqual(close["code"], drain.DRAIN_CLOSE_CODE)
+                hints.append(frame["after"])
+                await communicator.disconnect()
+            await task
+        elapsed = time.monotonic() - started
+
+        # 큐에 남아 있던 메시지는 모두 저장됨
+        self.assertEqual(
+            await Message.objects.acount(), CONNECTIONS * MESSAGES_PER_CONNECTION
+        )
+
+        # 연결은 나누어 닫히고, 재연결은 지터 범위에 퍼짐
+        self.assertGreaterEqual(elapsed, 0.4)
+        self.assertTrue(all(1 <= hint <= 11 for hint in hints))
+        per_second = max(
+            sum(1 for hint in hints if second <= hint < second + 1)
+            for second in range(1, 11)
+        )
+        self.assertLessEqual(per_second, 5)
+
+        # 새 노드(드레인 해제)에는 다시 연결할 수 있음
+        drain.drainer.draining = False
+        communicator, connected, _ = await self.connect(self.users[0])
+        self.assertTrue(connected)
+        await communicator.disconnect()
@@ -0,0 +1,92 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from chat import etags
+from chat.models import ChatRoom, ChatRoomMember, Message
+from chat.store import get_store, presence_version_key
+from chat.views import ChatRoomViewSet
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        async_to_sync(get_store().flush)()
+        self.user = User.objects.create_user(username="poller", password="12345")
+        self.room = ChatRoom.objects.create(name="room", room_type="group")
+        ChatRoomMember.objects.create(user=self.user, room=self.room)
+        Message.objects.create(room=self.room, sender=self.user, content="hello")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def poll(self, path, queries, action="list", **kwargs):
+        """처음 응답의 ETag로 다시 요청하면 ``queries`` 번의 쿼리로 304
+
+        인증(세션/JWT) 비용을 빼고 뷰만 측정합니다.
+        """
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        view = ChatRoomViewSet.as_view({"get": action})
+        for _ in range(3):
+            request = APIRequestFactory().get(path, HTTP_IF_NONE_MATCH=etag)
+            force_authenticate(request, self.user)
+            with self.assertNumQueries(queries):
+                response = view(request, **kwargs)
+            self.assertEqual(response.status_code, 304)
+        return etag
+
+    def test_rooms_list(self):
+        etag = self.poll("/api/rooms/", 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/rooms/", {"name": "new"})
+        response = self.client.get("/api/rooms/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_room_users(self):
+        path = f"/api/rooms/{self.room.id}/users/"
+        etag = self.poll(path, 1, "users", pk=self.room.id)
+
+        # 온라인 상태가 바뀌면 다시 조회
+        async_to_sync(get_store().bump_versions)([presence_version_key(self.room.id)])
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        other = User.objects.create_user(username="other", password="12345")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_authenticate(other)
+            self.client.post(f"/api/rooms/{self.room.id}/join/")
+        self.client.force_authenticate(self.user)
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(response.json()["users"]), 2)
+
+    def test_room_messages(self):
+        path = f"/api/rooms/{self.room.id}/messages/"
+        etag = self.poll(path, 1, "messages", pk=self.room.id)
+
+        Message.objects.create(room=self.room, sender=self.user, content="again")
+        with self.captureOnCommitCallbacks(execute=True):
+            etags.messages_changed(self.room.id)
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(response.json()["results"]), 2)
+        etag = response["ETag"]
+
+        # 메시지에 담긴 발신자 정보가 바뀌면 다시 조회
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put("/api/users/update_profile/", {"first_name": "새 이름"})
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"][0]["sender"]["first_name"], "새 이름"
+        )
+
+        # 참여하지 않은 사용자는 같은 ETag로도 304를 받지 않음
+        self.client.force_authenticate(
+            User.objects.create_user(username="stranger", password="12345")
+        )
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 403)
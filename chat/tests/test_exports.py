@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from chat.models import ChatRoom, ChatRoomMember, Message
+
+
+class RoomExportTests(TestCase):
+    def setUp(self):
+        self.archive_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MESSAGE_ARCHIVE_ROOT=self.archive_root,
+            MESSAGE_HOT_MONTHS=2,
+            MESSAGE_ARCHIVE_BLOCK_ROWS=2,
+            EXPORT_CHUNK_SIZE=2,
+        )
+        self.settings_override.enable()
+
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.chat_room = ChatRoom.objects.create(name="Test Room", room_type="group")
+        ChatRoomMember.objects.create(user=self.user, room=self.chat_room)
+
+        now = timezone.now()
+        for i in range(3):
+            message = Message.objects.create(
+                room=self.chat_room, sender=self.user, content=f"old {i}"
+            )
+            Message.objects.filter(id=message.id).update(
+                created_at=now - timedelta(days=200 - i)
+            )
+        call_command("archive_messages", stdout=io.StringIO())
+        for i in range(3):
+            Message.objects.create(
+                room=self.chat_room, sender=self.user, content=f"new {i}"
+            )
+
+        self.client.force_login(self.user)
+        self.url = f"/api/rooms/{self.chat_room.id}/export/"
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.archive_root, ignore_errors=True)
+
+    def _ndjson(self, response):
+        body = b"".join(response.streaming_content).decode()
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_ndjson_export_streams_archive_and_db(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = self._ndjson(response)
+        self.assertEqual(
+            [row["content"] for row in rows],
+            ["old 0", "old 1", "old 2", "new 0", "new 1", "new 2"],
+        )
+        self.assertEqual(rows[0]["sender"], "testuser")
+
+    def test_resume_from_cursor(self):
+        rows = self._ndjson(self.client.get(self.url))
+        for index in (1, 3):
+            response = self.client.get(self.url, {"cursor": rows[index]["cursor"]})
+            self.assertEqual(self._ndjson(response), rows[index + 1 :])
+
+    def test_csv_export(self):
+        response = self.client.get(self.url, {"export_format": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        body = b"".join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0][:2], ["cursor", "id"])
+        self.assertEqual([row[5] for row in rows[1:]][-1], "new 2")
+        self.assertEqual(len(rows), 7)
+
+    def test_export_rejects_non_member_and_bad_cursor(self):
+        self.assertEqual(self.client.get(self.url, {"cursor": "xx"}).status_code, 400)
+        outsider = User.objects.create_user(username="outsider", password="12345")
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
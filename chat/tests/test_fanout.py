@@ -0,0 +1,30 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from chat.fanout import Debouncer
+
+
+class DebouncerTests(SimpleTestCase):
+    async def test_runs_at_most_once_per_interval_and_forgets_keys(self):
+        debouncer = Debouncer(0.1)
+        calls = []
+
+        async def record(key):
+            calls.append(key)
+
+        for key in range(3):
+            debouncer.schedule(key, lambda key=key: record(key))
+        await asyncio.sleep(0.01)
+        # 간격 안에 다시 예약하면 간격이 지난 뒤 한 번만 실행
+        debouncer.schedule(0, lambda: record(0))
+        debouncer.schedule(0, lambda: record(0))
+        self.assertEqual(calls, [0, 1, 2])
+
+        await asyncio.sleep(0.15)
+        self.assertEqual(calls, [0, 1, 2, 0])
+
+        # 마지막 실행 시각은 간격이 지나면 지워짐
+        await asyncio.sleep(0.15)
+        self.assertEqual(debouncer._last_run, {})
+        self.assertEqual(debouncer._pending, {})
@@ -0,0 +1,50 @@
+import random
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TransactionTestCase
+
+from chat.loadtest import LoadTestHarness, parse_room_sizes, percentile, plan_rooms
+from chat.models import ChatRoom
+
+
+class LoadTestHelperTests(SimpleTestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 50))
+
+    def test_plan_rooms_covers_all_clients(self):
+        plan = plan_rooms(105, parse_room_sizes("2:1,10:1"), random.Random(1))
+        self.assertEqual(sum(plan), 105)
+        self.assertTrue(all(size <= 10 for size in plan))
+
+    def test_invalid_room_sizes(self):
+        with self.assertRaises(ValueError):
+            parse_room_sizes("0:1")
+
+
+class LoadTestHarnessTests(TransactionTestCase):
+    async def test_short_run_reports_fanout_latency(self):
+        """소규모 부하 실행 후 지연 통계가 수집되고 테스트 데이터가 정리되는지 확인"""
+        harness = LoadTestHarness(
+            clients=6,
+            room_sizes="3:1",
+            duration=1.5,
+            message_interval=0.3,
+            heartbeat_interval=0.5,
+            ramp_up=0.2,
+            seed=7,
+        )
+        summary = await harness.run()
+
+        self.assertEqual(summary["connect_failures"], 0)
+        self.assertEqual(summary["connections"], 6)
+        self.assertGreater(summary["messages_delivered"], 0)
+        self.assertIsNotNone(summary["fanout_ms"]["p99"])
+        self.assertFalse(
+            await User.objects.filter(username__startswith="loadtest_").aexists()
+        )
+        self.assertFalse(
+            await ChatRoom.objects.filter(name__startswith="loadtest_").aexists()
+        )
@@ -0,0 +1,129 @@
+import json
+from unittest import mock
+
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import re_path
+
+from chat import metrics
+from chat.consumers import ChatConsumer
+from chat.models import ChatRoom, ChatRoomMember
+from chat.store import get_store, queue_key
+
+
+class MetricsRenderTests(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def tearDown(self):
+        metrics.reset()
+
+    def test_histogram_is_cumulative(self):
+        metrics.DB_FLUSH_BATCH_SIZE.observe(1)
+        metrics.DB_FLUSH_BATCH_SIZE.observe(7)
+        metrics.DB_FLUSH_BATCH_SIZE.observe(500)
+        text = metrics.render()
+
+        self.assertIn('chat_db_flush_batch_size_bucket{le="1"} 1', text)
+        self.assertIn('chat_db_flush_batch_size_bucket{le="10"} 2', text)
+        self.assertIn('chat_db_flush_batch_size_bucket{le="100"} 2', text)
+        self.assertIn('chat_db_flush_batch_size_bucket{le="+Inf"} 3', text)
+        self.assertIn("chat_db_flush_batch_size_sum 508", text)
+        self.assertIn("chat_db_flush_batch_size_count 3", text)
+
+    async def test_room_gauge_exports_only_hot_rooms(self):
+        for room_id in range(metrics.HOT_ROOM_LIMIT + 5):
+            for _ in range(room_id + 1):
+                metrics.ROOM_CONNECTIONS.inc(str(room_id))
+        metrics.ROOM_CONNECTIONS.dec("0")
+        store = get_store()
+        await store.delete(queue_key("24"))
+        await store.rpush(queue_key("24"), {"content": "a"}, {"content": "b"})
+        lines = (await metrics.arender()).splitlines()
+
+        room_lines = [
+            line for line in lines if line.startswith("chat_room_open_connections{")
+        ]
+        self.assertEqual(len(room_lines), metrics.HOT_ROOM_LIMIT)
+        self.assertNotIn('chat_room_open_connections{room="0"} 0', lines)
+        self.assertIn('chat_room_open_connections{room="24"} 25', lines)
+        self.assertIn('chat_message_queue_depth{room="24"} 2', lines)
+
+
+class ConsumerMetricsTests(TransactionTestCase):
+    async def test_consumer_updates_metrics(self):
+        metrics.reset()
+        await get_store().flush()
+        user = await database_sync_to_async(User.objects.create_user)(
+            username="metrics_user", password="12345"
+        )
+        room = await database_sync_to_async(ChatRoom.objects.create)(
+            name="Metrics Room", room_type="group"
+        )
+        await database_sync_to_async(ChatRoomMember.objects.create)(
+            user=user, room=room
+        )
+        application = URLRouter(
+            [re_path(r"ws/chat/(?P<room_id>\d+)/$", ChatConsumer.as_asgi())]
+        )
+        communicator = WebsocketCommunicator(application, f"/ws/chat/{room.id}/")
+        communicator.scope["user"] = user
+
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(metrics.OPEN_CONNECTIONS.value("chat"), 1)
+        self.assertEqual(metrics.ROOM_CONNECTIONS.value(str(room.id)), 1)
+        self.assertEqual(metrics.CONNECT_LATENCY.count("chat"), 1)
+
+        await communicator.send_to(text_data=json.dumps({"message": "hello"}))
+        await communicator.send_to(text_data=json.dumps({"type": "heartbeat"}))
+        await communicator.disconnect()
+
+        self.assertEqual(metrics.MESSAGES.value(), 1)
+        self.assertEqual(metrics.HEARTBEATS.value("chat"), 1)
+        self.assertGreater(metrics.PRESENCE_BROADCASTS.value(), 0)
+        self.assertGreater(metrics.GROUP_SEND_LATENCY.count("chat_message"), 0)
+        self.assertEqual(metrics.OPEN_CONNECTIONS.value("chat"), 0)
+        self.assertEqual(metrics.ROOM_CONNECTIONS.value(str(room.id)), 0)
+
+        await database_sync_to_async(self.client.force_login)(
+            await database_sync_to_async(User.objects.create_user)(
+                username="metrics_staff", password="12345", is_staff=True
+            )
+        )
+        response = await database_sync_to_async(self.client.get)("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'chat_open_connections{consumer="chat"} 0', response.content.decode()
+        )
+
+
+@mock.patch.object(metrics, "METRICS_TOKEN", "scrape-secret")
+class MetricsAccessTests(TestCase):
+    def test_requires_token_or_staff_session(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="metrics"')
+
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(
+            "/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("chat_open_connections", response.content.decode())
+
+        user = User.objects.create_user(username="member", password="12345")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        user.is_staff = True
+        user.save(update_fields=["is_staff"])
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    @mock.patch.object(metrics, "METRICS_TOKEN", "")
+    def test_empty_token_never_matches(self):
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer ")
+        self.assertEqual(response.status_code, 403)
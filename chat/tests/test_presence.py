@@ -0,0 +1,116 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from chat import presence
+from chat.models import ChatRoom, ChatRoomMember
+from chat.store import GLOBAL_ONLINE_KEY, get_store, online_key
+
+
+class OnlineUsersApiTests(TestCase):
+    def setUp(self):
+        async_to_sync(get_store().flush)()
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="12345")
+            for i in range(6)
+        ]
+        self.me = self.users[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+        # user1: 1:1 채팅 상대, user2: 그룹 채팅방 참여자
+        direct = ChatRoom.objects.create(name="direct", room_type="direct")
+        group = ChatRoom.objects.create(name="group", room_type="group")
+        for user in (self.me, self.users[1]):
+            ChatRoomMember.objects.create(user=user, room=direct)
+        for user in (self.me, self.users[2]):
+            ChatRoomMember.objects.create(user=user, room=group)
+
+        online = [user.id for user in self.users[1:5]]
+        async_to_sync(get_store().sadd)(GLOBAL_ONLINE_KEY, *online)
+        async_to_sync(get_store().sadd)(online_key(group.id), self.users[2].id)
+
+    def _get(self, **params):
+        response = self.client.get("/api/users/online/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_through_global_presence(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3}
+            if cursor:
+                params["cursor"] = cursor
+            page = self._get(**params)
+            self.assertLessEqual(len(page["results"]), 3)
+            seen.extend(row["username"] for row in page["results"])
+            cursor = page["next"]
+            if cursor is None:
+                break
+
+        self.assertEqual(sorted(seen), ["user1", "user2", "user3", "user4"])
+
+    def test_scopes_and_counts(self):
+        contacts = self._get(scope="contacts")
+        self.assertEqual([row["username"] for row in contacts["results"]], ["user1"])
+        self.assertIsNone(contacts["next"])
+
+        rooms = self._get(scope="rooms")
+        self.assertEqual(
+            [row["username"] for row in rooms["results"]], ["user1", "user2"]
+        )
+
+        self.assertEqual(self._get(count="true"), {"count": 4})
+        self.assertEqual(self._get(scope="contacts", count="true"), {"count": 1})
+        self.assertEqual(self._get(scope="rooms", count="true"), {"count": 2})
+
+        response = self.client.get("/api/users/online/", {"scope": "everyone"})
+        self.assertEqual(response.status_code, 400)
+
+    @mock.patch.object(presence, "PRESENCE_CHECK_BATCH", 2)
+    def test_rooms_scope_pages_shared_members_without_channels(self):
+        # 채널 참여자는 제외하고, 같은 채팅방 참여자를 나누어 확인
+        channel = ChatRoom.objects.create(name="channel", room_type="channel")
+        group = ChatRoom.objects.create(name="big", room_type="group")
+        for user in self.users:
+            ChatRoomMember.objects.create(user=user, room=channel)
+        for user in (self.me, *self.users[3:]):
+            ChatRoomMember.objects.create(user=user, room=group)
+
+        seen, cursor = [], None
+        while True:
+            params = {"scope": "rooms", "limit": 1}
+            if cursor:
+                params["cursor"] = cursor
+            page = self._get(**params)
+            seen.extend(row["username"] for row in page["results"])
+            cursor = page["next"]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, ["user1", "user2", "user3", "user4"])
+        self.assertEqual(self._get(scope="rooms", count="true"), {"count": 4})
+        async_to_sync(get_store().sadd)(GLOBAL_ONLINE_KEY, self.users[5].id)
+        self.assertEqual(self._get(scope="rooms", count="true"), {"count": 5})
+
+    def test_user_rows_are_cached_in_one_batch(self):
+        ids = [user.id for user in self.users[1:4]]
+        with CaptureQueriesContext(connection) as queries:
+            rows = presence.user_rows(ids)
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertEqual([row["id"] for row in rows], ids)
+
+        with CaptureQueriesContext(connection) as queries:
+            presence.user_rows(ids)
+        self.assertEqual(len(queries.captured_queries), 0)
+
+        self.client.force_authenticate(self.users[1])
+        self.client.put("/api/users/update_profile/", {"first_name": "새 이름"})
+        self.assertEqual(presence.user_rows(ids[:1])[0]["first_name"], "새 이름")
@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from chat import archive, purge, snowflake
+from chat.models import ChatRoom, ChatRoomMember, Message
+
+
+class Interrupted(Exception):
+    pass
+
+
+class RoomPurgeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.room = ChatRoom.objects.create(name="Big Room", room_type="group")
+        ChatRoomMember.objects.create(user=self.user, room=self.room)
+        Message.objects.bulk_create(
+            Message(
+                id=snowflake.next_id(),
+                room=self.room,
+                sender=self.user,
+                content=f"message {i}",
+            )
+            for i in range(10)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_last_leave_hides_room_without_deleting_messages(self):
+        response = self.client.post(f"/api/rooms/{self.room.id}/leave/")
+        self.assertEqual(response.status_code, 200)
+
+        self.room.refresh_from_db()
+        self.assertIsNotNone(self.room.deleted_at)
+        self.assertEqual(Message.objects.filter(room=self.room).count(), 10)
+
+        self.assertEqual(self.client.get("/api/rooms/").json()["results"], [])
+        response = self.client.get(f"/api/rooms/{self.room.id}/")
+        self.assertEqual(response.status_code, 404)
+        for path in ("messages/", "users/"):
+            response = self.client.get(f"/api/rooms/{self.room.id}/{path}")
+            self.assertNotEqual(response.status_code, 200)
+        response = self.client.post(f"/api/rooms/{self.room.id}/join/")
+        self.assertNotEqual(response.status_code, 200)
+        self.assertFalse(ChatRoomMember.objects.filter(room=self.room).exists())
+
+    def test_purge_deletes_in_rate_limited_chunks_and_resumes(self):
+        purge.soft_delete_room(self.room.id)
+        delays = []
+
+        def interrupt(delay):
+            delays.append(delay)
+            raise Interrupted
+
+        # 첫 청크를 지운 뒤 중단
+        purger = purge.RoomPurger(chunk_size=4, rate_limit=2, sleep=interrupt)
+        with self.assertRaises(Interrupted):
+            purger.purge_room(self.room.id)
+        self.assertEqual(Message.objects.filter(room=self.room).count(), 6)
+        self.assertTrue(ChatRoom.objects.filter(id=self.room.id).exists())
+        self.assertGreater(delays[0], 1.9)
+
+        # 다시 실행하면 남은 메시지부터 이어서 지움
+        purger = purge.RoomPurger(chunk_size=4, rate_limit=2, sleep=delays.append)
+        with self.assertLogs("chat.purge", level="INFO"):
+            self.assertEqual(purger.purge_room(self.room.id), 6)
+        self.assertEqual(len(delays), 3)
+        self.assertFalse(Message.objects.filter(room=self.room).exists())
+        self.assertFalse(ChatRoom.objects.filter(id=self.room.id).exists())
+
+    def test_purge_deletes_archived_messages(self):
+        archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_root)
+        other = ChatRoom.objects.create(name="Other Room", room_type="group")
+        Message.objects.create(room=other, sender=self.user, content="남는 메시지")
+        month = date(2024, 1, 1)
+        archived = Message.objects.order_by("room_id", "created_at", "id")
+        with override_settings(MESSAGE_ARCHIVE_ROOT=archive_root):
+            writer = archive.SegmentWriter(month, block_rows=4)
+            for row in archived.values(
+                "id", "room_id", "sender_id", "created_at", "is_read", "content"
+            ):
+                writer.add(row)
+            writer.close()
+            archive.mark_done(month, writer.rows_written)
+            archived.delete()
+
+            purge.soft_delete_room(self.room.id)
+            purger = purge.RoomPurger(rate_limit=0)
+            with self.assertLogs("chat.purge", level="INFO"):
+                self.assertEqual(purger.purge_room(self.room.id), 10)
+
+            self.assertEqual(archive.count([self.room.id]), 0)
+            self.assertEqual(
+                [row["content"] for row in archive.iter_messages([other.id])],
+                ["남는 메시지"],
+            )
+        self.assertFalse(ChatRoom.objects.filter(id=self.room.id).exists())
+
+    def test_command_skips_live_rooms(self):
+        out = StringIO()
+        with self.assertNoLogs("chat.purge", level="INFO"):
+            call_command("purge_rooms", "--rate-limit", "0", stdout=out)
+        self.assertEqual(Message.objects.count(), 10)
+
+        purge.soft_delete_room(self.room.id)
+        with self.assertLogs("chat.purge", level="INFO"):
+            call_command("purge_rooms", "--rate-limit", "0", stdout=out)
+        self.assertIn("메시지 10건 삭제 완료", out.getvalue())
+        self.assertFalse(ChatRoom.objects.exists())
@@ -0,0 +1,155 @@
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chat import archive, exports, retention, snowflake
+from chat.history import find_message, room_history
+from chat.models import ChatRoom, Message
+
+POLICY = {"direct": 365, "group": 90}
+
+
+@mock.patch.object(retention, "MESSAGE_RETENTION_DAYS", POLICY)
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.direct = ChatRoom.objects.create(name="direct", room_type="direct")
+        self.group = ChatRoom.objects.create(name="group", room_type="group")
+        self.short = ChatRoom.objects.create(
+            name="short", room_type="group", retention_days=7
+        )
+        for room in (self.direct, self.group, self.short):
+            for days in (3, 30, 200, 400):
+                created_at = self.now - timedelta(days=days)
+                Message.objects.create(
+                    id=snowflake.from_datetime(created_at, low=room.id),
+                    room=room,
+                    sender=self.user,
+                    content=f"{days}일 전",
+                    created_at=created_at,
+                )
+
+    def remaining(self, room):
+        return sorted(
+            Message.objects.filter(room=room).values_list("content", flat=True)
+        )
+
+    def test_expires_per_room_type_and_room_override_in_batches(self):
+        delays = []
+        purger = retention.RetentionPurger(
+            chunk_size=1, rate_limit=10, sleep=delays.append
+        )
+        purger.run(now=self.now)
+
+        self.assertEqual(self.remaining(self.direct), ["200일 전", "30일 전", "3일 전"])
+        self.assertEqual(self.remaining(self.group), ["30일 전", "3일 전"])
+        self.assertEqual(self.remaining(self.short), ["3일 전"])
+
+        # 배치마다 IO 예산만큼 쉬고, 진행 상황을 기록
+        self.assertEqual(purger.deleted, 6)
+        self.assertEqual(len(delays), 6)
+        self.assertTrue(all(0 < delay <= 0.1 for delay in delays))
+        self.assertEqual(purger.lag, timedelta(days=393))
+        self.assertGreater(purger.rows_per_second, 0)
+
+        # 다시 실행하면 지울 것이 없음
+        self.assertEqual(retention.RetentionPurger().run(now=self.now).deleted, 0)
+
+    def test_rooms_without_policy_keep_messages(self):
+        channel = ChatRoom.objects.create(name="channel", room_type="channel")
+        Message.objects.create(
+            room=channel,
+            sender=self.user,
+            content="오래된 공지",
+            created_at=self.now - timedelta(days=1000),
+        )
+
+        self.assertIsNone(retention.layout_cutoff(self.now))
+        retention.RetentionPurger(rate_limit=0).run(now=self.now)
+        self.assertEqual(self.remaining(channel), ["오래된 공지"])
+
+    def test_drops_archive_months_expired_in_every_room(self):
+        archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_root)
+        old_month = date(2020, 1, 1)
+        recent_month = self.now.date().replace(day=1)
+        with override_settings(MESSAGE_ARCHIVE_ROOT=archive_root):
+            for month in (old_month, recent_month):
+                archive.SegmentWriter(month).close()
+                archive.mark_done(month, 0)
+
+            out = StringIO()
+            call_command("expire_messages", "--io-budget", "0", stdout=out)
+
+            self.assertEqual(archive.archived_months(), [recent_month])
+        self.assertIn("아카이브 세그먼트 삭제: 2020-01", out.getvalue())
+        self.assertIn("6건 삭제", out.getvalue())
+
+    def test_archived_messages_follow_room_retention(self):
+        archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_root)
+        month = self.now.date().replace(day=1)
+        archived = Message.objects.filter(room__in=[self.short, self.group])
+        rows = list(
+            archived.order_by("room_id", "created_at", "id").values(
+                "id", "room_id", "sender_id", "created_at", "is_read", "content"
+            )
+        )
+        expired_id = archived.get(room=self.short, content="30일 전").id
+        with override_settings(MESSAGE_ARCHIVE_ROOT=archive_root):
+            writer = archive.SegmentWriter(month, block_rows=2)
+            for row in rows:
+                writer.add(row)
+            writer.close()
+            archive.mark_done(month, writer.rows_written)
+            archived.delete()
+
+            # 정리 명령 전에도 아카이브 읽기 경로는 만료된 메시지를 거름
+            history = room_history(self.short.id)
+            self.assertEqual(history.count(), 1)
+            self.assertEqual([m.content for m in history[:10]], ["3일 전"])
+            self.assertIsNone(find_message(expired_id, [self.short.id]))
+            self.assertEqual(
+                [row[4] for row in exports.iter_room_rows(self.short.id)], ["3일 전"]
+            )
+
+            purger = retention.RetentionPurger(rate_limit=0).run(now=self.now)
+
+            # 7일 보존 채팅방 3건, 90일 보존 채팅방 2건
+            self.assertEqual(purger.archived_deleted, 5)
+            self.assertEqual(archive.count([self.short.id]), 1)
+            self.assertEqual(archive.count([self.group.id]), 2)
+            self.assertEqual(
+                [row["content"] for row in archive.iter_messages([self.group.id])],
+                ["3일 전", "30일 전"],
+            )
+            # 다시 실행해도 지울 아카이브 행이 없음
+            purger = retention.RetentionPurger(rate_limit=0).run(now=self.now)
+            self.assertEqual(purger.archived_deleted, 0)
+
+
+class RetentionApiTests(TestCase):
+    def test_create_room_with_retention(self):
+        client = APIClient()
+        client.force_authenticate(
+            User.objects.create_user(username="testuser", password="12345")
+        )
+        response = client.post(
+            "/api/rooms/", {"name": "임시", "retention_days": 30}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["retention_days"], 30)
+
+        response = client.post(
+            "/api/rooms/", {"name": "임시", "retention_days": 0}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
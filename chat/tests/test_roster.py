@@ -0,0 +1,64 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from chat import roster
+from chat.models import ChatRoom, ChatRoomMember
+from chat.store import get_store, online_key
+
+
+class RosterCacheTests(TransactionTestCase):
+    def setUp(self):
+        async_to_sync(get_store().flush)()
+        roster.rosters.clear()
+        self.owner = User.objects.create_user(username="owner", password="12345")
+        self.room = ChatRoom.objects.create(name="Roster Room", room_type="group")
+        ChatRoomMember.objects.create(user=self.owner, room=self.room)
+
+    def _status(self):
+        with CaptureQueriesContext(connection) as queries:
+            users = async_to_sync(roster.room_users_status)(self.room.id)
+        return users, len(queries.captured_queries)
+
+    def test_cached_roster_merges_presence_without_db_query(self):
+        users, queries = self._status()
+        self.assertEqual(queries, 1)
+        self.assertFalse(users[0]["is_online"])
+
+        async_to_sync(get_store().sadd)(online_key(self.room.id), self.owner.id)
+        users, queries = self._status()
+
+        self.assertEqual(queries, 0)
+        self.assertEqual(
+            users, [{"id": self.owner.id, "username": "owner", "is_online": True}]
+        )
+
+    def test_join_and_leave_views_invalidate_roster(self):
+        self._status()
+        joiner = User.objects.create_user(username="joiner", password="12345")
+        client = APIClient()
+        client.force_authenticate(joiner)
+
+        client.post(f"/api/rooms/{self.room.id}/join/")
+        users, queries = self._status()
+        self.assertEqual(queries, 1)
+        self.assertEqual({user["username"] for user in users}, {"owner", "joiner"})
+
+        client.post(f"/api/rooms/{self.room.id}/leave/")
+        users, _ = self._status()
+        self.assertEqual([user["username"] for user in users], ["owner"])
+
+    def test_least_recently_used_room_is_evicted(self):
+        cache = roster.RosterCache(limit=2)
+        cache.put(1, 1, ())
+        cache.put(2, 1, ())
+        cache.get(1, 1)
+        cache.put(3, 1, ())
+
+        self.assertIsNone(cache.get(2, 1))
+        self.assertEqual(cache.get(1, 1), ())
+        self.assertIsNone(cache.get(1, 2))
+        self.assertEqual(len(cache), 2)
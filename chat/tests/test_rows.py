@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from chat import rows, snowflake
+from chat.history import MessageHistory, instance_values, message_from_row
+from chat.models import ChatRoom, ChatRoomMember, Message
+from chat.serializers import (
+    ChatRoomMemberSerializer,
+    ChatRoomSerializer,
+    MessageSerializer,
+)
+
+
+class RowMapperTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="writer", password="12345", first_name="글쓴이", email="w@x.y"
+        )
+        self.room = ChatRoom.objects.create(
+            name="room", room_type="group", retention_days=30
+        )
+        ChatRoomMember.objects.create(user=self.user, room=self.room, is_online=True)
+        for i in range(3):
+            created_at = timezone.now() - timedelta(minutes=i)
+            Message.objects.create(
+                id=snowflake.from_datetime(created_at),
+                room=self.room,
+                sender=self.user,
+                content=f"메시지 {i}",
+                created_at=created_at,
+            )
+
+    def test_matches_drf_serializers(self):
+        messages = Message.objects.order_by("id")
+        self.assertEqual(
+            rows.MESSAGE.map(rows.MESSAGE.rows(messages)),
+            MessageSerializer(messages, many=True).data,
+        )
+
+        rooms = ChatRoom.objects.all()
+        self.assertEqual(
+            rows.ROOM.map(rows.ROOM.rows(rooms)),
+            ChatRoomSerializer(rooms, many=True).data,
+        )
+
+        members = ChatRoomMember.objects.filter(room=self.room)
+        expected = [
+            {**member["user"], "is_online": member["is_online"]}
+            for member in ChatRoomMemberSerializer(members, many=True).data
+        ]
+        self.assertEqual(rows.MEMBER.map(rows.MEMBER.rows(members)), expected)
+
+    def test_archived_messages_use_same_columns(self):
+        message = Message.objects.select_related("sender").first()
+        archived = message_from_row(
+            {
+                "id": message.id,
+                "room_id": message.room_id,
+                "sender_id": message.sender_id,
+                "content": message.content,
+                "created_at": message.created_at,
+                "is_read": False,
+            }
+        )
+        archived.sender = self.user
+        self.assertEqual(
+            instance_values(archived, rows.MESSAGE.columns),
+            rows.MESSAGE.rows(Message.objects.filter(id=message.id)).get(),
+        )
+
+        history = MessageHistory(
+            Message.objects.order_by("-id"), [self.room.id]
+        ).values_list(*rows.MESSAGE.columns)
+        self.assertEqual(
+            [row[rows.MESSAGE.columns.index("content")] for row in history[:2]],
+            ["메시지 0", "메시지 1"],
+        )
+
+    def test_api_responses(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(f"/api/rooms/{self.room.id}/messages/")
+        self.assertEqual(
+            [message["content"] for message in response.json()["results"]],
+            ["메시지 2", "메시지 1", "메시지 0"],
+        )
+        self.assertEqual(response.json()["results"][0]["sender"]["username"], "writer")
+
+        response = client.get(f"/api/rooms/{self.room.id}/users/")
+        self.assertEqual(response.json()["users"][0]["is_online"], True)
+
+        response = client.get("/api/rooms/")
+        self.assertEqual(response.json()["results"][0]["retention_days"], 30)
+
+    def test_renderer_matches_drf_and_falls_back_for_other_types(self):
+        renderer = rows.RowJSONRenderer()
+        for data in ({"이름": [1, None, 1.5, "\u2028"]}, {"at": self.room.created_at}):
+            self.assertEqual(renderer.render(data), JSONRenderer().render(data))
@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase
+from django.urls import re_path
+
+from chat import roster, snapshot, snowflake
+from chat.consumers import ChatConsumer
+from chat.models import ChatRoom, ChatRoomMember, Message
+from chat.store import get_store, inflight_key, queue_key
+
+
+class HelloFrameTests(TestCase):
+    def setUp(self):
+        async_to_sync(get_store().flush)()
+        roster.rosters.clear()
+        self.me = User.objects.create_user(username="me", password="12345")
+        self.friend = User.objects.create_user(username="friend", password="12345")
+        self.room = ChatRoom.objects.create(name="room", room_type="group")
+        for user in (self.me, self.friend):
+            ChatRoomMember.objects.create(user=user, room=self.room)
+
+        self.ids = []
+        for i, sender in enumerate([self.me, self.friend, self.friend]):
+            message_id = snowflake.next_id()
+            Message.objects.create(
+                id=message_id,
+                room=self.room,
+                sender=sender,
+                content=f"saved {i}",
+                created_at=snowflake.to_datetime(message_id),
+            )
+            self.ids.append(message_id)
+
+        # 아직 DB에 저장되지 않은 메시지
+        self.queued_id = snowflake.next_id()
+        async_to_sync(get_store().rpush)(
+            queue_key(self.room.id),
+            {"id": self.queued_id, "sender": self.friend.id, "content": "queued"},
+        )
+
+    def hello(self, last_read=None):
+        return json.loads(
+            async_to_sync(snapshot.hello_frame)(self.room.id, self.me.id, last_read)
+        )
+
+    def test_snapshot_uses_fixed_number_of_queries(self):
+        # 참여자 목록 + 최근 메시지 + 읽지 않은 수
+        with self.assertNumQueries(3):
+            frame = self.hello()
+        # 참여자 목록은 캐시에서 읽음
+        with self.assertNumQueries(2):
+            self.hello()
+
+        self.assertEqual(frame["type"], "hello")
+        self.assertCountEqual(
+            [user["username"] for user in frame["users"]], ["me", "friend"]
+        )
+        self.assertEqual(
+            [message["message"] for message in frame["messages"]],
+            ["saved 0", "saved 1", "saved 2", "queued"],
+        )
+        self.assertEqual(frame["messages"][-1]["user"], "friend")
+        self.assertEqual(frame["seq"], self.queued_id)
+        self.assertIsNone(frame["last_read_message_id"])
+        self.assertEqual(frame["unread_count"], 3)
+
+    def test_includes_messages_being_saved(self):
+        # 메시지 워커가 큐에서 꺼냈지만 아직 커밋하지 않은 메시지
+        async_to_sync(get_store().begin_batch)(
+            queue_key(self.room.id), inflight_key(self.room.id), 100, ttl=60
+        )
+        self.assertEqual(
+            [message["id"] for message in self.hello()["messages"]],
+            [*self.ids, self.queued_id],
+        )
+
+    def test_unread_count_follows_read_cursor(self):
+        self.assertEqual(self.hello(last_read=self.ids[1])["unread_count"], 2)
+        self.assertEqual(self.hello(last_read=self.queued_id)["unread_count"], 0)
+
+
+class HelloConsumerTests(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.application = URLRouter(
+            [re_path(r"ws/chat/(?P<room_id>\d+)/$", ChatConsumer.as_asgi())]
+        )
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password="12345")
+        self.room = ChatRoom.objects.create(name="room", room_type="group")
+        ChatRoomMember.objects.create(user=self.user, room=self.room)
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(
+            self.application, f"/ws/chat/{self.room.id}/"
+        )
+        communicator.scope["user"] = self.user
+        communicator.scope["url_route"] = {"kwargs": {"room_id": str(self.room.id)}}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def test_connect_sends_hello_first_and_read_moves_cursor(self):
+        await get_store().flush()
+        communicator = await self.connect()
+        hello = await asyncio.wait_for(communicator.receive_json_from(), timeout=1)
+        self.assertEqual(hello["type"], "hello")
+        self.assertEqual(hello["users"][0]["username"], "reader")
+        self.assertTrue(hello["users"][0]["is_online"])
+
+        # 읽음 위치는 앞으로만 이동
+        for message_id in (200 << 22, 100 << 22):
+            await communicator.send_json_to({"type": "read", "message_id": message_id})
+        await communicator.send_json_to({"type": "read", "message_id": "200"})
+        while True:
+            frame = await asyncio.wait_for(communicator.receive_json_from(), timeout=1)
+            if frame["type"] == "error":
+                break
+        member = await ChatRoomMember.objects.aget(user=self.user, room=self.room)
+        self.assertEqual(member.last_read_message_id, 200 << 22)
+        await communicator.disconnect()
+
+        communicator = await self.connect()
+        hello = await asyncio.wait_for(communicator.receive_json_from(), timeout=1)
+        self.assertEqual(hello["last_read_message_id"], 200 << 22)
+        await communicator.disconnect()
@@ -0,0 +1,180 @@
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from chat import snowflake
+from chat.models import ChatRoom, ChatRoomMember, Message
+from chat.store import MemoryStore
+
+
+class SnowflakeTests(SimpleTestCase):
+    def test_ids_are_unique_and_time_sorted(self):
+        generator = snowflake.Generator(node_id=7)
+        ids = [generator.next_id() for _ in range(10000)]
+
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertTrue(all(snowflake.is_snowflake(i) for i in ids))
+        created = snowflake.to_datetime(ids[0])
+        self.assertLess(abs(datetime.now(timezone.utc) - created), timedelta(seconds=5))
+
+    def test_sequence_overflow_and_clock_skew_keep_order(self):
+        generator = snowflake.Generator(node_id=1)
+        with mock.patch(
+            "chat.snowflake.time.time_ns", return_value=1_800_000_000_000 * 10**6
+        ):
+            ids = [generator.next_id() for _ in range(snowflake.MAX_SEQUENCE + 2)]
+        # 시계가 뒤로 가도 ID는 줄어들지 않음
+        with mock.patch(
+            "chat.snowflake.time.time_ns", return_value=1_799_999_999_000 * 10**6
+        ):
+            ids.append(generator.next_id())
+
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertEqual(snowflake.timestamp_ms(ids[-1]), 1_800_000_000_001)
+
+    def test_historical_id_order_matches_created_at_order(self):
+        times = [
+            datetime(2005, 3, 1, tzinfo=timezone.utc),
+            datetime(2023, 12, 15, tzinfo=timezone.utc),
+            datetime(2023, 12, 31, 23, 59, 59, tzinfo=timezone.utc),
+            datetime(2024, 1, 5, tzinfo=timezone.utc),
+            datetime(2024, 2, 1, tzinfo=timezone.utc),
+        ]
+        ids = [snowflake.historical_id(value, low=5) for value in times]
+
+        self.assertEqual(ids, sorted(ids))
+        self.assertTrue(all(snowflake.is_snowflake(i) for i in ids))
+        self.assertEqual([snowflake.to_datetime(i) for i in ids], times)
+        self.assertEqual(ids[-1], snowflake.from_datetime(times[-1], low=5))
+
+        # 기준 시각 이전은 시간순 ID를 만들 수 없으므로 거부
+        with self.assertRaises(ValueError):
+            snowflake.historical_id(datetime(1999, 12, 31, tzinfo=timezone.utc))
+
+    def test_invalid_node_id(self):
+        with self.assertRaises(ValueError):
+            snowflake.Generator(node_id=snowflake.MAX_NODE + 1)
+
+
+class NodeLeaseTests(SimpleTestCase):
+    def test_leases_are_unique_until_released_or_expired(self):
+        store = MemoryStore()
+        leases = [snowflake.NodeLease(store) for _ in range(snowflake.MAX_NODE + 1)]
+        self.assertEqual(
+            sorted(lease.node_id for lease in leases),
+            list(range(snowflake.MAX_NODE + 1)),
+        )
+        with self.assertRaises(RuntimeError):
+            snowflake.NodeLease(store)
+
+        # 연장 시점에 아직 점유 중이면 같은 번호를 유지
+        lease, idle = leases[3], leases[5]
+        node_id = lease.node_id
+        lease.renew_at = 0
+        self.assertFalse(lease.refresh())
+        self.assertEqual(lease.node_id, node_id)
+
+        # 만료된 사이 다른 프로세스가 가져갔으면 새 번호를 임대
+        for expired in (lease, idle):
+            store._expires[f"{snowflake.NODE_LEASE_PREFIX}{expired.node_id}"] = 0
+        other = snowflake.NodeLease(store)
+        lease.renew_at = 0
+        self.assertTrue(lease.refresh())
+        self.assertEqual({other.node_id, lease.node_id}, {node_id, idle.node_id})
+
+    def test_lease_is_renewed_in_background(self):
+        store = MemoryStore()
+        lease = snowflake.NodeLease(store, ttl=0.2)
+        changes = []
+        lease.start(changes.append)
+        self.addCleanup(lease.stop)
+
+        # 만료 시간이 지나도 백그라운드에서 연장되어 유효
+        time.sleep(0.3)
+        self.assertTrue(lease.valid())
+        self.assertEqual(changes, [])
+
+        # 다른 프로세스가 가져갔으면 새 번호를 임대하고 알림
+        node_id = lease.node_id
+        store._data[f"{snowflake.NODE_LEASE_PREFIX}{node_id}"] = "other"
+        time.sleep(0.2)
+        self.assertEqual(changes, [lease.node_id])
+        self.assertNotEqual(lease.node_id, node_id)
+
+    @override_settings(SNOWFLAKE_NODE_ID=None)
+    def test_next_id_does_not_call_store(self):
+        store = MemoryStore()
+        with (
+            mock.patch.object(snowflake, "_generator", None),
+            mock.patch.object(snowflake, "_lease", None),
+            mock.patch.object(snowflake, "get_store", return_value=store),
+        ):
+            snowflake.get_generator()
+            lease = snowflake._lease
+            self.addCleanup(lease.stop)
+
+            with (
+                mock.patch.object(store, "renew_lease") as renew,
+                mock.patch.object(store, "lease") as acquire,
+            ):
+                lease.renew_at = 0
+                snowflake.next_id()
+            renew.assert_not_called()
+            acquire.assert_not_called()
+
+            # 연장하지 못한 채 만료되면 만료된 번호로 ID를 만들지 않음
+            lease.expires_at = 0
+            with self.assertRaises(RuntimeError):
+                snowflake.next_id()
+
+
+class MessageCursorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.chat_room = ChatRoom.objects.create(name="Test Room", room_type="group")
+        ChatRoomMember.objects.create(user=self.user, room=self.chat_room)
+        self.messages = []
+        for i in range(3):
+            message_id = snowflake.next_id()
+            self.messages.append(
+                Message.objects.create(
+                    id=message_id,
+                    room=self.chat_room,
+                    sender=self.user,
+                    content=f"message {i}",
+                    created_at=snowflake.to_datetime(message_id),
+                )
+            )
+        self.client.force_login(self.user)
+
+    def _contents(self, before):
+        response = self.client.get(
+            f"/api/rooms/{self.chat_room.id}/messages/", {"before": before}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [m["content"] for m in response.json()["results"]]
+
+    def test_before_cursor_pages_by_message_id(self):
+        self.assertEqual(
+            self._contents(self.messages[2].id), ["message 0", "message 1"]
+        )
+        self.assertEqual(self._contents(self.messages[0].id), [])
+
+        # 아직 저장되지 않은 (브로드캐스트로만 받은) ID도 커서로 쓸 수 있음
+        self.assertEqual(
+            self._contents(snowflake.next_id()),
+            ["message 0", "message 1", "message 2"],
+        )
+
+    def test_legacy_cursor_pages_by_id_and_invalid_cursor_is_rejected(self):
+        # 기존 자동 증가 ID는 스노플레이크 ID보다 작으므로 그보다 오래된 메시지만 해당
+        self.assertEqual(self._contents("12"), [])
+
+        for before in ("abc", "-1"):
+            response = self.client.get(
+                f"/api/rooms/{self.chat_room.id}/messages/", {"before": before}
+            )
+            self.assertEqual(response.status_code, 400)
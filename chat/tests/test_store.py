@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from chat.store import MemoryStore
+
+
+class MemoryStoreTests(SimpleTestCase):
+    async def test_queue_pops_in_order_and_requeues_at_front(self):
+        store = MemoryStore()
+        await store.rpush("q", 1, 2, 3, ttl=60)
+
+        popped = await store.lpop("q", 2)
+        await store.lpush_front("q", popped)
+
+        self.assertEqual(popped, [1, 2])
+        self.assertEqual(await store.lpop("q", 10), [1, 2, 3])
+        self.assertEqual(await store.llen_many(["q", "missing"]), [0, 0])
+
+    async def test_batches_stay_inflight_until_finished_or_requeued(self):
+        store = MemoryStore()
+        await store.rpush("q", {"id": 1}, {"id": 2}, {"id": 3}, {"id": 4}, ttl=60)
+
+        with mock.patch("chat.store.time.time_ns", return_value=100 * 10**9):
+            first, moved = await store.begin_batch("q", "inflight", 2, ttl=60)
+        self.assertEqual(moved, [{"id": 1}, {"id": 2}])
+        with mock.patch("chat.store.time.time_ns", return_value=150 * 10**9):
+            second, _ = await store.begin_batch("q", "inflight", 1, ttl=60)
+        self.assertEqual(
+            await store.pending_entries("q", "inflight", 10),
+            [{"id": 1}, {"id": 2}, {"id": 3}, {"id": 4}],
+        )
+
+        # 오래된 배치만 큐 앞쪽에 되돌리고, 되돌린 배치는 다시 되돌리지 않음
+        with mock.patch("chat.store.time.time_ns", return_value=160 * 10**9):
+            self.assertEqual(await store.requeue_stale("inflight", "q", 30, ttl=60), 2)
+        self.assertEqual(await store.requeue_batch("inflight", "q", first, ttl=60), 0)
+        self.assertEqual(await store.lpop("q", 10), [{"id": 1}, {"id": 2}, {"id": 4}])
+
+        await store.finish_batch("inflight", second)
+        self.assertEqual(await store.pending_entries("q", "inflight", 10), [])
+
+    async def test_sets_expire_after_ttl(self):
+        store = MemoryStore()
+        with mock.patch("chat.store.time.monotonic", return_value=100):
+            await store.sadd("online", 1, 2, ttl=30)
+            await store.srem("online", 2, ttl=30)
+            self.assertEqual(await store.smembers("online"), {1})
+
+        with mock.patch("chat.store.time.monotonic", return_value=131):
+            self.assertEqual(await store.smembers_many(["online"]), [set()])
+
+    async def test_connection_counters_stop_at_zero_and_expire(self):
+        store = MemoryStore()
+        with mock.patch("chat.store.time.monotonic", return_value=100):
+            self.assertEqual(await store.incr_many(["u", "r"], ttl=60), [1, 1])
+            self.assertEqual(await store.incr_many(["u"], ttl=60), [2])
+            self.assertEqual(await store.decr_many(["u", "r"], ttl=60), [1, 0])
+            self.assertEqual(await store.decr_many(["r"], ttl=60), [0])
+
+        # 하트비트가 없으면 남은 연결 수도 만료됨
+        with mock.patch("chat.store.time.monotonic", return_value=161):
+            self.assertEqual(await store.decr_many(["u"], ttl=60), [0])
+
+    async def test_claim_keeps_first_value_until_ttl(self):
+        store = MemoryStore()
+        with mock.patch("chat.store.time.monotonic", return_value=100):
+            self.assertIsNone(await store.claim("k", "1", ttl=10))
+            self.assertEqual(await store.claim("k", "2", ttl=10), "1")
+
+        with mock.patch("chat.store.time.monotonic", return_value=111):
+            self.assertIsNone(await store.claim("k", "3", ttl=10))
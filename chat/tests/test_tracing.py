@@ -0,0 +1,91 @@
+import contextvars
+import io
+import json
+import logging
+import queue
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from chat import tracing
+
+
+class SpanTests(SimpleTestCase):
+    def test_sampled_spans_share_trace_and_link_parent(self):
+        with mock.patch.object(tracing, "SAMPLE_RATE", 1.0):
+            with self.assertLogs("chat.trace", level="INFO") as logs:
+                with tracing.span("outer", room=1) as outer:
+                    with tracing.span("inner") as inner:
+                        pass
+
+        inner_record, outer_record = logs.records
+        self.assertEqual(inner_record.span, "inner")
+        self.assertEqual(inner_record.trace_id, outer.trace_id)
+        self.assertEqual(inner_record.parent_id, outer.span_id)
+        self.assertEqual(inner.trace_id, outer.trace_id)
+        self.assertEqual(outer_record.attrs, {"room": 1})
+        self.assertIsNone(tracing.current_span())
+
+    def test_unsampled_spans_are_not_logged(self):
+        with mock.patch.object(tracing, "SAMPLE_RATE", 0.0):
+            with self.assertNoLogs("chat.trace", level="INFO"):
+                with tracing.span("outer"):
+                    with tracing.span("inner") as inner:
+                        pass
+        self.assertFalse(inner.sampled)
+        self.assertIsNotNone(inner.duration)
+
+    def test_slow_tracker_keeps_slowest_per_interval(self):
+        tracker = tracing.SlowSpanTracker(limit=2, interval=60)
+        for index, duration in enumerate([0.3, 0.1, 0.5, 0.2]):
+            span = tracing.span(f"op{index}")
+            span.trace_id = str(index)
+            span.duration = duration
+            tracker.add(span)
+
+        with self.assertLogs("chat.trace.slow", level="INFO") as logs:
+            slowest = tracker.dump()
+
+        self.assertEqual([item["span"] for item in slowest], ["op2", "op0"])
+        self.assertEqual(logs.records[0].slowest, slowest)
+        self.assertEqual(tracker.snapshot(), [])
+
+
+class AsyncLogHandlerTests(SimpleTestCase):
+    def test_writes_json_with_trace_context_in_background(self):
+        stream = io.StringIO()
+        handler = tracing.AsyncLogHandler(stream=stream)
+        handler.setFormatter(tracing.JSONFormatter())
+        logger = logging.getLogger("chat.tests.tracing")
+        logger.addHandler(handler)
+        logger.propagate = False
+
+        def work():
+            # 바인딩이 다른 테스트로 새지 않도록 복사한 컨텍스트에서 실행
+            tracing.bind(connection="conn-1")
+            with tracing.span("work") as span:
+                logger.warning("경고 %s", "메시지")
+            return span
+
+        try:
+            span = contextvars.copy_context().run(work)
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+        record = json.loads(stream.getvalue())
+        self.assertEqual(record["message"], "경고 메시지")
+        self.assertEqual(record["trace_id"], span.trace_id)
+        self.assertEqual(record["context"], {"connection": "conn-1"})
+
+    def test_drops_records_instead_of_blocking_when_full(self):
+        handler = tracing.AsyncLogHandler(stream=io.StringIO(), queue_size=1)
+        handler.listener.stop()
+        handler.listener = None
+        handler.queue = queue.Queue(1)
+        record = logging.makeLogRecord({"msg": "x"})
+        handler.emit(record)
+        handler.emit(record)
+        handler.close()
+
+        self.assertEqual(handler.dropped, 1)
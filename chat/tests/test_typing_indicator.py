@@ -0,0 +1,35 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from chat.typing_indicator import TypingCoalescer
+
+
+class RecordingLayer:
+    def __init__(self):
+        self.sent = []
+
+    async def group_send(self, group, event):
+        self.sent.append(event["users"])
+
+
+class TypingCoalescerTests(SimpleTestCase):
+    async def test_stop_from_one_connection_keeps_other_connections_typing(self):
+        coalescer = TypingCoalescer(interval=0.05)
+        layer = RecordingLayer()
+
+        coalescer.start(layer, "chat_1", "tab-1", "alice")
+        coalescer.start(layer, "chat_1", "tab-2", "alice")
+        coalescer.start(layer, "chat_1", "tab-3", "bob")
+        await asyncio.sleep(0.01)
+        self.assertEqual(layer.sent, [["alice", "bob"]])
+
+        # 다른 탭이 아직 입력 중이면 입력 중 상태가 유지되고 알리지도 않음
+        coalescer.stop(layer, "chat_1", "tab-1")
+        self.assertEqual(coalescer.typers("chat_1"), ["alice", "bob"])
+        await asyncio.sleep(0.1)
+        self.assertEqual(layer.sent, [["alice", "bob"]])
+
+        coalescer.stop(layer, "chat_1", "tab-2")
+        await asyncio.sleep(0.01)
+        self.assertEqual(layer.sent, [["alice", "bob"], ["bob"]])
@@ -0,0 +1,287 @@
+"""구조화 로깅과 샘플링 기반 트레이싱
+
+컨슈머의 연결/수신, 그룹 전파, DB/캐시 호출을 스팬(span)으로 감싸 소요 시간을
+측정합니다.
+
+- 루트 스팬마다 ``TRACE_SAMPLE_RATE`` 확률로 샘플링하며, 하위 스팬은 부모의
+  결정을 따릅니다. 샘플링된 스팬만 ``chat.trace`` 로거로 기록됩니다.
+- 샘플링 여부와 관계없이 모든 스팬의 소요 시간을 보고
+  ``TRACE_SLOW_INTERVAL`` 초마다 가장 느렸던 ``TRACE_SLOW_TOP_N`` 개를
+  ``chat.trace.slow`` 로거로 내보냅니다.
+- 로그 레코드에는 현재 트레이스/스팬 ID와 ``bind()`` 로 묶은 연결 정보가 붙어
+  같은 연결이나 요청에서 나온 로그를 이어 볼 수 있습니다.
+
+``AsyncLogHandler`` 는 레코드를 큐에 넣기만 하고 포맷/출력은 백그라운드
+스레드에서 처리하므로 이벤트 루프가 stdout/stderr 쓰기로 멈추지 않습니다.
+"""
+
+import contextvars
+import copy
+import functools
+import heapq
+import inspect
+import itertools
+import json
+import logging
+import queue
+import random
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+SAMPLE_RATE = getattr(settings, "TRACE_SAMPLE_RATE", 0.01)
+SLOW_TOP_N = getattr(settings, "TRACE_SLOW_TOP_N", 10)
+SLOW_INTERVAL = getattr(settings, "TRACE_SLOW_INTERVAL", 60)
+
+trace_logger = logging.getLogger("chat.trace")
+slow_logger = logging.getLogger("chat.trace.slow")
+
+_current_span = contextvars.ContextVar("chat_current_span", default=None)
+_bound_fields = contextvars.ContextVar("chat_bound_fields", default={})
+
+
+def new_id():
+    """16자리 16진수 ID"""
+    return "%016x" % random.getrandbits(64)
+
+
+def bind(**fields):
+    """현재 컨텍스트(연결 태스크)의 이후 로그/스팬에 필드를 붙입니다."""
+    _bound_fields.set({**_bound_fields.get(), **fields})
+
+
+def current_span():
+    return _current_span.get()
+
+
+class Span:
+    """``with`` 블록 하나의 소요 시간을 측정하는 스팬"""
+
+    __slots__ = (
+        "name",
+        "attrs",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "sampled",
+        "started",
+        "duration",
+        "_token",
+    )
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.duration = None
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is None:
+            self.trace_id = new_id()
+            self.parent_id = None
+            self.sampled = random.random() < SAMPLE_RATE
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.sampled = parent.sampled
+        # 샘플링되지 않은 스팬은 ID 생성 비용을 아낌
+        self.span_id = new_id() if self.sampled else None
+        self._token = _current_span.set(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.started
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        if self.sampled and trace_logger.isEnabledFor(logging.INFO):
+            trace_logger.info(
+                self.name,
+                extra={
+                    "span": self.name,
+                    "trace_id": self.trace_id,
+                    "span_id": self.span_id,
+                    "parent_id": self.parent_id,
+                    "duration_ms": round(self.duration * 1000, 3),
+                    "attrs": self.attrs,
+                },
+            )
+        slow_spans.add(self)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def span(name, **attrs):
+    """스팬 컨텍스트 매니저 (동기/비동기 코드 모두에서 ``with`` 로 사용)"""
+    return Span(name, attrs)
+
+
+def traced(name):
+    """함수 호출 전체를 스팬으로 감싸는 데코레이터
+
+    ``database_sync_to_async`` 와 함께 쓸 때는 안쪽(동기 함수)에 적용해야
+    스레드에서 실제 DB 작업 시간을 측정합니다.
+    """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with Span(name, {}):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class SlowSpanTracker:
+    """구간(interval)별 가장 느린 스팬 N개를 유지하고 구간이 끝나면 기록합니다."""
+
+    def __init__(self, limit=SLOW_TOP_N, interval=SLOW_INTERVAL):
+        self.limit = limit
+        self.interval = interval
+        self._heap = []
+        self._seq = itertools.count()
+        self._window_end = time.monotonic() + interval
+
+    def add(self, span):
+        if time.monotonic() >= self._window_end:
+            self.dump()
+        entry = (span.duration, next(self._seq), span)
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+        elif span.duration > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def snapshot(self):
+        """현재 구간의 느린 스팬 목록 (느린 순)"""
+        return [
+            {
+                "span": span.name,
+                "trace_id": span.trace_id,
+                "duration_ms": round(duration * 1000, 3),
+                "attrs": span.attrs,
+            }
+            for duration, _, span in sorted(self._heap, reverse=True)
+        ]
+
+    def dump(self):
+        """현재 구간의 느린 스팬을 기록하고 새 구간을 시작합니다."""
+        slowest = self.snapshot()
+        self._heap = []
+        self._window_end = time.monotonic() + self.interval
+        if slowest:
+            slow_logger.info(
+                "가장 느린 작업 %d건",
+                len(slowest),
+                extra={"interval": self.interval, "slowest": slowest},
+            )
+        return slowest
+
+
+slow_spans = SlowSpanTracker()
+
+
+class TraceContextFilter(logging.Filter):
+    """로그 레코드에 현재 트레이스 ID와 ``bind()`` 필드를 붙이는 필터
+
+    핸들러 필터는 로그를 남긴 스레드/태스크에서 실행되므로 해당 컨텍스트의
+    값을 읽을 수 있습니다.
+    """
+
+    def filter(self, record):
+        current = _current_span.get()
+        if current is not None and not hasattr(record, "trace_id"):
+            record.trace_id = current.trace_id
+            record.span_id = current.span_id
+        bound = _bound_fields.get()
+        if bound:
+            record.context = bound
+        return True
+
+
+class AsyncLogHandler(QueueHandler):
+    """로그 레코드를 제한된 큐에 넣고 백그라운드 스레드에서 출력하는 핸들러
+
+    큐가 가득 차면 레코드를 버리고 ``dropped`` 를 증가시키므로 로그를 남기는
+    쪽(이벤트 루프)은 절대 블로킹되지 않습니다. 지정한 포매터는 백그라운드
+    스레드의 출력 핸들러에 적용됩니다.
+    """
+
+    def __init__(self, stream=None, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.target = logging.StreamHandler(stream)
+        self.dropped = 0
+        self.addFilter(TraceContextFilter())
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # 같은 프로세스 안에서만 전달하므로 예외 정보는 그대로 두고
+        # 인자만 메시지에 반영해 포맷(직렬화)은 백그라운드 스레드에 맡김
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
+
+
+STRUCTURED_FIELDS = (
+    "trace_id",
+    "span_id",
+    "parent_id",
+    "span",
+    "duration_ms",
+    "attrs",
+    "context",
+    "interval",
+    "slowest",
+)
+
+
+class JSONFormatter(logging.Formatter):
+    """한 줄짜리 JSON 로그 포매터"""
+
+    def format(self, record):
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
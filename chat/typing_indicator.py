@@ -0,0 +1,93 @@
+"""입력 중(typing) 표시
+
+입력 중 상태는 저장할 필요가 없는 일시적인 정보이므로 DB나 메시지 큐를
+거치지 않고 채널 레이어로만 전달합니다. 사람이 많이 입력하는 방에서도
+채널 레이어(Redis) 작업이 늘어나지 않도록 세 단계로 줄입니다.
+
+- 연결(사용자)마다 입력 시작 이벤트는 ``TYPING_THROTTLE`` 초에 한 번만
+  처리합니다. (컨슈머에서 처리)
+- 워커 프로세스는 방마다 입력 중인 사용자를 모아 ``TYPING_INTERVAL`` 초에
+  최대 한 번만 ``typing_update`` 이벤트를 보냅니다. 입력 중인 사람 수와
+  관계없이 방당 Redis 작업은 프로세스 수에 비례합니다.
+- 입력 중지 이벤트가 오지 않아도 마지막 입력 시작 후 ``TYPING_TTL`` 초가
+  지나면 입력 중지로 봅니다. 받는 쪽도 같은 TTL로 상태를 만료시킵니다.
+"""
+
+import functools
+import json
+import time
+
+from . import metrics, tracing
+from .fanout import Debouncer
+
+TYPING_INTERVAL = 1  # 채팅방별 입력 중 상태 전파 간격 (초)
+TYPING_THROTTLE = 3  # 연결별 입력 시작 이벤트 최소 간격 (초)
+TYPING_TTL = 6  # 마지막 입력 시작 이후 입력 중으로 보는 시간 (초)
+
+# 받는 쪽에서 워커 프로세스별 입력 중 목록을 구분하기 위한 ID
+SOURCE_ID = tracing.new_id()
+
+
+def typing_frame(users, ttl=TYPING_TTL):
+    return json.dumps({"type": "typing", "users": users, "ttl": ttl})
+
+
+class TypingCoalescer:
+    """프로세스 안에서 방별 입력 중 사용자를 모아 주기적으로 전파합니다.
+
+    입력 상태는 연결(채널 이름)별로 기록하므로, 같은 사용자가 여러 탭에서
+    접속한 경우 한 탭의 입력 중지가 다른 탭의 입력 중 상태를 지우지 않습니다.
+    """
+
+    def __init__(self, interval=TYPING_INTERVAL, ttl=TYPING_TTL):
+        self.ttl = ttl
+        self._typers = {}  # 그룹 -> {채널 이름: (사용자 이름, 만료 시각)}
+        self._debouncer = Debouncer(interval)
+
+    def start(self, channel_layer, group, channel_name, username):
+        self._typers.setdefault(group, {})[channel_name] = (
+            username,
+            time.monotonic() + self.ttl,
+        )
+        self._schedule(channel_layer, group)
+
+    def stop(self, channel_layer, group, channel_name):
+        typers = self._typers.get(group)
+        if not typers:
+            return
+        stopped = typers.pop(channel_name, None)
+        # 같은 사용자의 다른 연결이 아직 입력 중이면 알릴 변경이 없음
+        if stopped is not None and stopped[0] not in self.typers(group):
+            self._schedule(channel_layer, group)
+
+    def typers(self, group):
+        """만료되지 않은 입력 중 사용자 이름 목록"""
+        typers = self._typers.get(group)
+        if not typers:
+            self._typers.pop(group, None)
+            return []
+        now = time.monotonic()
+        for channel_name, (_, expires) in list(typers.items()):
+            if expires <= now:
+                del typers[channel_name]
+        return sorted({username for username, _ in typers.values()})
+
+    def _schedule(self, channel_layer, group):
+        self._debouncer.schedule(
+            group, functools.partial(self._flush, channel_layer, group)
+        )
+
+    async def _flush(self, channel_layer, group):
+        await metrics.group_send(
+            channel_layer,
+            group,
+            {
+                "type": "typing_update",
+                "source": SOURCE_ID,
+                "users": self.typers(group),
+                "ttl": self.ttl,
+            },
+        )
+
+
+typing_coalescer = TypingCoalescer()
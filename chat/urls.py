@@ -35,6 +35,7 @@ rooms_router.register(r"messages", views.MessageViewSet, basename="room-messages
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("test/", views.test_api_view, name="test_api"),
+    path("metrics", views.metrics_view, name="metrics"),
     path("api/", include(router.urls)),
     path("api/", include(rooms_router.urls)),
     # JWT 토큰 인증 URL
@@ -1,18 +1,25 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth.models import User
 from django.db.models import Q
-from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework_simplejwt.tokens import RefreshToken
+from . import etags, metrics, presence, purge, roster, rows
+from .db_routers import replica_reads_view
+from .exports import EXPORT_FORMATS, astream_export, decode_cursor, stream_export
+from .history import MessageHistory, find_message, room_history
 from .models import ChatRoom, ChatRoomMember, Message
 from .serializers import (
     ChatRoomSerializer,
     MessageSerializer,
     UserSerializer,
-    ChatRoomMemberSerializer,
     UserRegistrationSerializer,
 )
 
@@ -22,15 +29,61 @@ def test_api_view(request):
     return render(request, "chat/test_api.html")
 
 
+async def metrics_view(request):
+    """Prometheus 스크랩용 지표 (텍스트 노출 형식)
+
+    ``METRICS_TOKEN`` Bearer 토큰이나 스태프 로그인 세션이 있어야 합니다.
+    토큰이 맞지 않으면 403, 토큰 없이 스태프가 아니면 401을 반환합니다.
+    (익명 요청도 ``AutoCreateUserMiddleware`` 가 임시 사용자로 로그인시키므로
+    로그인 여부로는 구분하지 않습니다.)
+    """
+    authorization = request.headers.get("Authorization", "")
+    if not metrics.token_matches(authorization):
+        user = await request.auser()
+        if not user.is_staff:
+            if authorization:
+                return HttpResponse(status=403)
+            response = HttpResponse(status=401)
+            response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+            return response
+    return HttpResponse(
+        await metrics.arender(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 class ChatRoomViewSet(viewsets.ModelViewSet):
     """채팅방 관련 API 엔드포인트
 
     채팅방 생성, 조회, 참여, 나가기 등의 기능을 제공합니다.
     """
 
-    queryset = ChatRoom.objects.all()
+    # 삭제된 채팅방은 정리(purge_rooms) 전이라도 바로 숨김
+    queryset = ChatRoom.objects.filter(deleted_at__isnull=True).order_by("id")
     serializer_class = ChatRoomSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [rows.RowJSONRenderer, BrowsableAPIRenderer]
+
+    @replica_reads_view
+    @method_decorator(condition(etag_func=etags.rooms_etag))
+    def list(self, request, *args, **kwargs):
+        """채팅방 목록 조회 (``If-None-Match`` 가 일치하면 304)
+
+        시리얼라이저 대신 ``rows.ROOM`` 으로 값 튜플을 바로 변환합니다.
+        """
+        queryset = rows.ROOM.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.ROOM.map(page))
+        return Response(rows.ROOM.map(queryset))
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        etags.rooms_changed()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        etags.rooms_changed()
 
     def create(self, request):
         """새 채팅방 생성"""
@@ -43,11 +96,29 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
+            # 메시지 보존 기간 (없으면 채팅방 종류별 설정을 따름)
+            retention_days = request.data.get("retention_days")
+            if retention_days is not None:
+                try:
+                    retention_days = int(retention_days)
+                except (TypeError, ValueError):
+                    retention_days = 0
+                if retention_days < 1:
+                    return Response(
+                        {"error": "보존 기간은 1일 이상이어야 합니다."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
             # 채팅방 생성
-            chat_room = ChatRoom.objects.create(name=name, room_type=room_type)
+            chat_room = ChatRoom.objects.create(
+                name=name, room_type=room_type, retention_days=retention_days
+            )
 
-            # 생성자를 채팅방 멤버로 추가
-            ChatRoomMember.objects.create(room=chat_room, user=request.user)
+            # 생성자를 채팅방 멤버로 추가 (채널은 메시지를 보낼 수 있는 관리자로)
+            role = "admin" if room_type == "channel" else "member"
+            ChatRoomMember.objects.create(room=chat_room, user=request.user, role=role)
+            roster.invalidate(chat_room.id)
+            etags.rooms_changed()
 
             return Response(
                 ChatRoomSerializer(chat_room).data, status=status.HTTP_201_CREATED
@@ -101,6 +172,8 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
             # 두 사용자를 채팅방 멤버로 추가
             ChatRoomMember.objects.create(room=chat_room, user=request.user)
             ChatRoomMember.objects.create(room=chat_room, user=target_user)
+            roster.invalidate(chat_room.id)
+            etags.rooms_changed()
 
             return Response(
                 ChatRoomSerializer(chat_room).data, status=status.HTTP_201_CREATED
@@ -111,8 +184,17 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=True, methods=["get"])
+    @replica_reads_view
+    @method_decorator(condition(etag_func=etags.room_messages_etag))
     def messages(self, request, pk=None):
-        """특정 채팅방의 메시지 목록 조회"""
+        """특정 채팅방의 메시지 목록 조회
+
+        ``before`` 파라미터(메시지 ID)를 주면 그 메시지보다 오래된 메시지를
+        조회합니다. 메시지 ID는 시간순으로 정렬되므로 WebSocket으로 받은 ID를
+        (저장되기 전이라도) 그대로 커서로 쓸 수 있습니다.
+
+        ``If-None-Match`` 가 일치하면 참여 여부만 확인하고 304로 응답합니다.
+        """
         try:
             # 채팅방 존재 및 접근 권한 확인
             chat_room = self.get_object()
@@ -124,22 +206,82 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
+            before = None
+            if request.query_params.get("before"):
+                try:
+                    before = int(request.query_params["before"])
+                except ValueError:
+                    before = None
+                if before is None or before < 0:
+                    return Response(
+                        {"error": "잘못된 커서입니다."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
             # 최신 메시지 50개를 조회한 후 시간순으로 정렬하여 반환
-            messages = Message.objects.filter(room=chat_room).order_by("-created_at")[
-                :50
-            ]
+            # (DB에 50개가 없으면 아카이브에서 이어서 읽음)
+            history = room_history(chat_room.id, before=before)
+            messages = history.values_list(*rows.MESSAGE.columns)[:50]
             messages = list(reversed(messages))  # 최신순에서 시간순으로 변경
-            serializer = MessageSerializer(messages, many=True)
 
-            return Response({"results": serializer.data})
+            return Response({"results": rows.MESSAGE.map(messages)})
         except Exception as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
     @action(detail=True, methods=["get"])
+    def export(self, request, pk=None):
+        """채팅방 전체 메시지 내보내기 (NDJSON/CSV 스트리밍)
+
+        ``export_format`` 파라미터로 ``ndjson``(기본) 또는 ``csv`` 를 선택하고,
+        ``cursor`` 파라미터로 마지막으로 받은 행 다음부터 이어 받을 수 있습니다.
+        """
+        chat_room = self.get_object()
+        if not ChatRoomMember.objects.filter(
+            room=chat_room, user=request.user
+        ).exists():
+            return Response(
+                {"error": "채팅방에 참여하고 있지 않습니다."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        format_name = request.query_params.get("export_format", "ndjson")
+        format_class = EXPORT_FORMATS.get(format_name)
+        if format_class is None:
+            return Response(
+                {"error": "지원하지 않는 내보내기 형식입니다."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        after = None
+        if request.query_params.get("cursor"):
+            try:
+                after = decode_cursor(request.query_params["cursor"])
+            except ValueError:
+                return Response(
+                    {"error": "잘못된 커서입니다."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        export_format = format_class()
+        if isinstance(request._request, ASGIRequest):
+            content = astream_export(chat_room.id, export_format, after)
+        else:
+            content = stream_export(chat_room.id, export_format, after)
+        response = StreamingHttpResponse(
+            content, content_type=export_format.content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="room-{chat_room.id}.{export_format.extension}"'
+        )
+        return response
+
+    @action(detail=True, methods=["get"])
+    @replica_reads_view
+    @method_decorator(condition(etag_func=etags.room_users_etag))
     def users(self, request, pk=None):
-        """특정 채팅방의 참여자 목록 조회"""
+        """특정 채팅방의 참여자 목록 조회 (``If-None-Match`` 가 일치하면 304)"""
         try:
             chat_room = self.get_object()
             if not ChatRoomMember.objects.filter(
@@ -150,19 +292,9 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
-            members = ChatRoomMember.objects.filter(room=chat_room).select_related(
-                "user"
-            )
-            serializer = ChatRoomMemberSerializer(members, many=True)
-
-            # 사용자 목록 형식 변경 - users 키를 가진 딕셔너리로 반환
-            users_data = []
-            for member in serializer.data:
-                user_data = member["user"]
-                user_data["is_online"] = member["is_online"]
-                users_data.append(user_data)
-
-            return Response({"users": users_data})
+            # 사용자 정보와 is_online을 합친 목록을 users 키로 반환
+            members = rows.MEMBER.rows(ChatRoomMember.objects.filter(room=chat_room))
+            return Response({"users": rows.MEMBER.map(members)})
         except Exception as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -192,6 +324,7 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
 
             # 채팅방에 참여
             ChatRoomMember.objects.create(room=chat_room, user=request.user)
+            roster.invalidate(chat_room.id)
 
             return Response({"success": "채팅방에 참여했습니다."})
         except Exception as e:
@@ -215,10 +348,12 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
 
             # 채팅방 나가기
             member.delete()
+            roster.invalidate(chat_room.id)
 
             # 채팅방에 남은 사용자가 없는 경우 채팅방 삭제
+            # (메시지는 purge_rooms 명령이 나누어 지우므로 바로 응답)
             if not ChatRoomMember.objects.filter(room=chat_room).exists():
-                chat_room.delete()
+                purge.soft_delete_room(chat_room.id)
                 return Response(
                     {
                         "success": "채팅방을 나갔습니다. 참여자가 없어 채팅방이 삭제되었습니다."
@@ -241,6 +376,7 @@ class MessageViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Message.objects.all()
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [rows.RowJSONRenderer, BrowsableAPIRenderer]
 
     def get_queryset(self):
         """사용자가 참여한 채팅방의 메시지만 조회"""
@@ -248,9 +384,44 @@ class MessageViewSet(viewsets.ReadOnlyModelViewSet):
         return (
             Message.objects.filter(room__participants__user=user)
             .select_related("sender")
-            .order_by("-created_at")
+            .order_by("-id")
         )
 
+    def _room_ids(self):
+        return list(
+            ChatRoomMember.objects.filter(user=self.request.user).values_list(
+                "room_id", flat=True
+            )
+        )
+
+    @replica_reads_view
+    def list(self, request, *args, **kwargs):
+        """메시지 목록 조회 (DB와 아카이브를 합쳐 최신순으로 페이지네이션)"""
+        history = MessageHistory(self.get_queryset(), self._room_ids())
+        history = history.values_list(*rows.MESSAGE.columns)
+        page = self.paginate_queryset(history)
+        if page is not None:
+            return self.get_paginated_response(rows.MESSAGE.map(page))
+        return Response(rows.MESSAGE.map(history[:]))
+
+    @replica_reads_view
+    def retrieve(self, request, *args, **kwargs):
+        """메시지 상세 조회"""
+        return super().retrieve(request, *args, **kwargs)
+
+    def get_object(self):
+        """DB에 없으면 아카이브에서 메시지를 찾습니다."""
+        try:
+            return super().get_object()
+        except Http404:
+            message = None
+            pk = str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, ""))
+            if pk.isdigit():
+                message = find_message(int(pk), self._room_ids())
+            if message is None:
+                raise
+            return message
+
 
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
     """사용자 관련 API 엔드포인트
@@ -268,13 +439,45 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=["get"])
+    @replica_reads_view
     def online(self, request):
-        """온라인 상태인 사용자 목록 조회"""
-        # Redis 캐시에서 온라인 상태인 사용자 ID 목록 조회
-        online_user_ids = cache.get("online_users", [])
-        online_users = User.objects.filter(id__in=online_user_ids)
-        serializer = UserSerializer(online_users, many=True)
-        return Response(serializer.data)
+        """온라인 상태인 사용자 목록 조회
+
+        - ``scope``: ``all``(기본), ``contacts``(1:1 채팅 상대), ``rooms``(참여
+          중인 채팅방의 사용자, 채널 제외)
+        - ``cursor``: 이전 응답의 ``next`` 값, ``limit``: 페이지 크기 (최대 200)
+        - ``count=true``: 목록 없이 온라인 사용자 수만 반환
+        """
+        scope = request.query_params.get("scope", "all")
+        if scope not in presence.ONLINE_SCOPES:
+            return Response(
+                {"error": "지원하지 않는 범위입니다."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if request.query_params.get("count") in ("1", "true"):
+            return Response({"count": presence.online_count(request.user, scope)})
+
+        try:
+            cursor = int(request.query_params.get("cursor", 0))
+            limit = int(request.query_params.get("limit", presence.ONLINE_PAGE_SIZE))
+        except ValueError:
+            cursor = limit = -1
+        if cursor < 0 or limit < 1:
+            return Response(
+                {"error": "잘못된 커서 또는 페이지 크기입니다."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user_ids, next_cursor = presence.online_page(
+            request.user, scope, cursor, min(limit, presence.ONLINE_MAX_PAGE_SIZE)
+        )
+        return Response(
+            {
+                "results": presence.user_rows(user_ids),
+                "next": str(next_cursor) if next_cursor is not None else None,
+            }
+        )
 
     @action(detail=False, methods=["put"], permission_classes=[IsAuthenticated])
     def update_profile(self, request):
@@ -283,6 +486,12 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = UserSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            presence.invalidate_user_row(user.id)
+            # 참여자 목록과 (발신자 정보를 담은) 메시지 목록 API의 ETag 갱신
+            room_ids = presence.room_ids(user)
+            for room_id in room_ids:
+                roster.invalidate(room_id)
+            etags.messages_changed(*room_ids)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 